@@ -0,0 +1,246 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+artifact_cache.py
+@author Luc Kusters
+@date 02-11-2022
+
+Persistent on-disk cache of arrays derived from a circuit.
+
+Location tables, fault signatures, measurement plans and noiseless
+reference samples only depend on the content of a circuit, the error
+model and the engine (simulator) computing them. They are stored as .npy
+files in a directory named after the fingerprint of these inputs, such
+that the worker processes of a sweep memory-map them instead of
+recomputing them on every cold start.
+
+Example:
+    >>> cache = ArtifactCache()
+    >>> table = cache.location_table(circ, epgc_list)
+    >>> plan = cache.measurement_plan(circ)
+    >>> bits = cache.reference_sample(circ, seed=0)
+
+Fault signatures are cached by signature_cache.FaultSignatureCache, an
+ArtifactCache of FaultSignatures.
+
+Entries are written to a temporary directory which is renamed once
+complete, so concurrent workers never read partial entries.
+"""
+
+import os
+import shutil
+import tempfile
+
+import numpy
+import pecos.simulators
+
+from pecos_toolkit import circuit_compiler
+from pecos_toolkit import circuit_fingerprint
+from pecos_toolkit import circuit_repeat
+from pecos_toolkit import circuit_runner
+from pecos_toolkit.error_generator_toolkit import error_placer_toolkit
+
+
+# increase when the layout or meaning of the cached artifacts changes
+ARTIFACT_VERSION = 2
+
+MEASUREMENT_PREFIX = circuit_compiler.MEASUREMENT_PREFIX
+
+
+def default_cache_dir():
+    """$PECOS_TOOLKIT_CACHE, or ~/.cache/pecos_toolkit if not set"""
+    return os.environ.get("PECOS_TOOLKIT_CACHE", os.path.join(
+        os.path.expanduser("~"), ".cache", "pecos_toolkit"))
+
+
+def load_array(path):
+    """Read only memory map of a .npy file (empty arrays are loaded)"""
+    try:
+        return numpy.load(path, mmap_mode="r")
+    except ValueError:  # empty arrays can not be memory-mapped
+        array = numpy.load(path)
+        array.setflags(write=False)
+        return array
+
+
+def artifact_key(kind, circuit, error_model=None, engine=None, **params):
+    """Fingerprint of an artifact of a circuit
+
+    Args:
+        kind, name of the artifact, e.g. "location_table"
+        circuit, pecos QuantumCircuit
+        error_model, optional epgc list or error_model.ErrorModel
+        engine, optional name of what computes the artifact
+        params, further (hashable) inputs of the artifact
+    """
+    return circuit_fingerprint.fingerprint(
+            kind, ARTIFACT_VERSION,
+            circuit_fingerprint.circuit_fingerprint(circuit),
+            None if error_model is None
+            else circuit_fingerprint.error_model_fingerprint(error_model),
+            engine, params)
+
+
+class ArtifactCache(object):
+    """Directory of memory-mapped dicts of named arrays"""
+
+    def __init__(self, directory=None):
+        if directory is None:
+            directory = os.path.join(default_cache_dir(), "artifacts")
+        self.directory = directory
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    def __contains__(self, key):
+        return os.path.isdir(self.path(key))
+
+    def load_arrays(self, key):
+        """Memory-map the arrays stored under a key"""
+        path = self.path(key)
+        return {name[:-len(".npy")]: load_array(os.path.join(path, name))
+                for name in sorted(os.listdir(path)) if name.endswith(".npy")}
+
+    def store_arrays(self, key, arrays):
+        """Store a dict of named arrays under a key"""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=self.directory, prefix=".tmp-")
+        try:
+            for name, array in arrays.items():
+                numpy.save(os.path.join(tmp_dir, f"{name}.npy"),
+                           numpy.asarray(array))
+            os.rename(tmp_dir, self.path(key))
+        except OSError:
+            # another process stored the same entry first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if key not in self:
+                raise
+
+    def cached(self, key, compute):
+        """Arrays of a key, compute() (a dict) is stored if missing"""
+        if key not in self:
+            self.store_arrays(key, compute())
+        return self.load_arrays(key)
+
+    def location_table(self, circuit, epgc_list):
+        """Cached compute_location_table, for repeat circuits the cached
+        table of the block tiled over the repetitions"""
+        if circuit_repeat.is_repeat(circuit):
+            ticks = circuit._ticks
+            return circuit_repeat.tile_ticks(
+                    self.location_table(ticks.block, epgc_list),
+                    ticks.block_length, ticks.repetitions)
+        key = artifact_key("location_table", circuit, epgc_list)
+        return self.cached(key, lambda: {"table": compute_location_table(
+                circuit, epgc_list)})["table"]
+
+    def possible_errors(self, circuit, epgc_list):
+        """error_placer_toolkit.possible_error_coordinates of the cached
+        location table"""
+        return location_table_coordinates(self.location_table(circuit,
+                                                              epgc_list))
+
+    def measurement_plan(self, circuit):
+        """Cached compute_measurement_plan, for repeat circuits the cached
+        plan of the block tiled over the repetitions"""
+        if circuit_repeat.is_repeat(circuit):
+            ticks = circuit._ticks
+            return circuit_repeat.tile_ticks(
+                    self.measurement_plan(ticks.block),
+                    ticks.block_length, ticks.repetitions)
+        key = artifact_key("measurement_plan", circuit)
+        return self.cached(key, lambda: {"plan": compute_measurement_plan(
+                circuit)})["plan"]
+
+    def reference_sample(self, circuit, seed=0, n_qudits=None):
+        """Cached compute_reference_sample"""
+        if n_qudits is None:
+            n_qudits = max(circuit.qudits, default=-1) + 1
+        key = artifact_key("reference_sample", circuit, engine="SparseSim",
+                           seed=seed, n_qudits=n_qudits)
+        return self.cached(key, lambda: {"bits": compute_reference_sample(
+                circuit, seed, n_qudits)})["bits"]
+
+
+def compute_location_table(circuit, epgc_list):
+    """Structured array of the possible single errors of a circuit
+
+    One row per error_placer_toolkit.possible_error_coordinates, fields
+    gate_symbol, tick_idx, qudits (padded with -1), n_qudits (0 for a
+    single int qudit), error_gate (padded with ""), n_error_gates (0 for a
+    single symbol) and after. See location_table_coordinates.
+    """
+    errors = error_placer_toolkit.possible_error_coordinates(circuit,
+                                                             epgc_list)
+    qudits = [error.qudits if isinstance(error.qudits, tuple)
+              else (error.qudits, ) for error in errors]
+    gates = [error.error_gate if isinstance(error.error_gate, tuple)
+             else (error.error_gate, ) for error in errors]
+    table = numpy.zeros(len(errors), dtype=[
+            ("gate_symbol", "U{}".format(
+                max([len(e.gate_symbol) for e in errors], default=1))),
+            ("tick_idx", numpy.int64),
+            ("qudits", numpy.int64, (max(map(len, qudits), default=1), )),
+            ("n_qudits", numpy.int8),
+            ("error_gate", "U{}".format(
+                max([len(s) for g in gates for s in g], default=1)),
+             (max(map(len, gates), default=1), )),
+            ("n_error_gates", numpy.int8),
+            ("after", bool)])
+    table["qudits"] = -1
+    for row, (error, q, g) in enumerate(zip(errors, qudits, gates)):
+        table["gate_symbol"][row] = error.gate_symbol
+        table["tick_idx"][row] = error.tick_idx
+        table["qudits"][row, :len(q)] = q
+        table["n_qudits"][row] = (len(q) if isinstance(error.qudits, tuple)
+                                  else 0)
+        table["error_gate"][row, :len(g)] = g
+        table["n_error_gates"][row] = (
+                len(g) if isinstance(error.error_gate, tuple) else 0)
+        table["after"][row] = error.after
+    return table
+
+
+def location_table_coordinates(table):
+    """List of error_placer_toolkit.ErrorCoordinates of a location table"""
+    coordinates = []
+    for row in table:
+        n_qudits, n_gates = int(row["n_qudits"]), int(row["n_error_gates"])
+        qudits = (tuple(int(q) for q in row["qudits"][:n_qudits])
+                  if n_qudits else int(row["qudits"][0]))
+        error_gate = (tuple(str(g) for g in row["error_gate"][:n_gates])
+                      if n_gates else str(row["error_gate"][0]))
+        coordinates.append(error_placer_toolkit.ErrorCoordinate(
+                gate_symbol=str(row["gate_symbol"]),
+                tick_idx=int(row["tick_idx"]), qudits=qudits,
+                error_gate=error_gate, after=bool(row["after"])))
+    return coordinates
+
+
+def compute_measurement_plan(circuit):
+    """Structured array (tick_idx, qudit, basis) of every measurement
+
+    Rows are in output order: by tick, in the gate order of the tick and
+    by qudit (as pauli_propagation.PauliPropagator.measurement_locations).
+    """
+    rows = [(tick_idx, qudit, symbol[len(MEASUREMENT_PREFIX):])
+            for tick_idx in range(len(circuit))
+            for symbol, locations, _ in circuit.items(tick=tick_idx)
+            if symbol.startswith(MEASUREMENT_PREFIX)
+            for qudit in sorted(locations)]
+    return numpy.array(rows, dtype=[("tick_idx", numpy.int64),
+                                    ("qudit", numpy.int64),
+                                    ("basis", "U1")])
+
+
+def compute_reference_sample(circuit, seed, n_qudits):
+    """Measurement bits of a noiseless SparseSim run of n_qudits, in
+    compute_measurement_plan order
+
+    seed is the seed of the runner (random measurement outcomes).
+    """
+    runner = circuit_runner.ImprovedRunner(random_seed=False, seed=seed)
+    res = runner.run(pecos.simulators.SparseSim(n_qudits), circuit)
+    bits = [res.measurements[int(tick_idx)][int(qudit)]
+            for tick_idx, qudit, _ in compute_measurement_plan(circuit)]
+    return numpy.array(bits, dtype=numpy.uint8)
@@ -0,0 +1,346 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+circuit_compiler.py
+@author Luc Kusters
+@date 07-11-2022
+
+Lowering of circuits to a flat instruction stream.
+
+Every gate location of a circuit becomes one instruction, stored column
+wise in contiguous arrays: opcode (index in the symbol table), qudit1,
+qudit2 (-1 for single qudit gates) and measurement_slot (position of the
+outcome in the measurement output, -1 for other gates). The instructions
+of tick t are those in tick_start[t]:tick_start[t + 1].
+
+    >>> compiled = get_compiled(circ)
+    >>> compiled.symbols[compiled.opcode[0]], compiled.location(0)
+
+Compiled circuits are cached per circuit (and recompiled when the circuit
+is mutated, see circuit_revision), such that the runner
+(circuit_runner.CompiledRunner), the error generator (location_index) and
+the fault placer (error_placer_toolkit.GateCoordinateList) walk the arrays
+instead of the gate dicts and sets of the circuit. Instructions are
+ordered by tick, in the gate order of the tick and by sorted location;
+measurement slots follow the same order (as
+artifact_cache.compute_measurement_plan).
+Only the block of a repeat circuit (see circuit_repeat) is compiled, the
+compiled repeat circuit is a RepeatedCompiledCircuit view on it.
+"""
+
+import collections
+import collections.abc
+import functools
+import itertools
+import json
+import threading
+import weakref
+
+import numpy
+import pecos
+
+from pecos_toolkit import circuit_registry
+from pecos_toolkit import circuit_repeat
+
+MEASUREMENT_PREFIX = "measure "
+
+# One row per gate location, in circuit order (by tick, in the gate order
+# of the tick and by sorted location). locations holds the qudits of every
+# row padded with -1, arity is the number of qudits of tuple locations and
+# 0 for single (int) qudit locations. opcode and param index the symbols
+# and params tables.
+CircuitArrays = collections.namedtuple("CircuitArrays", (
+        "n_ticks", "qudits", "symbols", "params", "tick", "opcode",
+        "param", "locations", "arity"))
+
+_CACHE = weakref.WeakKeyDictionary()
+_CACHE_LOCK = threading.Lock()
+# unique revision numbers, see count_mutations
+_REVISIONS = itertools.count(1)
+_MISSING = object()
+
+
+def circuit_arrays(circuit):
+    """CircuitArrays of a circuit
+
+    Raises:
+        TypeError, if gate params can not be encoded as json
+    """
+    symbols, params, rows = {}, {}, []
+    for tick_idx in range(len(circuit)):
+        for symbol, locations, gate_params in circuit.items(tick=tick_idx):
+            opcode = symbols.setdefault(symbol, len(symbols))
+            param = params.setdefault(json.dumps(gate_params, sort_keys=True),
+                                      len(params))
+            rows.extend((tick_idx, opcode, param, location)
+                        for location in sorted(locations))
+    width = max([len(row[3]) for row in rows if isinstance(row[3], tuple)],
+                default=1)
+    locations = numpy.full((len(rows), width), -1, dtype=numpy.int32)
+    arity = numpy.zeros(len(rows), dtype=numpy.int8)
+    for row, (_, _, _, location) in enumerate(rows):
+        if isinstance(location, tuple):
+            locations[row, :len(location)] = location
+            arity[row] = len(location)
+        else:
+            locations[row, 0] = location
+    columns = list(zip(*rows)) or [(), (), ()]
+    return CircuitArrays(
+            n_ticks=len(circuit),
+            qudits=numpy.array(sorted(circuit.qudits), dtype=numpy.int32),
+            symbols=tuple(symbols),
+            params=tuple(json.loads(key) for key in params),
+            tick=numpy.array(columns[0], dtype=numpy.int32),
+            opcode=numpy.array(columns[1], dtype=numpy.int16),
+            param=numpy.array(columns[2], dtype=numpy.int16),
+            locations=locations, arity=arity)
+
+
+def _counted(method, circuit_of):
+    """Wrap a mutating method to give the circuit a new revision number"""
+    @functools.wraps(method)
+    def mutate(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            circuit_of(self)._revision = next(_REVISIONS)
+    mutate.counts_mutations = True
+    return mutate
+
+
+def count_mutations(circuit_class, tick_class):
+    """Instrument the mutating methods of a circuit and tick class (in
+    place, once) to store a new revision number on the circuit"""
+    for cls, methods, circuit_of in (
+            (circuit_class, circuit_registry.MUTATING_METHODS,
+             lambda circuit: circuit),
+            (tick_class, circuit_registry.TICK_MUTATING_METHODS,
+             lambda tick: tick.circuit)):
+        for name in methods:
+            method = vars(cls).get(name)
+            if method is not None and not getattr(
+                    method, "counts_mutations", False):
+                setattr(cls, name, _counted(method, circuit_of))
+
+
+count_mutations(pecos.circuits.QuantumCircuit,
+                pecos.circuits.quantum_circuit.ParamGateCollection)
+
+
+def tick_revision(tick):
+    """Token which compares unequal whenever the gates of a tick change
+
+    Frozen ticks (see circuit_registry) can not change and are their own
+    token, the token of other ticks holds their symbols, locations and
+    params.
+    """
+    if circuit_registry.is_frozen(tick):
+        return tick
+    return (tick, tuple((symbol, frozenset(locations), dict(params))
+                        for symbol, locations, params in tick.items()))
+
+
+def circuit_revision(circuit):
+    """Token which compares unequal whenever the ticks of a circuit change
+
+    The mutating methods of pecos circuits and ticks give the circuit a
+    new, unique revision number (see count_mutations), which is the token
+    of a circuit with a list of ticks (None if it was not mutated since
+    the instrumentation). Ticks of a shallow copy (QuantumCircuit.copy)
+    count towards the circuit they were created in. Only for other tick
+    sequences (e.g. overlays, sharing the ticks of their base circuit) the
+    token is built from the ticks, see tick_revision.
+    """
+    if type(circuit._ticks) is list:
+        return circuit.__dict__.get("_revision")
+    return tuple(tick_revision(tick) for tick in circuit._ticks)
+
+
+class CompiledCircuit(object):
+    """Flat instruction stream of a circuit, see the module documentation
+
+    Example:
+        >>> compiled = CompiledCircuit(circuit_arrays(circ))
+        >>> for opcode, location, param, slot in compiled.ticks[3]:
+        ...     pass
+    """
+
+    def __init__(self, arrays, revision=None):
+        """
+        Args:
+            arrays, CircuitArrays (e.g. circuit_serialization.load_arrays)
+            revision, circuit_revision of the compiled circuit
+
+        Raises:
+            ValueError, if a location acts on more than two qudits
+        """
+        arity = numpy.asarray(arrays.arity)
+        if numpy.any((arity == 1) | (arity > 2)):
+            raise ValueError("Only int and qudit pair locations can be"
+                             " compiled")
+        self.revision = revision
+        self.n_ticks = arrays.n_ticks
+        self.qudits = arrays.qudits
+        self.symbols = arrays.symbols
+        self.params = arrays.params
+        self.opcode = arrays.opcode
+        self.param = arrays.param
+        self.qudit1 = arrays.locations[:, 0]
+        self.qudit2 = numpy.where(arity == 2, arrays.locations[:, -1], -1)
+        self.tick_start = numpy.searchsorted(
+                arrays.tick, numpy.arange(self.n_ticks + 1))
+        is_measurement = numpy.array(
+                [symbol.startswith(MEASUREMENT_PREFIX)
+                 for symbol in self.symbols] + [False])[self.opcode]
+        self.measurement_slot = numpy.where(
+                is_measurement, numpy.cumsum(is_measurement) - 1, -1)
+        self.n_measurements = int(numpy.count_nonzero(is_measurement))
+        self._ticks = None
+        self._measurement_locations = None
+
+    def __len__(self):
+        return len(self.opcode)
+
+    def location(self, row):
+        """Location (int or qudit pair) of an instruction"""
+        if self.qudit2[row] < 0:
+            return int(self.qudit1[row])
+        return (int(self.qudit1[row]), int(self.qudit2[row]))
+
+    def tick_rows(self, tick_idx):
+        """Range of the instructions of a tick"""
+        return range(self.tick_start[tick_idx], self.tick_start[tick_idx + 1])
+
+    def idle_qudits(self, tick_idx):
+        """Sorted array of the qudits no instruction of a tick acts on"""
+        rows = slice(self.tick_start[tick_idx], self.tick_start[tick_idx + 1])
+        return numpy.setdiff1d(self.qudits, numpy.concatenate(
+                (self.qudit1[rows], self.qudit2[rows])))
+
+    @property
+    def ticks(self):
+        """List per tick of (opcode, location, param, measurement_slot)
+        instructions as python objects (built on first use), for
+        interpreters"""
+        if self._ticks is None:
+            instructions = list(zip(
+                    self.opcode.tolist(),
+                    [q1 if q2 < 0 else (q1, q2) for q1, q2
+                     in zip(self.qudit1.tolist(), self.qudit2.tolist())],
+                    self.param.tolist(), self.measurement_slot.tolist()))
+            starts = self.tick_start.tolist()
+            self._ticks = [instructions[start:stop] for start, stop
+                           in zip(starts[:-1], starts[1:])]
+        return self._ticks
+
+    @property
+    def measurement_locations(self):
+        """List of (tick_idx, location) of every measurement slot"""
+        if self._measurement_locations is None:
+            rows = numpy.flatnonzero(self.measurement_slot >= 0)
+            ticks = numpy.searchsorted(self.tick_start, rows, side="right")
+            self._measurement_locations = [
+                    (int(tick_idx) - 1, self.location(row))
+                    for tick_idx, row in zip(ticks, rows)]
+        return self._measurement_locations
+
+
+class RepeatedCompiledTicks(collections.abc.Sequence):
+    """Read only sequence of the instructions of the ticks of a compiled
+    block, repeated, with the measurement slots offset per repetition"""
+
+    def __init__(self, block, repetitions):
+        self.block = block
+        self.repetitions = repetitions
+        self.measured = [any(slot >= 0 for _, _, _, slot in instructions)
+                         for instructions in block.ticks]
+
+    def __len__(self):
+        return self.block.n_ticks * self.repetitions
+
+    def __getitem__(self, tick_idx):
+        if tick_idx < 0:
+            tick_idx += len(self)
+        if not 0 <= tick_idx < len(self):
+            raise IndexError("tick index out of range")
+        repetition, block_idx = divmod(tick_idx, self.block.n_ticks)
+        instructions = self.block.ticks[block_idx]
+        if repetition == 0 or not self.measured[block_idx]:
+            return instructions
+        offset = repetition * self.block.n_measurements
+        return [(opcode, location, param, slot + offset if slot >= 0
+                 else slot)
+                for opcode, location, param, slot in instructions]
+
+
+class RepeatedCompiledCircuit(object):
+    """Compiled repeat circuit, a view on the CompiledCircuit of its block
+
+    The ticks and measurement slots of repetition r are those of the
+    block, offset by r * block.n_ticks and r * block.n_measurements. The
+    flat instruction arrays are only those of the block.
+    """
+
+    def __init__(self, block, repetitions):
+        """
+        Args:
+            block, CompiledCircuit of the block
+            repetitions, number of repetitions
+        """
+        self.block = block
+        self.repetitions = repetitions
+        self.revision = (block.revision, repetitions)
+        self.n_ticks = block.n_ticks * repetitions
+        self.n_measurements = block.n_measurements * repetitions
+        self.qudits = block.qudits
+        self.symbols = block.symbols
+        self.params = block.params
+        self.ticks = RepeatedCompiledTicks(block, repetitions)
+
+    def __len__(self):
+        return len(self.block) * self.repetitions
+
+    def idle_qudits(self, tick_idx):
+        """Sorted array of the qudits no instruction of a tick acts on"""
+        return self.block.idle_qudits(tick_idx % self.block.n_ticks)
+
+    @property
+    def measurement_locations(self):
+        """List of (tick_idx, location) of every measurement slot"""
+        return [(tick_idx + repetition * self.block.n_ticks, location)
+                for repetition in range(self.repetitions)
+                for tick_idx, location in self.block.measurement_locations]
+
+
+def compile_circuit(circuit):
+    """CompiledCircuit of a circuit"""
+    return CompiledCircuit(circuit_arrays(circuit),
+                           circuit_revision(circuit))
+
+
+def get_compiled(circuit, revision=_MISSING):
+    """Return the (cached) CompiledCircuit of a circuit
+
+    The circuit is recompiled if it was mutated since it was cached.
+    For repeat circuits the compiled block is looked up instead.
+
+    Args:
+        circuit, circuit to compile
+        revision, circuit_revision of the circuit if already computed
+    """
+    if circuit_repeat.is_repeat(circuit):
+        ticks = circuit._ticks
+        return RepeatedCompiledCircuit(get_compiled(ticks.block),
+                                       ticks.repetitions)
+    if revision is _MISSING:
+        revision = circuit_revision(circuit)
+    try:
+        with _CACHE_LOCK:
+            compiled = _CACHE.get(circuit)
+    except TypeError:  # circuit can not be weakly referenced or hashed
+        return compile_circuit(circuit)
+    if compiled is None or compiled.revision != revision:
+        compiled = CompiledCircuit(circuit_arrays(circuit), revision)
+        with _CACHE_LOCK:
+            _CACHE[circuit] = compiled
+    return compiled
@@ -0,0 +1,84 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+circuit_fingerprint.py
+@author Luc Kusters
+@date 24-10-2022
+
+Content hashes of circuits and error models.
+
+Two circuits with the same gates on the same qudits in the same ticks get
+the same fingerprint, independent of the (set) ordering in memory or the
+Python process. Fingerprints are used as keys of on-disk caches of
+results which only depend on the content of a circuit.
+
+Example:
+    >>> key = fingerprint(circuit_fingerprint(circ),
+    ...                   error_model_fingerprint(epgc_list))
+
+The fingerprint of a frozen circuit (see circuit_registry) is computed
+once and stored on the circuit. The fingerprint of a repeat circuit (see
+circuit_repeat) is that of its block and the number of repetitions; it
+differs from the fingerprint of the same ticks in a normal circuit.
+"""
+
+import hashlib
+
+import numpy
+
+from pecos_toolkit import circuit_registry
+from pecos_toolkit import circuit_repeat
+
+
+def _canonical(value):
+    """Order and numpy (version) independent representation of (nested)
+    values, scalars are encoded with their type"""
+    if isinstance(value, (numpy.generic, numpy.ndarray)):
+        value = value.tolist()
+    if isinstance(value, dict):
+        return "{" + ",".join(sorted(f"{_canonical(k)}:{_canonical(v)}"
+                                     for k, v in value.items())) + "}"
+    if isinstance(value, (set, frozenset)):
+        return "{" + ",".join(sorted(_canonical(v) for v in value)) + "}"
+    if isinstance(value, (list, tuple)):
+        return "(" + ",".join(_canonical(v) for v in value) + ")"
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return f"{type(value).__name__}:{value!r}"
+    return f"{type(value).__module__}.{type(value).__qualname__}:{value!r}"
+
+
+def fingerprint(*parts):
+    """Hex sha256 digest of the canonical representation of parts"""
+    return hashlib.sha256(_canonical(parts).encode()).hexdigest()
+
+
+def circuit_fingerprint(circuit):
+    """Fingerprint of the qudits and ticks (gates, locations, params)"""
+    if circuit_repeat.is_repeat(circuit):
+        return fingerprint("repeat",
+                           circuit_fingerprint(circuit._ticks.block),
+                           circuit._ticks.repetitions)
+    frozen = circuit_registry.is_frozen(circuit)
+    # stored with the ticks it belongs to, overlays copy the attributes
+    ticks, content = circuit.__dict__.get("_content_fingerprint",
+                                          (None, None))
+    if frozen and ticks is circuit._ticks:
+        return content
+    ticks = [[(symbol, set(locations), params) for symbol, locations, params
+              in circuit.items(tick=tick_idx)]
+             for tick_idx in range(len(circuit))]
+    content = fingerprint(set(circuit.qudits), ticks)
+    if frozen:
+        circuit._content_fingerprint = (circuit._ticks, content)
+    return content
+
+
+def error_model_fingerprint(error_model):
+    """Fingerprint of a list of ErrorProneGateCollections or an
+    error_model.ErrorModel (without its error parameters)"""
+    if hasattr(error_model, "epgc_list"):
+        excluded = error_model.excluded_qudits
+        return fingerprint(error_model_fingerprint(error_model.epgc_list),
+                           None if excluded is None else set(excluded))
+    return fingerprint([(type(epgc).__name__, epgc._asdict())
+                        for epgc in error_model])
@@ -0,0 +1,138 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+circuit_overlay.py
+@author Luc Kusters
+@date 19-10-2022
+
+Copy-free circuits consisting of a base circuit and a few inserted ticks.
+
+Placing an error in a circuit used to require a deep copy of the circuit
+followed by QuantumCircuit.insert, which shifts all later ticks. An
+overlay circuit instead shares the (unmodified) ticks of its base circuit
+and only holds a sparse patch of inserted ticks:
+
+    >>> error_circ = overlay(circ, [(3, {"X": {0}}), (7, {"Z": {2}})])
+    >>> runner.run(state, error_circ)
+
+Positions refer to tick indices of the base circuit; a tick inserted at
+position p is placed right before base tick p (as QuantumCircuit.insert
+would). The overlay is an object of the same class as the base circuit,
+so it can be run by the runners and error generators like any other
+circuit. Overlays are read only: modifying their ticks would modify the
+base circuit. Use materialize for an independent, mutable copy.
+"""
+
+import bisect
+import collections
+import collections.abc
+import copy
+
+
+class OverlayTicks(collections.abc.Sequence):
+    """Read only sequence of the ticks of a base circuit with inserts"""
+
+    def __init__(self, base_ticks, inserts):
+        """
+        Args:
+            base_ticks, sequence of ticks (ParamGateCollection) of the base
+            inserts, dict of base tick position -> list of inserted ticks
+        """
+        self.base_ticks = base_ticks
+        self.positions = sorted(inserts)
+        self.inserts = [tuple(inserts[pos]) for pos in self.positions]
+        # overlay index of the first inserted tick of every position
+        self.starts = []
+        n_inserted = 0
+        for position, ticks in zip(self.positions, self.inserts):
+            self.starts.append(position + n_inserted)
+            n_inserted += len(ticks)
+        self.n_inserted = n_inserted
+
+    def __len__(self):
+        return len(self.base_ticks) + self.n_inserted
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("tick index out of range")
+        patch = bisect.bisect_right(self.starts, index) - 1
+        if patch >= 0:
+            offset = index - self.starts[patch]
+            if offset < len(self.inserts[patch]):
+                return self.inserts[patch][offset]
+            # base tick after this patch: skip all ticks inserted so far
+            n_before = self.starts[patch] - self.positions[patch] \
+                + len(self.inserts[patch])
+            return self.base_ticks[index - n_before]
+        return self.base_ticks[index]
+
+    def __iter__(self):
+        base_idx = 0
+        for position, ticks in zip(self.positions, self.inserts):
+            while base_idx < position:
+                yield self.base_ticks[base_idx]
+                base_idx += 1
+            yield from ticks
+        while base_idx < len(self.base_ticks):
+            yield self.base_ticks[base_idx]
+            base_idx += 1
+
+
+def overlay(base, inserts):
+    """Circuit of the base circuit with ticks inserted, without copying
+
+    Args:
+        base, pecos QuantumCircuit (or subclass) to insert ticks in
+        inserts, iterable of (position, gate_dict) pairs, e.g.
+            (3, {"X": {0}}). Ticks inserted at the same position keep
+            their order.
+
+    Returns:
+        object of the same type as base sharing its ticks and attributes
+    """
+    circ = object.__new__(type(base))
+    circ.__dict__.update(base.__dict__)
+    # inserted ticks register their qudits with the circuit they belong to
+    circ.qudits = set(base.qudits)
+    base_ticks = base_ticks_of(base)
+    patch = collections.defaultdict(list)
+    for position, gate_dict in inserts:
+        if not 0 <= position <= len(base_ticks):
+            raise IndexError(f"Can not insert a tick at position {position}"
+                             f" of a circuit with {len(base_ticks)} ticks")
+        patch[position].append(base._gates_class(circ, gate_dict))
+    circ._ticks = OverlayTicks(base_ticks, patch)
+    return circ
+
+
+def base_ticks_of(circuit):
+    """Ticks of a circuit, the base ticks for overlays of overlays"""
+    if is_overlay(circuit):
+        return list(circuit._ticks)
+    return circuit._ticks
+
+
+def is_overlay(circuit):
+    """Whether a circuit is an overlay circuit"""
+    return isinstance(getattr(circuit, "_ticks", None), OverlayTicks)
+
+
+def materialize(circuit):
+    """Independent (deep) copy of a circuit, overlays (and other lazy tick
+    sequences, e.g. repeat circuits) become normal circuits of the same
+    type"""
+    ticks = circuit._ticks
+    if isinstance(ticks, circuit._ticks_class):
+        return copy.deepcopy(circuit)
+    # copy every tick separately, ticks may occur more than once
+    circ = copy.deepcopy(circuit, {id(ticks): None})
+    circ._ticks = circ._ticks_class()
+    for tick in ticks:
+        tick = copy.deepcopy(tick, {id(tick.circuit): circ})
+        tick.circuit = circ
+        circ._ticks.append(tick)
+    return circ
@@ -0,0 +1,147 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+circuit_registry.py
+@author Luc Kusters
+@date 01-11-2022
+
+Shared, read only circuits built once per set of constructor arguments.
+
+Protocols run the same few circuits (e.g. the stabilizer measurement
+circuit of every stabilizer) for every shot. Instead of constructing them
+again on every call, the registry builds each distinct circuit once,
+freezes it and hands out the same instance:
+
+    >>> circ = circuit_registry.get(Measurement.StabMeasCircuit, stab)
+    >>> runner.run(state, circ)
+
+Frozen circuits are objects of a subclass of the original circuit class,
+so runners and error generators treat them like any other circuit, but
+all methods modifying the ticks raise a TypeError. The ticks are frozen
+as well: their add and discard raise a TypeError and their gate
+locations and active qudits become frozensets. copy.deepcopy of a frozen
+circuit (or circuit_overlay.materialize) gives an independent, mutable
+circuit of the original class. The constructor arguments form the key of
+the registry and must therefore be hashable. The registry can be shared
+between threads.
+"""
+
+import collections
+import copy
+import threading
+
+
+MUTATING_METHODS = ("append", "update", "insert", "add_ticks", "extend",
+                    "discard", "clear", "pop", "remove", "reverse",
+                    "__setitem__", "__delitem__", "__iadd__")
+TICK_MUTATING_METHODS = ("add", "discard")
+
+# circuit (or tick) class -> frozen subclass, see frozen_class
+_frozen_classes = {}
+_frozen_classes_lock = threading.Lock()
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is frozen, use copy.deepcopy"
+                    " of the circuit for a mutable copy")
+
+
+def _mutable_deepcopy(self, memo):
+    circ = object.__new__(self.mutable_class)
+    memo[id(self)] = circ
+    for name, value in self.__dict__.items():
+        setattr(circ, name, copy.deepcopy(value, memo))
+    return circ
+
+
+def _mutable_tick_deepcopy(self, memo):
+    tick = _mutable_deepcopy(self, memo)
+    tick.symbols = collections.defaultdict(list, {
+            symbol: [tick.Gate(gate.symbol, gate.params, set(gate.locations))
+                     for gate in gates]
+            for symbol, gates in tick.symbols.items()})
+    tick.active_qudits = set(tick.active_qudits)
+    return tick
+
+
+def frozen_class(circuit_class, mutating_methods=MUTATING_METHODS,
+                 deepcopy=_mutable_deepcopy):
+    """Read only subclass of a circuit (or tick) class, created once per
+    class"""
+    if getattr(circuit_class, "mutable_class", None) is not None:
+        return circuit_class
+    with _frozen_classes_lock:
+        frozen = _frozen_classes.get(circuit_class)
+        if frozen is None:
+            namespace = {name: _read_only for name in mutating_methods}
+            namespace.update(mutable_class=circuit_class,
+                             __deepcopy__=deepcopy,
+                             __module__=circuit_class.__module__)
+            frozen = _frozen_classes[circuit_class] = type(
+                    f"Frozen{circuit_class.__name__}", (circuit_class, ),
+                    namespace)
+    return frozen
+
+
+def freeze_tick(tick):
+    """Make a tick (ParamGateCollection) read only (in place)"""
+    if is_frozen(tick):
+        return tick
+    tick.symbols = {symbol: tuple(tick.Gate(gate.symbol, gate.params,
+                                            frozenset(gate.locations))
+                                  for gate in gates)
+                    for symbol, gates in tick.symbols.items()}
+    tick.active_qudits = frozenset(tick.active_qudits)
+    tick.__class__ = frozen_class(type(tick), TICK_MUTATING_METHODS,
+                                  _mutable_tick_deepcopy)
+    return tick
+
+
+def freeze(circuit):
+    """Make a circuit and its ticks read only (in place) and return it"""
+    for tick in circuit._ticks:
+        freeze_tick(tick)
+    circuit.__class__ = frozen_class(type(circuit))
+    return circuit
+
+
+def is_frozen(circuit):
+    """Whether a circuit (or tick) is frozen"""
+    return getattr(type(circuit), "mutable_class", None) is not None
+
+
+class CircuitRegistry(object):
+    """Frozen circuits keyed by their class and constructor arguments"""
+
+    def __init__(self):
+        self._circuits = {}
+        self.n_built = 0
+        # reentrant: constructors may get their sub circuits from the
+        # registry
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._circuits)
+
+    def get(self, circuit_class, *args, **kwargs):
+        """The shared frozen circuit_class(*args, **kwargs)"""
+        key = (circuit_class, args, tuple(sorted(kwargs.items())))
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                circuit = freeze(circuit_class(*args, **kwargs))
+                self._circuits[key] = circuit
+                self.n_built += 1
+        return circuit
+
+    def clear(self):
+        with self._lock:
+            self._circuits.clear()
+
+
+REGISTRY = CircuitRegistry()
+
+
+def get(circuit_class, *args, **kwargs):
+    """Frozen circuit of the default registry, see CircuitRegistry.get"""
+    return REGISTRY.get(circuit_class, *args, **kwargs)
@@ -0,0 +1,105 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+circuit_repeat.py
+@author Luc Kusters
+@date 05-11-2022
+
+REPEAT(n) circuits: a block circuit (e.g. one round of stabilizer
+measurements) repeated n times, without copying its ticks.
+
+    >>> rounds = repeat(round_circ, 300)
+    >>> len(rounds) == 300 * len(round_circ)
+    >>> runner.run(state, rounds)
+
+The ticks of a repeat circuit are a lazy, read only sequence indexed by
+the global tick index (repetition * len(block) + block tick index), so
+runners and error generators iterate it like any other circuit while it
+takes the memory of a single block. Error location indexes, location
+tables and measurement plans are computed once for the block and offset
+per repetition. Like overlays, repeat circuits are objects of the type of
+the block and are read only; prefix and suffix ticks (e.g. encoding and
+readout) can be added with circuit_overlay.overlay, which keeps the
+circuit lazy.
+"""
+
+import collections.abc
+
+import numpy
+
+from pecos_toolkit import circuit_overlay
+
+
+class RepeatTicks(collections.abc.Sequence):
+    """Read only sequence of the ticks of a block, repeated"""
+
+    def __init__(self, block, repetitions):
+        """
+        Args:
+            block, circuit to repeat
+            repetitions, number of repetitions n >= 0
+        """
+        if repetitions < 0:
+            raise ValueError("The number of repetitions can not be negative")
+        self.block = block
+        self.block_ticks = circuit_overlay.base_ticks_of(block)
+        self.repetitions = repetitions
+
+    @property
+    def block_length(self):
+        return len(self.block_ticks)
+
+    def __len__(self):
+        return self.block_length * self.repetitions
+
+    def block_position(self, index):
+        """(repetition, block tick index) of a global tick index"""
+        return divmod(index, self.block_length)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("tick index out of range")
+        return self.block_ticks[index % self.block_length]
+
+    def __iter__(self):
+        for _ in range(self.repetitions):
+            yield from self.block_ticks
+
+
+def repeat(block, repetitions):
+    """Circuit of a block repeated, without copying
+
+    Args:
+        block, pecos QuantumCircuit (or subclass) to repeat
+        repetitions, number of repetitions
+
+    Returns:
+        object of the same type as block sharing its ticks and attributes
+    """
+    circ = object.__new__(type(block))
+    circ.__dict__.update(block.__dict__)
+    circ.qudits = set(block.qudits)
+    circ._ticks = RepeatTicks(block, repetitions)
+    return circ
+
+
+def is_repeat(circuit):
+    """Whether a circuit is a repeat circuit"""
+    return isinstance(getattr(circuit, "_ticks", None), RepeatTicks)
+
+
+def tile_ticks(array, block_length, repetitions, field="tick_idx"):
+    """Structured array of the rows of a block for every repetition
+
+    The tick indices (field) of repetition r are offset by
+    r * block_length.
+    """
+    tiled = numpy.tile(numpy.asarray(array), repetitions)
+    tiled[field] += numpy.repeat(
+            numpy.arange(repetitions, dtype=tiled[field].dtype)
+            * block_length, len(array))
+    return tiled
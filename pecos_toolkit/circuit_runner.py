@@ -7,16 +7,32 @@ Runners.py
 """
 
 import collections
+import contextlib
 import copy
 import numpy.random
 
 import pecos.circuit_runners
 
+from pecos_toolkit import circuit_compiler
+from pecos_toolkit.error_generator_toolkit import error_model
+
 
 RunnerResult = collections.namedtuple("RunnerResult", ("state", "measurements",
                                                        "faults"))
 
 
+def _excluding(error_gen, excluded_qudits):
+    """Context excluding qudits from the errors of error_gen, see
+    ErrorGenerator.GeneralErrorGen.excluding"""
+    if error_gen is None or excluded_qudits is None:
+        return contextlib.nullcontext()
+    if not hasattr(error_gen, "excluding"):
+        raise TypeError("excluded_qudits requires a GeneralErrorGen or"
+                        " ErrorModel error_gen, not"
+                        f" {type(error_gen).__name__}")
+    return error_gen.excluding(excluded_qudits)
+
+
 class MeasurementContainer(dict):
     """Data structure for containing measurements used in the ImprovedRunner
 
@@ -77,6 +93,12 @@ class ImprovedRunner(pecos.circuit_runners.Standard):
     Measurement output is always given as a dict of ticks containing
     dicts of locations with measurement output as a 0 or 1 (instead
     of only showing measurment output IF the output is a 1)
+
+    The error_gen kwarg may also be an (immutable) error_model.ErrorModel,
+    in which case the generator of the calling thread is used and the
+    error_params default to the parameters stored in the model. The
+    excluded_qudits kwarg excludes qudits from errors for this run only,
+    keeping the (configuration of the) error generator.
     """
     MEASUREMENTS = ("measure X", "measure Y", "measure Z")
 
@@ -85,10 +107,16 @@ class ImprovedRunner(pecos.circuit_runners.Standard):
         seed = numpy.random.randint(1e9) if random_seed else seed
         super().__init__(seed=seed, *args, **kwargs)
 
-    def run(self, state, circ, copy_state=False, *args, **kwargs):
+    def run(self, state, circ, copy_state=False, *args,
+            excluded_qudits=None, **kwargs):
         if copy_state:
             state = copy.deepcopy(state)
-        std_meas, std_faults = super().run(state, circ, *args, **kwargs)
+        if "error_gen" in kwargs:
+            kwargs["error_gen"], kwargs["error_params"] = \
+                error_model.resolve_error_gen(kwargs["error_gen"],
+                                              kwargs.get("error_params"))
+        with _excluding(kwargs.get("error_gen"), excluded_qudits):
+            std_meas, std_faults = super().run(state, circ, *args, **kwargs)
         meas = MeasurementContainer()
         for tick, tick_idx, params in circ.iter_ticks():
             locations = [qudit for gate_symbol, qudit_set, params
@@ -109,3 +137,59 @@ class ImprovedRunner(pecos.circuit_runners.Standard):
         if len(std_faults) == 0:
             faults = None
         return RunnerResult(state, meas, faults)
+
+
+class CompiledRunner(ImprovedRunner):
+    """ImprovedRunner executing the compiled instruction stream of a
+    circuit (see circuit_compiler)
+
+    Every opcode is bound to the gate function of the state once per run,
+    after which the instructions are dispatched by index instead of by
+    walking the gate dicts of every tick. Errors are generated (by the
+    same error generators) and applied as by the standard runner, the
+    result is the same RunnerResult.
+    """
+
+    def run(self, state, circ, copy_state=False, error_gen=None,
+            error_params=None, error_circuits=None, excluded_qudits=None):
+        if copy_state:
+            state = copy.deepcopy(state)
+        if error_gen is not None:
+            error_gen, error_params = error_model.resolve_error_gen(
+                    error_gen, error_params)
+            with _excluding(error_gen, excluded_qudits):
+                error_circuits = error_gen.start(circ, error_params, state)
+        elif error_circuits is None:
+            error_circuits = {}
+        compiled = circuit_compiler.get_compiled(circ)
+        gates = [state.bindings[symbol] for symbol in compiled.symbols]
+        params = compiled.params
+        error_free = circ.metadata.get("error_free", False)
+        outcomes = [0] * compiled.n_measurements
+        for tick_idx, instructions in enumerate(compiled.ticks):
+            errors = {}
+            if not error_free:
+                if error_gen is not None:
+                    error_circuits = error_gen.generate_tick_errors(
+                            circ[tick_idx], tick_idx, **circ.metadata)
+                errors = error_circuits.get(tick_idx, {})
+            removed = errors.get("replaced") or ()
+            if errors.get("before"):
+                state.run_circuit(errors["before"])
+            for opcode, location, param, slot in instructions:
+                if location in removed:
+                    continue
+                result = gates[opcode](state, location, **params[param])
+                if slot >= 0 and result:
+                    outcomes[slot] = 1
+            if errors.get("after"):
+                state.run_circuit(errors["after"])
+        meas = MeasurementContainer()
+        for (tick_idx, location), outcome in zip(
+                compiled.measurement_locations, outcomes):
+            if tick_idx not in meas:
+                meas[tick_idx] = Measurement(num_qubits=state.num_qubits)
+            meas[tick_idx][location] = outcome
+        return RunnerResult(state, meas if len(meas) > 0 else None,
+                            error_circuits if len(error_circuits) > 0
+                            else None)
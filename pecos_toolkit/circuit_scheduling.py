@@ -0,0 +1,114 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+circuit_scheduling.py
+@author Luc Kusters
+@date 03-11-2022
+
+Tick compaction: pack the gates of a circuit into the fewest ticks.
+
+Circuits are mostly built with one append per gate, such that every gate
+gets its own tick and all other qudits idle. compact moves every gate
+(in circuit order) to the earliest tick in which none of its qudits is
+acted on, after all earlier gates it has to stay behind:
+
+    >>> compact_circ = compact(Logical.LogicalZeroInitialization())
+
+By default the order of the gates acting on every qudit is kept, which
+preserves the circuit and the way faults propagate through it; only idle
+locations disappear. With reorder_commuting=True a gate may also pass
+earlier gates it commutes with on all shared qudits (e.g. CNOTs sharing a
+control), which preserves the ideal circuit but can change how faults
+spread. The gate order on fixed_qudits is always kept; for flag circuits
+(circuits with an f1_flag_circ) these default to the ancilla and flag.
+"""
+
+import collections
+
+from pecos_toolkit import circuit_overlay
+
+
+# Pauli type (X or Z) every gate acts as on each of its qudits. Gates of
+# the same type on a qudit commute there, other gates never pass a gate.
+GATE_ROLES = {
+        "CNOT": ("Z", "X"),
+        "CZ": ("Z", "Z"),
+        "X": ("X", ),
+        "Z": ("Z", ),
+        }
+
+ScheduledGate = collections.namedtuple("ScheduledGate", (
+        "symbol", "location", "params", "tick_idx"))
+
+
+def circuit_gates(circuit):
+    """(symbol, location, params) of every gate in circuit order"""
+    return [(symbol, location, params)
+            for tick_idx in range(len(circuit))
+            for symbol, locations, params in circuit.items(tick=tick_idx)
+            for location in sorted(locations)]
+
+
+def flag_qudits(circuit):
+    """Ancilla and flag qudit of a flag circuit, else an empty set"""
+    flag_circ = getattr(circuit, "f1_flag_circ", None)
+    if flag_circ is None:
+        return set()
+    return {flag_circ.flag_from_qubit, flag_circ.flag_qubit}
+
+
+def schedule(gates, reorder_commuting=False, fixed_qudits=()):
+    """Earliest tick of every gate, see the module documentation
+
+    Args:
+        gates, (symbol, location, params) in circuit order
+        reorder_commuting, whether commuting gates may pass each other
+        fixed_qudits, qudits on which the gate order is always kept
+
+    Returns:
+        list of ScheduledGates in the order of gates
+    """
+    fixed_qudits = set(fixed_qudits)
+    # qudit -> role -> last tick of a gate acting as role on the qudit
+    last = collections.defaultdict(dict)
+    busy = []  # tick -> qudits acted on
+    scheduled = []
+    for symbol, location, params in gates:
+        qudits = location if isinstance(location, tuple) else (location, )
+        roles = GATE_ROLES.get(symbol, (None, ) * len(qudits))
+        earliest = 0
+        for qudit, role in zip(qudits, roles):
+            keep_order = (not reorder_commuting or role is None
+                          or qudit in fixed_qudits)
+            for other_role, tick in last[qudit].items():
+                if keep_order or other_role != role:
+                    earliest = max(earliest, tick + 1)
+        tick_idx = earliest
+        while tick_idx < len(busy) and busy[tick_idx].intersection(qudits):
+            tick_idx += 1
+        if tick_idx == len(busy):
+            busy.append(set())
+        busy[tick_idx].update(qudits)
+        for qudit, role in zip(qudits, roles):
+            last[qudit][role] = max(last[qudit].get(role, -1), tick_idx)
+        scheduled.append(ScheduledGate(symbol, location, params, tick_idx))
+    return scheduled
+
+
+def compact(circuit, reorder_commuting=False, fixed_qudits=None):
+    """Copy of a circuit (of the same type) with its gates in the fewest
+    ticks, see schedule. Empty ticks are removed.
+
+    fixed_qudits defaults to flag_qudits(circuit).
+    """
+    if fixed_qudits is None:
+        fixed_qudits = flag_qudits(circuit)
+    scheduled = schedule(circuit_gates(circuit), reorder_commuting,
+                         fixed_qudits)
+    circ = circuit_overlay.materialize(circuit)
+    circ._ticks = circ._ticks_class()
+    circ.add_ticks(max([gate.tick_idx + 1 for gate in scheduled], default=0))
+    for gate in scheduled:
+        circ.update(gate.symbol, {gate.location}, tick=gate.tick_idx,
+                    **gate.params)
+    return circ
@@ -0,0 +1,226 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+circuit_serialization.py
+@author Luc Kusters
+@date 06-11-2022
+
+Compact binary encoding of circuits, e.g. to ship them to worker
+processes.
+
+pecos circuits can not be pickled, and those that could carry per tick
+dicts of sets and (for BaseSteaneCircs) a runner with its random number
+generator. A serialized circuit instead consists of a small json header
+(symbol table, gate parameters, metadata, circuit class) followed by flat
+arrays with one row per gate location: tick, opcode (index in the symbol
+table), params (index in the params table) and qudits.
+
+    >>> data = dumps(circ)
+    >>> circ = loads(data)
+
+loads rebuilds a runnable circuit of the same class with the same ticks,
+qudits and metadata, frozen again if the circuit was frozen (see
+circuit_registry). Runner state is never serialized: circuits which had a
+runner get the runner passed to loads, or a fresh, randomly seeded
+ImprovedRunner. The other attributes set by the constructors of circuit
+subclasses (e.g. the stabilizers and measurement slots of a
+FusedStabMeasCircuit) are stored in the header, unless they are the
+class attribute of the same name (e.g. the code of Steane circuits).
+Builtin containers, numpy arrays, namedtuples and objects of importable
+classes (by their __dict__) are supported. load_arrays only decodes the
+CircuitArrays (without copying), e.g. to compile them directly with
+circuit_compiler.CompiledCircuit.
+Overlay and repeat circuits are serialized as their expanded ticks.
+"""
+
+import functools
+import importlib
+import json
+import struct
+
+import numpy
+import pecos
+
+from pecos_toolkit import circuit_compiler
+from pecos_toolkit import circuit_registry
+from pecos_toolkit import circuit_runner
+
+MAGIC = b"PTKC"
+VERSION = 2
+_PREFIX = struct.Struct("<4sHI")  # magic, version, header length
+
+CircuitArrays = circuit_compiler.CircuitArrays
+circuit_arrays = circuit_compiler.circuit_arrays
+
+_ARRAY_FIELDS = ("qudits", "tick", "opcode", "param", "locations", "arity")
+# attributes not stored with the other instance attributes of a circuit
+_EXCLUDED_ATTRIBUTES = frozenset(
+        vars(pecos.circuits.QuantumCircuit())) | {
+                "_runner", "_content_fingerprint", "_revision"}
+_MISSING = object()
+_CONTAINERS = {"list": list, "tuple": tuple, "set": set,
+               "frozenset": frozenset}
+
+
+def _import_class(module, qualname):
+    return functools.reduce(getattr, qualname.split("."),
+                            importlib.import_module(module))
+
+
+def encode_attribute(value):
+    """Json encodable form of an instance attribute, see decode_attribute
+
+    Raises:
+        TypeError, if the value (or an item of it) can not be encoded
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (numpy.ndarray, numpy.generic)):
+        return {"array": [value.dtype.str, value.shape, value.tolist()]}
+    if type(value) is dict:
+        return {"dict": [[encode_attribute(key), encode_attribute(item)]
+                         for key, item in value.items()]}
+    if type(value) in _CONTAINERS.values():
+        return {type(value).__name__: [encode_attribute(item)
+                                       for item in value]}
+    cls = [type(value).__module__, type(value).__qualname__]
+    if isinstance(value, tuple) and hasattr(value, "_fields"):
+        return {"namedtuple": cls,
+                "items": [encode_attribute(item) for item in value]}
+    if type(value).__module__ != "builtins" and hasattr(value, "__dict__") \
+            and "<locals>" not in cls[1]:
+        return {"object": cls, "state": encode_attribute(vars(value))}
+    raise TypeError(f"Can not serialize an attribute of type"
+                    f" {type(value).__name__}")
+
+
+def decode_attribute(data):
+    """Instance attribute of its encode_attribute form"""
+    if not isinstance(data, dict):
+        return data
+    if "array" in data:
+        dtype, shape, items = data["array"]
+        array = numpy.array(items, dtype=dtype).reshape(shape)
+        return array[()] if shape == [] else array
+    if "dict" in data:
+        return {decode_attribute(key): decode_attribute(item)
+                for key, item in data["dict"]}
+    if "namedtuple" in data:
+        return _import_class(*data["namedtuple"])(
+                *map(decode_attribute, data["items"]))
+    if "object" in data:
+        value = object.__new__(_import_class(*data["object"]))
+        value.__dict__.update(decode_attribute(data["state"]))
+        return value
+    (name, items), = data.items()
+    return _CONTAINERS[name](map(decode_attribute, items))
+
+
+def dumps(circuit):
+    """Serialize a circuit to bytes, see the module documentation
+
+    Raises:
+        TypeError, if gate params or instance attributes can not be
+            encoded
+    """
+    arrays = circuit_arrays(circuit)
+    circuit_class = type(circuit)
+    if circuit_registry.is_frozen(circuit):
+        circuit_class = circuit_class.mutable_class
+    header = {
+            "class": [circuit_class.__module__, circuit_class.__qualname__],
+            "frozen": circuit_registry.is_frozen(circuit),
+            "runner": "_runner" in circuit.__dict__,
+            "metadata": circuit.metadata,
+            "attributes": {name: encode_attribute(value) for name, value
+                           in vars(circuit).items()
+                           if name not in _EXCLUDED_ATTRIBUTES
+                           and value is not getattr(circuit_class, name,
+                                                    _MISSING)},
+            "n_ticks": arrays.n_ticks,
+            "symbols": arrays.symbols,
+            "params": arrays.params,
+            "arrays": [(field, getattr(arrays, field).dtype.str,
+                        getattr(arrays, field).shape)
+                       for field in _ARRAY_FIELDS],
+            }
+    header = json.dumps(header).encode()
+    return b"".join([_PREFIX.pack(MAGIC, VERSION, len(header)), header]
+                    + [getattr(arrays, field).tobytes()
+                       for field in _ARRAY_FIELDS])
+
+
+def _load_header(data):
+    magic, version, header_length = _PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Data is not a serialized circuit")
+    if version != VERSION:
+        raise ValueError(f"Serialized circuit version {version} is not"
+                         f" supported (expected {VERSION})")
+    offset = _PREFIX.size + header_length
+    return json.loads(bytes(data[_PREFIX.size:offset])), offset
+
+
+def load_arrays(data):
+    """CircuitArrays of serialized circuit data, the arrays are read only
+    views on data"""
+    header, offset = _load_header(data)
+    arrays = {}
+    for field, dtype, shape in header["arrays"]:
+        dtype = numpy.dtype(dtype)
+        count = int(numpy.prod(shape))
+        arrays[field] = numpy.frombuffer(
+                data, dtype=dtype, count=count, offset=offset).reshape(shape)
+        offset += count * dtype.itemsize
+    return CircuitArrays(n_ticks=header["n_ticks"],
+                         symbols=tuple(header["symbols"]),
+                         params=tuple(header["params"]), **arrays)
+
+
+def build_circuit(arrays, circuit_class=pecos.circuits.QuantumCircuit,
+                  metadata=None):
+    """Circuit of circuit_class with the gates of CircuitArrays
+
+    The constructor of circuit_class is not called, only the pecos
+    QuantumCircuit attributes are set.
+    """
+    circ = object.__new__(circuit_class)
+    pecos.circuits.QuantumCircuit.__init__(circ, **(metadata or {}))
+    circ.add_ticks(arrays.n_ticks)
+    rows = zip(arrays.tick.tolist(), arrays.opcode.tolist(),
+               arrays.param.tolist(), arrays.locations.tolist(),
+               arrays.arity.tolist())
+    group, gates = None, set()
+    for tick_idx, opcode, param, location, arity in rows:
+        if (tick_idx, opcode, param) != group:
+            if gates:
+                circ.update(arrays.symbols[group[1]], gates, tick=group[0],
+                            **arrays.params[group[2]])
+            group, gates = (tick_idx, opcode, param), set()
+        gates.add(tuple(location[:arity]) if arity else location[0])
+    if gates:
+        circ.update(arrays.symbols[group[1]], gates, tick=group[0],
+                    **arrays.params[group[2]])
+    circ.qudits.update(arrays.qudits.tolist())
+    return circ
+
+
+def loads(data, runner=None):
+    """Circuit of serialized circuit data, see the module documentation
+
+    Args:
+        data, bytes (or buffer) returned by dumps
+        runner, runner of circuits which had one, a new ImprovedRunner if
+            None
+    """
+    header, _ = _load_header(data)
+    circ = build_circuit(load_arrays(data), _import_class(*header["class"]),
+                         header["metadata"])
+    for name, value in header["attributes"].items():
+        setattr(circ, name, decode_attribute(value))
+    if header["runner"]:
+        circ._runner = (circuit_runner.ImprovedRunner() if runner is None
+                        else runner)
+    if header["frozen"]:
+        circuit_registry.freeze(circ)
+    return circ
@@ -1,8 +1,15 @@
 import collections
+import contextlib
 import itertools
 
+import numpy
 import pecos
 
+from pecos_toolkit.error_generator_toolkit import fault_recording
+from pecos_toolkit.error_generator_toolkit import location_index
+from pecos_toolkit.error_generator_toolkit import pauli_sampling
+from pecos_toolkit.error_generator_toolkit import rate_tables
+
 # Error types and gate symbols
 _IDENTITY = {"I"}
 _PAULI_X = {"X"}
@@ -127,6 +134,17 @@ class GeneralErrorGen(__BaseErrorGen):
 
     ALLOWED_EPGC_TYPES = (ErrorProneGateCollection, IdleErrorCollection)
 
+    def __init__(self, *args, **kwargs):
+        # fault recording / replay state (see fault_recording)
+        self.shot = 0
+        self.circuit_index = -1
+        self.recorder = None
+        self.replay_record = None
+        self.location_index = None
+        # qudits excluded during the current run only, see excluding
+        self.run_excluded_qudits = None
+        super().__init__(*args, **kwargs)
+
     def configure_error_generator(self, epgc_list=list(),
                                   excluded_qudits=None):
         """Configure the error generator
@@ -138,11 +156,98 @@ class GeneralErrorGen(__BaseErrorGen):
             epgc_list, list of ErrorProneGateCollection or IdleErrorCollection
                 tracks which gates are error prone / if idle locations can
                 have errors.
+            excluded_qudits, iterable of qudits on which no errors are
+                generated (or None)
         """
         self.epgc_list = epgc_list
-        self.excluded_qudits = None
+        self.excluded_qudits = (frozenset(excluded_qudits)
+                                if excluded_qudits is not None else None)
         self.configure_generator_from_epgc_list(self.epgc_list)
 
+    @classmethod
+    def from_error_model(cls, error_model):
+        """Build a new generator from an (immutable) error_model.ErrorModel"""
+        return cls(epgc_list=list(error_model.epgc_list),
+                   excluded_qudits=error_model.excluded_qudits)
+
+    @property
+    def error_model(self):
+        """Immutable snapshot (error_model.ErrorModel) of the configuration"""
+        from pecos_toolkit.error_generator_toolkit import error_model
+        return error_model.ErrorModel.from_error_gen(self)
+
+    def start(self, circuit, error_params, state):
+        """Start a circuit run
+
+        Looks up the (cached) location_index.CircuitLocationIndex of the
+        circuit and counts the circuits run within a shot.
+        """
+        self.circuit_index += 1
+        self.location_index = location_index.get_location_index(
+                circuit, self.active_excluded_qudits)
+        return super().start(circuit, error_params, state)
+
+    @property
+    def active_excluded_qudits(self):
+        """Configured and run excluded qudits (or None)"""
+        if self.run_excluded_qudits is None:
+            return self.excluded_qudits
+        return self.run_excluded_qudits.union(self.excluded_qudits or ())
+
+    @contextlib.contextmanager
+    def excluding(self, excluded_qudits):
+        """Exclude qudits from errors within the context only
+
+        Unlike excluded_qudits of configure_error_generator, this does
+        not change the configuration of the generator, such that a caller
+        can exclude qudits for a few runs (e.g. data_qudit_noise_only of
+        the steane protocols) without replacing the generator.
+
+            >>> with error_gen.excluding({7, 8}):
+            ...     runner.run(state, circ, error_gen=error_gen)
+        """
+        previous = self.run_excluded_qudits
+        self.run_excluded_qudits = frozenset(excluded_qudits).union(
+                previous or ())
+        try:
+            yield self
+        finally:
+            self.run_excluded_qudits = previous
+
+    def next_shot(self):
+        """Mark the start of a new shot for fault recording and replay
+
+        A shot consists of all circuits run by a single protocol call
+        (e.g. protocols.steane_round), faults are identified by the
+        index of the circuit within the shot.
+        """
+        self.shot += 1
+        self.circuit_index = -1
+
+    def record_faults(self, recorder=None):
+        """Record all sampled faults into a fault_recording.FaultRecorder
+
+        Returns:
+            the recorder, also available as self.recorder
+        """
+        if recorder is None:
+            recorder = fault_recording.FaultRecorder()
+        self.recorder = recorder
+        self.shot = 0
+        self.circuit_index = -1
+        return recorder
+
+    def replay_faults(self, fault_record, shot=0):
+        """Inject the faults of a fault_recording.FaultRecord
+
+        Instead of sampling errors, the generator injects exactly the
+        recorded faults, starting at the given shot. Pass None to return
+        to sampling mode.
+        """
+        self.replay_record = fault_record
+        self.shot = shot
+        self.circuit_index = -1
+
     def reconfigure(self):
         """High level method to reconfigure the error generator.
 
@@ -212,6 +317,12 @@ class GeneralErrorGen(__BaseErrorGen):
                                  error_param=epgc.param)
 
     def error_set_from_epgc(self, epgc, after):
+        error_gates = pauli_sampling.unfreeze_weights(epgc.error_gates)
+        if pauli_sampling.is_two_qubit_pauli_set(error_gates):
+            # two-qubit pauli channels (e.g. _PAULI_ERROR_TWO, optionally
+            # weighted as a dict) are sampled for all locations at once
+            return pauli_sampling.TwoQubitPauliErrorSet(error_gates,
+                                                        after=after)
         if any([hasattr(gate, "__iter__") for gate in epgc.error_gates]):
             return self.gen.ErrorSetMultiQuditGate(epgc.error_gates,
                                                    after=after)
@@ -219,20 +330,52 @@ class GeneralErrorGen(__BaseErrorGen):
             return self.gen.ErrorSet(epgc.error_gates, after=after)
 
     def filter_excluded(self, locations, excluded):
-        filtered_locations = set()
-        for loc in locations:
-            if isinstance(loc, tuple):
-                # filter multi qudit locations
-                if not any(sub_loc in excluded for sub_loc in loc):
-                    filtered_locations.add(loc)
-            elif isinstance(loc, int):
-                # filter single qudit locations
-                if loc not in excluded:
-                    filtered_locations.add(loc)
-            else:
-                raise NotImplementedError("filter excluded cannot handle"
-                                          f"location of type {type(loc)}")
-        return filtered_locations
+        return location_index.filter_excluded(locations, excluded)
+
+    def create_errors(self, symbol, locations, after, before, replace,
+                      location_array=None):
+        """Generate errors for all locations of a single gate symbol
+
+        Wraps around the pecos Generator.create_errors, but additionally
+        accepts rate_tables.RateTable objects as error parameter values.
+        In that case the error probability is looked up per location and
+        compared to the random numbers of all locations at once (with <=,
+        as pecos, see rate_tables.draw_errors). Two-qubit
+        pauli errors (pauli_sampling.TwoQubitPauliErrorSet) are sampled
+        for all locations in a single batch. The
+        location_array (see location_index) saves the conversion of the
+        locations to an array for the lookup.
+        """
+        error_tuple = self.gen.error_func_dict.get(
+                symbol, self.gen.default_error_tuple)
+        if error_tuple is False or len(locations) == 0:
+            return
+        error_func, error_param = error_tuple
+        if error_func is True:
+            error_func = self.gen.default_error_tuple[0]
+        if error_func is False:
+            return
+        rate = self.error_params[error_param]
+        error_set = getattr(error_func, "__self__", None)
+        if isinstance(error_set, pauli_sampling.TwoQubitPauliErrorSet):
+            if location_array is None:
+                location_array = numpy.array(list(locations), dtype=int)
+            if isinstance(rate, rate_tables.RateTable):
+                rate = rate.rates(symbol, location_array)
+            error_set.create_errors(after, before, location_array, rate)
+            return
+        if not isinstance(rate, rate_tables.RateTable):
+            self.gen.create_errors(self, symbol, locations, after, before,
+                                   replace)
+            return
+        locations = list(locations)
+        if location_array is None:
+            location_array = locations
+        occurred = rate_tables.draw_errors(
+                len(locations), rate.rates(symbol, location_array))
+        for loc, error_occurred in zip(locations, occurred):
+            if error_occurred:
+                error_func(after, before, replace, loc, self.error_params)
 
     def generate_tick_errors(self, tick_circuit, time, **params):
         """Assign errors to a circuit as configured during initialization"""
@@ -245,25 +388,35 @@ class GeneralErrorGen(__BaseErrorGen):
             tick_index = time[-1]
         else:
             tick_index = time
-        circuit = tick_circuit.circuit
-        for symbol, gate_locations, _ in circuit.items(tick=tick_index):
-            if self.excluded_qudits is not None:
-                gate_locations = self.filter_excluded(gate_locations,
-                                                      self.excluded_qudits)
-            # print(gate_locations)
-            self.gen.create_errors(self, symbol, gate_locations, after,
-                                   before, replace)
+        if self.replay_record is not None:
+            self.replay_tick_errors(tick_index, after, before)
+            self.error_circuits.add_circuits(time, before, after)
+            return self.error_circuits
+        # gate and idle locations (excluded qudits filtered) are looked up
+        # in the location index of the circuit instead of being recomputed
+        tick_locations = self.location_index[tick_index]
+        for symbol, gate_locations, location_array in tick_locations.gates:
+            self.create_errors(symbol, gate_locations, after, before,
+                               replace, location_array)
 
         # add idle errors
-        idle_qudits = circuit.qudits - circuit.active_qudits[tick_index]
-        if self.excluded_qudits is not None:
-            gate_locations = self.filter_excluded(idle_qudits,
-                                                  self.excluded_qudits)
-        else:
-            gate_locations = idle_qudits
-        self.gen.create_errors(self, 'idle', gate_locations, after,
-                               before, replace)
+        _, gate_locations, location_array = tick_locations.idle
+        self.create_errors('idle', gate_locations, after, before, replace,
+                           location_array)
+
+        if self.recorder is not None:
+            self.recorder.record_error_circuit(
+                    self.shot, self.circuit_index, tick_index, before, False)
+            self.recorder.record_error_circuit(
+                    self.shot, self.circuit_index, tick_index, after, True)
 
         # add faults to circuit
         self.error_circuits.add_circuits(time, before, after)
         return self.error_circuits
+
+    def replay_tick_errors(self, tick_index, after, before):
+        """Add the recorded faults of a tick to the error circuits"""
+        for fault in self.replay_record.faults(self.shot, self.circuit_index,
+                                               tick_index):
+            error_circ = after if fault.after else before
+            error_circ.update(fault.symbol, {fault.qudit}, emptyappend=True)
@@ -0,0 +1,126 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+combination_ranks.py
+@author Luc Kusters
+@date 21-10-2022
+
+Deterministic ranks of k-combinations of n items.
+
+Combinations of indices are ranked in lexicographic order (the order of
+itertools.combinations(range(n), k)), such that a range of ranks
+identifies a shard of an enumeration independent of the machine or
+process enumerating it.
+
+Example:
+    >>> unrank(5, n=4, k=2)
+    (2, 3)
+    >>> rank((2, 3), n=4)
+    5
+    >>> list(iter_combinations(4, 2, start=4))
+    [(1, 3), (2, 3)]
+
+A RankPermutation shuffles the ranks without storing them, such that the
+first n ranks of the permutation are a uniformly random sample of n
+distinct combinations:
+
+    >>> permutation = RankPermutation(n_combinations(4, 2), seed=1)
+    >>> [unrank(permutation(i), n=4, k=2) for i in range(3)]
+    [(0, 3), (2, 3), (0, 1)]
+"""
+
+import hashlib
+import math
+
+
+def n_combinations(n, k):
+    """Number of k-combinations of n items"""
+    return math.comb(n, k)
+
+
+def rank(combination, n):
+    """Lexicographic rank of a sorted combination of indices in range(n)"""
+    k = len(combination)
+    result = 0
+    previous = -1
+    for i, index in enumerate(combination):
+        for skipped in range(previous + 1, index):
+            result += math.comb(n - 1 - skipped, k - 1 - i)
+        previous = index
+    return result
+
+
+def unrank(rank, n, k):
+    """Combination of indices in range(n) with the given lexicographic rank"""
+    if not 0 <= rank < math.comb(n, k):
+        raise IndexError(f"rank {rank} out of range for {k}-combinations of"
+                         f" {n} items")
+    combination = []
+    index = 0
+    for i in range(k):
+        while True:
+            n_with_index = math.comb(n - 1 - index, k - 1 - i)
+            if rank < n_with_index:
+                break
+            rank -= n_with_index
+            index += 1
+        combination.append(index)
+        index += 1
+    return tuple(combination)
+
+
+def iter_combinations(n, k, start=0, stop=None):
+    """Yield the combinations with ranks start, ..., stop - 1 (in order)"""
+    total = math.comb(n, k)
+    stop = total if stop is None else min(stop, total)
+    if start >= stop:
+        return
+    combination = list(unrank(start, n, k))
+    for _ in range(start, stop):
+        yield tuple(combination)
+        # lexicographic successor
+        i = k - 1
+        while i >= 0 and combination[i] == n - k + i:
+            i -= 1
+        if i < 0:
+            return
+        combination[i] += 1
+        for j in range(i + 1, k):
+            combination[j] = combination[j - 1] + 1
+
+
+class RankPermutation(object):
+    """Seeded pseudo-random bijection of range(n)
+
+    A keyed Feistel network on the smallest even number of bits covering
+    n, restricted to range(n) by cycle walking. Evaluating the permutation
+    at index i takes O(1) memory, such that random samples without
+    replacement can be streamed (and split in ranges of indices) for any
+    n.
+    """
+
+    def __init__(self, n, seed, rounds=4):
+        self.n = n
+        self.rounds = rounds
+        self.half_bits = max(1, ((n - 1).bit_length() + 1) // 2)
+        self.mask = (1 << self.half_bits) - 1
+        self.key = hashlib.sha256(repr(seed).encode()).digest()
+
+    def round_function(self, round_idx, value):
+        digest = hashlib.blake2b(
+                f"{round_idx}:{value}".encode(), key=self.key,
+                digest_size=(self.half_bits + 7) // 8).digest()
+        return int.from_bytes(digest, "little") & self.mask
+
+    def __call__(self, index):
+        if not 0 <= index < self.n:
+            raise IndexError(f"index {index} out of range for a permutation"
+                             f" of {self.n} items")
+        while True:
+            left, right = index >> self.half_bits, index & self.mask
+            for round_idx in range(self.rounds):
+                left, right = right, left ^ self.round_function(round_idx,
+                                                                right)
+            index = (left << self.half_bits) | right
+            if index < self.n:
+                return index
@@ -0,0 +1,155 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+error_model.py
+@author Luc Kusters
+@date 03-10-2022
+
+Immutable error model configuration which can be shared between threads.
+
+A GeneralErrorGen carries run time state (the error circuits of the
+circuit which is currently being simulated) and may therefore not be
+shared between threads. An ErrorModel only holds the configuration of
+such a generator (epgc list, excluded qudits and error parameters) in a
+frozen and hashable form. Every thread obtains its own generator from the
+model through ErrorModel.generator().
+"""
+
+import collections
+import threading
+
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+
+
+_THREAD_LOCAL = threading.local()
+
+
+def freeze_epgc(epgc):
+    """Return a hashable copy of an (Idle)ErrorProneGateCollection"""
+    allowed_types = ErrorGenerator.GeneralErrorGen.ALLOWED_EPGC_TYPES
+    if not isinstance(epgc, allowed_types):
+        raise TypeError("epgc should be of type ErrorProneGateCollection or"
+                        f" IdleErrorCollection but is of type"
+                        f" {type(epgc).__name__}")
+    frozen_fields = {}
+    for field in ("ep_gates", "error_gates"):
+        if field in epgc._fields:
+            value = getattr(epgc, field)
+            if isinstance(value, dict):
+                # weighted error gates, e.g. biased two-qubit paulis
+                value = value.items()
+            frozen_fields[field] = frozenset(value)
+    return epgc._replace(**frozen_fields)
+
+
+def freeze_error_params(error_params):
+    """Return error parameters as a sorted tuple of (key, value) pairs"""
+    if error_params is None:
+        return None
+    if isinstance(error_params, tuple):
+        error_params = dict(error_params)
+    return tuple(sorted(error_params.items()))
+
+
+class ErrorModel(collections.namedtuple(
+                 "ErrorModel", ("epgc_list", "excluded_qudits",
+                                "error_params"))):
+    """Frozen and hashable configuration of a GeneralErrorGen
+
+    Example:
+        >>> model = ErrorModel([ErrorGenerator.FlipZInit], error_params={
+        ...                     "init": 1e-3})
+        >>> ancilla_free = model.replace(excluded_qudits={7, 8})
+        >>> runner.run(state, circ, error_gen=ancilla_free)
+
+    Per call overrides (replace) return a new model and never touch the
+    original, such that one model can be used by a whole thread pool.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, epgc_list=tuple(), excluded_qudits=None,
+                error_params=None):
+        epgc_list = tuple(freeze_epgc(epgc) for epgc in epgc_list)
+        if excluded_qudits is not None:
+            excluded_qudits = frozenset(excluded_qudits)
+        error_params = freeze_error_params(error_params)
+        return super().__new__(cls, epgc_list, excluded_qudits, error_params)
+
+    @classmethod
+    def from_error_gen(cls, error_gen, error_params=None):
+        """Compile the configuration of a GeneralErrorGen into a model"""
+        if error_params is None:
+            error_params = error_gen.error_params
+        return cls(error_gen.epgc_list, error_gen.excluded_qudits,
+                   error_params)
+
+    @property
+    def params(self):
+        """Error parameters as a (new) dict, or None if not configured"""
+        if self.error_params is None:
+            return None
+        return dict(self.error_params)
+
+    def replace(self, **overrides):
+        """Return a new model with some of the fields replaced
+
+        Accepts the same (unfrozen) values as the constructor.
+        """
+        fields = self._asdict()
+        fields.update(overrides)
+        return ErrorModel(**fields)
+
+    def with_params(self, **error_params):
+        """Return a new model with updated error parameters"""
+        params = self.params or {}
+        params.update(error_params)
+        return self.replace(error_params=params)
+
+    def build_generator(self):
+        """Build a new GeneralErrorGen configured by this model"""
+        return ErrorGenerator.GeneralErrorGen.from_error_model(self)
+
+    def generator(self):
+        """Return the GeneralErrorGen for this model and the calling thread
+
+        Generators are cached per thread, such that repeated calls from
+        the same thread do not reconfigure a generator on every shot. The
+        error parameters are passed at run time and are therefore not
+        part of the cache key.
+        """
+        generators = getattr(_THREAD_LOCAL, "generators", None)
+        if generators is None:
+            generators = _THREAD_LOCAL.generators = {}
+        key = (self.epgc_list, self.excluded_qudits)
+        gen = generators.get(key)
+        if gen is None:
+            gen = generators[key] = self.build_generator()
+        return gen
+
+
+def as_error_model(error_gen):
+    """Return an ErrorModel for an ErrorModel or GeneralErrorGen"""
+    if isinstance(error_gen, ErrorModel):
+        return error_gen
+    if isinstance(error_gen, ErrorGenerator.GeneralErrorGen):
+        return ErrorModel.from_error_gen(error_gen)
+    raise TypeError("error_gen should be an ErrorModel or GeneralErrorGen"
+                    f" but is of type {type(error_gen).__name__}")
+
+
+def resolve_error_gen(error_gen, error_params=None):
+    """Resolve the error_gen and error_params kwargs of a runner call
+
+    ErrorModels are replaced by the generator of the calling thread.
+    Explicitly passed error_params take precedence over the parameters
+    stored in the model. Other error generators are passed through.
+
+    Returns:
+        tuple of (error_gen, error_params)
+    """
+    if isinstance(error_gen, ErrorModel):
+        if error_params is None:
+            error_params = error_gen.params
+        error_gen = error_gen.generator()
+    return error_gen, error_params
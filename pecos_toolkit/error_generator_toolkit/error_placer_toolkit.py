@@ -7,17 +7,30 @@ fault_tolerance_checker.py
 """
 
 import collections
-import copy
 import itertools
+import math
 
+import numpy
+
+from pecos_toolkit import circuit_compiler
+from pecos_toolkit import circuit_overlay
 from pecos_toolkit import circuit_runner
+from pecos_toolkit import circuit_serialization
 from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+from pecos_toolkit.error_generator_toolkit import pauli_propagation
 
 RUNNER = circuit_runner.ImprovedRunner()
 
 
 ErrorCircCollection = collections.namedtuple("ErrorCircCollection",
                                              ("circuit", "error_locations"))
+ErrorClassCircCollection = collections.namedtuple(
+        "ErrorClassCircCollection", ("circuit", "error_locations",
+                                     "multiplicity"))
+FaultClass = collections.namedtuple("FaultClass", ("representative",
+                                                   "multiplicity"))
+FaultSignatures = collections.namedtuple("FaultSignatures", (
+        "measurement_flips", "x", "z", "logical_flips"))
 GateCoordinate = collections.namedtuple("GateCoordinate", ("gate_symbol",
                                                            "tick_idx",
                                                            "qudits"))
@@ -27,25 +40,29 @@ ErrorCoordinate = collections.namedtuple("ErrorCoordinate",
 
 
 def possible_error_coordinates(circuit, epgc_list):
-    error_coordinates = []
     gate_coords = GateCoordinateList(circuit)
     errors_per_gate_type = ErrorModelLookupTable(epgc_list)
-    for gate_symbol, tick_idx, qudits in gate_coords:
-        if gate_symbol in errors_per_gate_type.keys():
-            errors = errors_per_gate_type[gate_symbol]
-        else:
-            continue  # no error for this gate in error model
-        for sub_tick_timestep, after_bool in zip(("before", "after"),
-                                                 (False, True)):
-            for error in errors[sub_tick_timestep]:
-                error_coordinates.append(
-                        ErrorCoordinate(
-                            gate_symbol=gate_symbol,
-                            tick_idx=tick_idx,
-                            qudits=qudits,
-                            error_gate=error,
-                            after=after_bool)
-                        )
+    # (error, after) pairs per gate symbol, sorted, such that the order (and
+    # combination ranks) of the errors does not depend on the hash seed
+    gate_errors = {
+            gate_symbol: [(error, after_bool) for sub_tick_timestep,
+                          after_bool in (("before", False), ("after", True))
+                          for error in sorted(errors[sub_tick_timestep],
+                                              key=str)]
+            for gate_symbol, errors in errors_per_gate_type.items()}
+    error_coordinates = []
+    # only visit the gates of the error model
+    for row in gate_coords.rows(symbol=gate_errors.keys()):
+        gate_symbol, tick_idx, qudits = gate_coords[row]
+        for error, after_bool in gate_errors[gate_symbol]:
+            error_coordinates.append(
+                    ErrorCoordinate(
+                        gate_symbol=gate_symbol,
+                        tick_idx=tick_idx,
+                        qudits=qudits,
+                        error_gate=error,
+                        after=after_bool)
+                    )
     return error_coordinates
 
 
@@ -54,29 +71,207 @@ class ErrorPlacer(object):
     and an error model defined by a list of ErrorProneGateCollections
     """
 
-    def __init__(self, circuit, epgc_list):
+    def __init__(self, circuit, epgc_list, cache=None):
+        """
+        Args:
+            circuit, pecos QuantumCircuit
+            epgc_list, list of ErrorProneGateCollections
+            cache, optional artifact_cache.ArtifactCache to load the
+                possible errors from (stored there if missing)
+        """
         self.circuit = circuit
         self.epgc_list = epgc_list
-        self.possible_errors = possible_error_coordinates(circuit, epgc_list)
-
-    def generate_error_circuits(self, order=1):
-        error_circs = []
-        error_combinations = itertools.combinations(self.possible_errors,
-                                                    r=order)
-        for combination in error_combinations:
-            for error in combination:
-                error_circ = copy.deepcopy(self.circuit)
-                _, tick_idx, qudits, error_gate, after = error
-                if isinstance(error_gate, tuple):
-                    for single_gate, qudit in zip(error_gate, qudits):
-                        error_circ.insert(tick_idx + int(after),
-                                          ({single_gate: {qudit}}, {}))
-                elif isinstance(error_gate, str):
-                    error_circ.insert(tick_idx + int(after),
-                                      ({error_gate: {qudits}}, {}))
-            error_circs.append(ErrorCircCollection(
-                error_circ, combination))
-        return error_circs
+        if cache is None:
+            self.possible_errors = possible_error_coordinates(circuit,
+                                                              epgc_list)
+        else:
+            self.possible_errors = cache.possible_errors(circuit, epgc_list)
+        self._propagator = None
+
+    def __getstate__(self):
+        """Pickle the circuit in its compact binary form (see
+        circuit_serialization), the propagator is rebuilt on first use"""
+        state = dict(self.__dict__)
+        state["circuit"] = circuit_serialization.dumps(self.circuit)
+        state["_propagator"] = None
+        return state
+
+    def __setstate__(self, state):
+        state["circuit"] = circuit_serialization.loads(state["circuit"])
+        self.__dict__.update(state)
+
+    @property
+    def propagator(self):
+        """PauliPropagator of the circuit (built on first use)"""
+        if self._propagator is None:
+            self._propagator = pauli_propagation.PauliPropagator(
+                    self.circuit)
+        return self._propagator
+
+    def single_fault_signatures(self, qudits=None):
+        """Packed signature of the propagated effect of every single fault
+
+        See pauli_propagation.effect_signatures, faults with equal
+        signatures flip the same measurements and leave the same Pauli.
+        """
+        effects = self.propagator.propagate(self.possible_errors)
+        return pauli_propagation.effect_signatures(effects, qudits)
+
+    def fault_signatures(self, data_qudits, logical_x, logical_z):
+        """Effect of every single fault on the measurements and data
+
+        Args:
+            data_qudits, sequence of the data qudits
+            logical_x, logical_z, qudits supporting the logical X and Z
+                operators
+
+        Returns:
+            FaultSignatures of bool arrays with a row per possible error:
+            measurement_flips (n_faults, n_measurements), the final data
+            Pauli as x and z (n_faults, n_data_qudits) and logical_flips
+            (n_faults, 2), whether the data Pauli flips logical Z (X part)
+            and logical X (Z part)
+        """
+        effects = self.propagator.propagate(self.possible_errors)
+        data_qudits = list(data_qudits)
+        x = effects.x[:, data_qudits]
+        z = effects.z[:, data_qudits]
+        logical_flips = numpy.stack((
+                numpy.logical_xor.reduce(effects.x[:, sorted(logical_z)],
+                                         axis=1),
+                numpy.logical_xor.reduce(effects.z[:, sorted(logical_x)],
+                                         axis=1)), axis=1)
+        return FaultSignatures(effects.measurement_flips, x, z,
+                               logical_flips)
+
+    def fault_classes(self, order=1, qudits=None, chunk_size=2**16):
+        """Group all combinations of order faults by their effect
+
+        Combinations of faults which flip the same measurements and leave
+        the same final Pauli frame (restricted to qudits, if given) are
+        equivalent, such that only one representative per class has to be
+        simulated or decoded. Requires a Clifford circuit.
+
+        Args:
+            order, number of faults per combination
+            qudits, optional qudits of the final frame to compare (e.g.
+                the data qubits), all qudits if None
+            chunk_size, number of combinations combined per numpy call
+
+        Returns:
+            list of FaultClass(representative, multiplicity), in order of
+            the first combination of every class
+        """
+        signatures = self.single_fault_signatures(qudits)
+        classes = {}  # signature -> [representative indices, multiplicity]
+        combinations = itertools.combinations(range(len(signatures)), order)
+        while True:
+            indices = numpy.array(list(itertools.islice(combinations,
+                                                        chunk_size)),
+                                  dtype=int).reshape(-1, order)
+            if len(indices) == 0:
+                break
+            combined = numpy.bitwise_xor.reduce(signatures[indices], axis=1)
+            unique, first, counts = numpy.unique(
+                    combined, axis=0, return_index=True, return_counts=True)
+            for j in numpy.argsort(first):
+                key = unique[j].tobytes()
+                entry = classes.get(key)
+                if entry is None:
+                    classes[key] = [indices[first[j]], int(counts[j])]
+                else:
+                    entry[1] += int(counts[j])
+        return [FaultClass(tuple(self.possible_errors[i] for i in idx), count)
+                for idx, count in classes.values()]
+
+    def generate_error_circuits(self, order=1, lazy=False, chunk_size=None,
+                                deduplicate=False, qudits=None):
+        """Generate all circuits with order errors placed in them
+
+        By default a list of all ErrorCircCollections is returned. For
+        large numbers of error combinations use lazy=True, which returns a
+        generator building each error circuit on demand, such that memory
+        stays constant and simulation can start immediately. Batch
+        consumers can set a chunk_size to get (lazily built) lists of at
+        most chunk_size ErrorCircCollections instead.
+
+        With deduplicate=True only one circuit per equivalence class of
+        error combinations (see fault_classes) is generated, as an
+        ErrorClassCircCollection holding the multiplicity of the class.
+
+        Args:
+            order, number of errors per circuit
+            lazy, bool, return a generator instead of a list
+            chunk_size, int, yield lists of ErrorCircCollections
+                (implies lazy)
+            deduplicate, bool, one circuit per fault class
+            qudits, qudits of the final frame compared when deduplicating
+        """
+        if deduplicate:
+            error_circs = self.iter_class_error_circuits(order, qudits)
+        else:
+            error_circs = self.iter_error_circuits(order)
+        if chunk_size is not None:
+            return self.iter_chunks(error_circs, chunk_size)
+        if lazy:
+            return error_circs
+        return list(error_circs)
+
+    def iter_error_circuits(self, order=1):
+        """Lazily yield an ErrorCircCollection per error combination"""
+        for combination in itertools.combinations(self.possible_errors,
+                                                  r=order):
+            yield ErrorCircCollection(self.error_circuit(combination),
+                                      combination)
+
+    def iter_class_error_circuits(self, order=1, qudits=None):
+        """Lazily yield an ErrorClassCircCollection per fault class"""
+        for representative, multiplicity in self.fault_classes(order,
+                                                               qudits):
+            yield ErrorClassCircCollection(
+                    self.error_circuit(representative), representative,
+                    multiplicity)
+
+    @staticmethod
+    def iter_chunks(error_circs, chunk_size):
+        """Group an iterable of error circuits into lists of chunk_size"""
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size should be positive, not"
+                             f" {chunk_size}")
+        while True:
+            chunk = list(itertools.islice(error_circs, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def n_error_circuits(self, order=1):
+        """Number of error circuits generate_error_circuits yields"""
+        return math.comb(len(self.possible_errors), order)
+
+    def error_circuit(self, combination):
+        """Circuit with a combination of errors placed in it
+
+        Every error is inserted as its own tick. The returned circuit is a
+        copy-free circuit_overlay of self.circuit, such that building it
+        takes time proportional to the number of errors only. Use
+        circuit_overlay.materialize if an independent copy is needed.
+        """
+        return circuit_overlay.overlay(self.circuit, (
+                (error.tick_idx + int(error.after),
+                 error_tick(error.error_gate, error.qudits))
+                for error in combination))
+
+
+def error_tick(error_gate, qudits):
+    """Gate dict of a (multi qudit) error gate, e.g. {"X": {0, 1}}"""
+    if isinstance(error_gate, str):
+        return {error_gate: {qudits}}
+    if isinstance(error_gate, tuple):
+        gates = collections.defaultdict(set)
+        for single_gate, qudit in zip(error_gate, qudits):
+            gates[single_gate].add(qudit)
+        return dict(gates)
+    raise TypeError(f"error_gate of type '{type(error_gate)}' not supported")
 
 
 class ErrorModelLookupTable(dict):
@@ -138,6 +333,14 @@ class GateCoordinateList(list):
          GateCoordinate(gate_symbol="X", tick_idx=1, qudits={0}),
          GateCoordinate(gate_symbol="CNOT", tick_idx=1, qudits={1, 2}),
         ]
+
+    The coordinates are also stored column-wise in the structured numpy
+    array gl.array (fields symbol_id, tick_idx, qudits and idle, unused
+    qudit slots are -1), indexed by symbol, tick and qudit, such that
+    queries are vectorized lookups:
+
+    >>> rows = gl.rows(symbol="CNOT", ticks=range(4, len(q)), qudit=2)
+    >>> gl.coordinates(rows)
     """
 
     IDLE_SYMBOL = "idle"
@@ -147,27 +350,94 @@ class GateCoordinateList(list):
         self.circuit = circuit
         self.with_idle = with_idle
         self.locate_gates()
+        self.build_index()
 
     def locate_gates(self):
-        """Add all coordinates"""
-        for tick, tick_idx, params in self.circuit.iter_ticks():
-            for gate_symbol, locations, gate_params in tick.items():
-                for location in locations:
-                    self.append(
-                            GateCoordinate(gate_symbol=gate_symbol,
-                                           tick_idx=tick_idx,
-                                           qudits=location)
-                            )
+        """Add all coordinates, from the compiled instruction stream of the
+        circuit (see circuit_compiler)"""
+        compiled = circuit_compiler.get_compiled(self.circuit)
+        for tick_idx, instructions in enumerate(compiled.ticks):
+            for opcode, location, _, _ in instructions:
+                self.append(
+                        GateCoordinate(gate_symbol=compiled.symbols[opcode],
+                                       tick_idx=tick_idx,
+                                       qudits=location)
+                        )
             if self.with_idle:
-                idle_qudits = (self.circuit.qudits
-                               - self.circuit.active_qudits[tick_idx])
-                for qudit in idle_qudits:
+                for qudit in compiled.idle_qudits(tick_idx).tolist():
                     self.append(
                             GateCoordinate(gate_symbol=self.IDLE_SYMBOL,
                                            tick_idx=tick_idx,
                                            qudits=qudit)
                             )
 
+    def build_index(self):
+        """Build the structured array and the symbol, tick and qudit index"""
+        self.symbols = sorted({coord.gate_symbol for coord in self})
+        symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        qudits = [coord.qudits if isinstance(coord.qudits, tuple)
+                  else (coord.qudits, ) for coord in self]
+        width = max(map(len, qudits), default=1)
+        self.array = numpy.zeros(len(self), dtype=[
+                ("symbol_id", numpy.int32), ("tick_idx", numpy.int64),
+                ("qudits", numpy.int64, (width, )), ("idle", bool)])
+        self.array["symbol_id"] = [symbol_ids[coord.gate_symbol]
+                                   for coord in self]
+        self.array["tick_idx"] = [coord.tick_idx for coord in self]
+        self.array["qudits"] = numpy.array(
+                [q + (-1, ) * (width - len(q)) for q in qudits],
+                dtype=numpy.int64).reshape(-1, width)
+        self.array["idle"] = (self.array["symbol_id"]
+                              == symbol_ids.get(self.IDLE_SYMBOL, -1))
+
+        # rows are in tick order, tick t holds rows tick_starts[t]:[t + 1]
+        self.tick_starts = numpy.searchsorted(
+                self.array["tick_idx"], numpy.arange(len(self.circuit) + 1))
+        order = numpy.argsort(self.array["symbol_id"], kind="stable")
+        bounds = numpy.searchsorted(self.array["symbol_id"][order],
+                                    numpy.arange(len(self.symbols) + 1))
+        self.symbol_rows = {symbol: order[bounds[i]:bounds[i + 1]]
+                            for i, symbol in enumerate(self.symbols)}
+        rows, slots = numpy.nonzero(self.array["qudits"] >= 0)
+        qudit_of_row = self.array["qudits"][rows, slots]
+        order = numpy.lexsort((rows, qudit_of_row))
+        rows, qudit_of_row = rows[order], qudit_of_row[order]
+        unique, starts = numpy.unique(qudit_of_row, return_index=True)
+        self.qudit_rows = {int(qudit): rows_of_qudit for qudit, rows_of_qudit
+                           in zip(unique, numpy.split(rows, starts[1:]))}
+
+    def rows(self, symbol=None, ticks=None, qudit=None):
+        """Sorted row indices of the coordinates matching all criteria
+
+        Args:
+            symbol, gate symbol (or IDLE_SYMBOL) or an iterable of symbols
+            ticks, tick index or a range of tick indices (step 1)
+            qudit, qudit the gate acts on
+        """
+        rows = numpy.arange(len(self))
+        if ticks is not None:
+            if isinstance(ticks, range):
+                start, stop = ticks.start, max(ticks.start, ticks.stop)
+            else:
+                start, stop = ticks, ticks + 1
+            start, stop = (min(max(t, 0), len(self.circuit))
+                           for t in (start, stop))
+            rows = rows[self.tick_starts[start]:self.tick_starts[stop]]
+        if symbol is not None:
+            symbols = [symbol] if isinstance(symbol, str) else symbol
+            symbol_rows = numpy.concatenate(
+                    [self.symbol_rows.get(s, numpy.zeros(0, dtype=int))
+                     for s in symbols] + [numpy.zeros(0, dtype=int)])
+            rows = numpy.intersect1d(rows, symbol_rows)
+        if qudit is not None:
+            rows = numpy.intersect1d(rows, self.qudit_rows.get(
+                    qudit, numpy.zeros(0, dtype=int)), assume_unique=True)
+        return rows
+
+    def coordinates(self, rows):
+        """GateCoordinates of row indices"""
+        return [self[i] for i in rows]
+
 
 if __name__ == '__main__':
     from pecos_toolkit.qecc_codes.steane.circuits import Logical
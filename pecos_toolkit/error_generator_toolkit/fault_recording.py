@@ -0,0 +1,163 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+fault_recording.py
+@author Luc Kusters
+@date 10-10-2022
+
+Record the faults sampled by a GeneralErrorGen and replay them later.
+
+Every fault is stored as a row of a columnar table:
+
+    shot     index of the shot (see GeneralErrorGen.next_shot)
+    circuit  index of the circuit run within the shot
+    tick     tick index within the circuit
+    qudit    qudit the error gate acts on
+    symbol   index into the symbol table (e.g. "X", "Y", "Z")
+    after    whether the error acts after (True) or before the tick
+
+Example:
+    >>> gen.record_faults()
+    >>> for _ in range(n_shots):
+    ...     protocols.steane_round(error_gen=gen, error_params=params)
+    ...     gen.next_shot()
+    >>> gen.recorder.save("faults.npz")
+
+    >>> replay_gen.replay_faults(FaultRecord.load("faults.npz"), shot=k)
+    >>> protocols.steane_round(error_gen=replay_gen, error_params=params)
+"""
+
+import collections
+
+import numpy
+
+
+COLUMNS = ("shot", "circuit", "tick", "qudit", "symbol", "after")
+COLUMN_DTYPES = {
+        "shot": numpy.int32,
+        "circuit": numpy.int32,
+        "tick": numpy.int32,
+        "qudit": numpy.int16,
+        "symbol": numpy.uint8,
+        "after": bool,
+        }
+
+Fault = collections.namedtuple("Fault", ("tick", "qudit", "symbol", "after"))
+
+
+class FaultRecorder(object):
+    """Accumulates the faults of GeneralErrorGen runs in columns"""
+
+    def __init__(self):
+        self.columns = {column: [] for column in COLUMNS}
+        self.symbols = []
+        self.symbol_index = {}
+
+    def __len__(self):
+        return len(self.columns["tick"])
+
+    def symbol_id(self, symbol):
+        """Index of a gate symbol in the symbol table (added if new)"""
+        idx = self.symbol_index.get(symbol)
+        if idx is None:
+            idx = self.symbol_index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return idx
+
+    def record_error_circuit(self, shot, circuit, tick, error_circ, after):
+        """Record all error gates of an error (before/after) circuit"""
+        for symbol, locations, _ in error_circ.items():
+            for location in locations:
+                self.record(shot, circuit, tick, location, symbol, after)
+
+    def record(self, shot, circuit, tick, qudit, symbol, after):
+        """Record a single fault"""
+        if not isinstance(qudit, (int, numpy.integer)):
+            raise NotImplementedError("Only single qudit error gates can be"
+                                      f" recorded, not location {qudit}")
+        self.columns["shot"].append(shot)
+        self.columns["circuit"].append(circuit)
+        self.columns["tick"].append(tick)
+        self.columns["qudit"].append(qudit)
+        self.columns["symbol"].append(self.symbol_id(symbol))
+        self.columns["after"].append(after)
+
+    def to_record(self):
+        """Freeze the recorded faults into a FaultRecord"""
+        return FaultRecord(
+                {column: numpy.asarray(values, dtype=COLUMN_DTYPES[column])
+                 for column, values in self.columns.items()},
+                self.symbols)
+
+    def save(self, path):
+        """Save the recorded faults (see FaultRecord.save)"""
+        self.to_record().save(path)
+
+
+class FaultRecord(object):
+    """Columnar, read only table of recorded faults"""
+
+    def __init__(self, columns, symbols):
+        order = numpy.lexsort((columns["tick"], columns["circuit"],
+                               columns["shot"]))
+        self.columns = {column: numpy.asarray(columns[column])[order]
+                        for column in COLUMNS}
+        self.symbols = tuple(symbols)
+        self._index = self._build_index()
+
+    def _build_index(self):
+        """Map (shot, circuit, tick) to a slice of rows"""
+        keys = numpy.stack((self.columns["shot"], self.columns["circuit"],
+                            self.columns["tick"]), axis=1)
+        index = {}
+        if len(keys) == 0:
+            return index
+        boundaries = numpy.flatnonzero(numpy.any(keys[1:] != keys[:-1],
+                                                 axis=1)) + 1
+        starts = numpy.concatenate(([0], boundaries))
+        stops = numpy.concatenate((boundaries, [len(keys)]))
+        for start, stop in zip(starts, stops):
+            index[tuple(int(k) for k in keys[start])] = slice(start, stop)
+        return index
+
+    def __len__(self):
+        return len(self.columns["tick"])
+
+    @property
+    def shots(self):
+        """Sorted array of the shot indices containing faults"""
+        return numpy.unique(self.columns["shot"])
+
+    def faults(self, shot, circuit, tick):
+        """List of Faults on a tick of a circuit run of a shot"""
+        rows = self._index.get((shot, circuit, tick))
+        if rows is None:
+            return []
+        return [Fault(int(tick), int(qudit), self.symbols[symbol],
+                      bool(after))
+                for qudit, symbol, after in zip(
+                    self.columns["qudit"][rows], self.columns["symbol"][rows],
+                    self.columns["after"][rows])]
+
+    def select_shots(self, shots):
+        """New FaultRecord only containing the given shots
+
+        Useful for distributing a fault corpus over worker processes.
+        """
+        mask = numpy.isin(self.columns["shot"], list(shots))
+        return FaultRecord({column: values[mask]
+                            for column, values in self.columns.items()},
+                           self.symbols)
+
+    def save(self, path):
+        """Save the record as a compressed columnar .npz file"""
+        numpy.savez_compressed(path, symbols=numpy.array(self.symbols),
+                               **self.columns)
+
+    @classmethod
+    def load(cls, path):
+        """Load a record saved with FaultRecord.save"""
+        with numpy.load(path) as data:
+            columns = {column: data[column] for column in COLUMNS}
+            symbols = [str(symbol) for symbol in data["symbols"]]
+        return cls(columns, symbols)
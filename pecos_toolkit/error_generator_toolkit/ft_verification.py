@@ -0,0 +1,487 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ft_verification.py
+@author Luc Kusters
+@date 21-10-2022
+
+Exhaustive (parallel) fault tolerance verification with the ErrorPlacer.
+
+All combinations of order faults are placed in a circuit and handed to a
+protocol callback, which runs the circuit (and whatever follows it, e.g.
+a flag correction and decoding) and reports whether the fault
+combination caused a logical failure and/or raised a flag. The
+combinations are identified by their lexicographic rank (see
+combination_ranks) and split in shards of consecutive ranks, which are
+distributed over a process pool.
+
+Example:
+    >>> def protocol(error_circ, error_locations):
+    ...     res = error_circ.run()
+    ...     flagged = bool(res.measurements.last.syndrome[8])
+    ...     failed = SteaneProtocol.decode_state(res.state) == 1
+    ...     return ProtocolOutcome(failed=failed, flagged=flagged)
+    >>> verifier = FaultToleranceVerifier(circ, epgc_list, protocol,
+    ...                                   order=1, n_workers=8)
+    >>> report = verifier.run()
+    >>> report.fault_tolerant
+
+The protocol should be a module level function, such that it can be sent
+to the worker processes. The circuit is sent in its compact binary form
+(see circuit_serialization), without its runner.
+
+Long enumerations can be checkpointed and resumed:
+
+    >>> report = verifier.run(checkpoint="order_2.json")
+
+writes the checked rank ranges and their tallies to order_2.json every
+checkpoint_interval seconds; running the same command again (e.g. after
+the job was pre-empted) only checks the remaining ranks. Since ranks are
+deterministic, machines sharing a filesystem can each check their own
+rank range (run(start, stop, checkpoint)), after which the checkpoints
+are combined with FaultToleranceVerifier.report_from_checkpoints.
+
+If there are too many combinations to check them all (e.g. order 3 on a
+multi-round circuit), a uniformly random sample of n_samples distinct
+combinations is checked instead:
+
+    >>> verifier = FaultToleranceVerifier(circ, epgc_list, protocol,
+    ...                                   order=3, n_samples=10000, seed=1)
+    >>> verifier.run().failure_estimate(confidence=0.99)
+
+The sample is a seeded pseudo-random permutation of the ranks (see
+combination_ranks.RankPermutation), of which the first n_samples are
+checked. Samples are streamed, sharded, distributed and checkpointed like
+ranks; resuming a sampled run requires the same seed.
+"""
+
+import collections
+import concurrent.futures
+import json
+import math
+import multiprocessing
+import os
+import random
+import statistics
+import time
+
+from pecos_toolkit import circuit_fingerprint
+from pecos_toolkit.error_generator_toolkit import combination_ranks
+from pecos_toolkit.error_generator_toolkit import error_placer_toolkit
+
+
+ProtocolOutcome = collections.namedtuple("ProtocolOutcome",
+                                         ("failed", "flagged"))
+ShardResult = collections.namedtuple("ShardResult", (
+        "start", "stop", "n_simulated", "n_passed", "n_failed", "n_flagged",
+        "failures", "complete"))
+FailureEstimate = collections.namedtuple("FailureEstimate", (
+        "fraction", "lower", "upper", "coverage"))
+
+
+def failure_estimate(n_failed, n_checked, n_combinations, confidence=0.95):
+    """Estimated fraction of failing combinations with confidence bounds
+
+    Wilson score interval of a sample of n_checked distinct combinations
+    (drawn without replacement), narrowed by the finite population
+    correction such that the bounds are exact if all combinations were
+    checked.
+
+    Returns:
+        FailureEstimate(fraction, lower, upper, coverage), with coverage
+        the checked fraction of all n_combinations
+    """
+    if n_checked == 0:
+        return FailureEstimate(math.nan, 0., 1., 0.)
+    fraction = n_failed / n_checked
+    coverage = n_checked / n_combinations
+    if n_checked >= n_combinations:
+        return FailureEstimate(fraction, fraction, fraction, 1.)
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+    z *= math.sqrt((n_combinations - n_checked) / (n_combinations - 1))
+    denominator = 1 + z**2 / n_checked
+    center = (fraction + z**2 / (2 * n_checked)) / denominator
+    half_width = z / denominator * math.sqrt(
+            fraction * (1 - fraction) / n_checked
+            + z**2 / (4 * n_checked**2))
+    return FailureEstimate(fraction, max(0., center - half_width),
+                           min(1., center + half_width), coverage)
+
+
+class FTReport(collections.namedtuple("FTReport", (
+        "order", "n_combinations", "n_simulated", "n_passed", "n_failed",
+        "n_flagged", "failures", "complete"))):
+    """Result of a FaultToleranceVerifier run
+
+    n_passed, n_failed and n_flagged count fault combinations (weighted by
+    the class multiplicity when deduplicating), n_simulated counts the
+    protocol calls. failures holds (at most max_failures) failing fault
+    combinations. complete is False if not all combinations (of the
+    checked rank range) were checked, e.g. if the run stopped early.
+    """
+
+    __slots__ = ()
+
+    @property
+    def fault_tolerant(self):
+        """Whether all combinations were checked and none failed"""
+        return self.complete and self.n_failed == 0
+
+    def failure_estimate(self, confidence=0.95):
+        """FailureEstimate of the fraction of failing combinations"""
+        return failure_estimate(self.n_failed, self.n_passed + self.n_failed,
+                                self.n_combinations, confidence)
+
+    def __str__(self):
+        verdict = "fault tolerant" if self.fault_tolerant else (
+                "NOT fault tolerant" if self.n_failed > 0 else "incomplete")
+        return (f"order {self.order}: {self.n_passed} passed, {self.n_failed}"
+                f" failed, {self.n_flagged} flagged out of"
+                f" {self.n_combinations} fault combinations ({verdict})")
+
+
+def as_protocol_outcome(outcome):
+    """Cast the return value of a protocol callback to a ProtocolOutcome
+
+    A protocol may return a ProtocolOutcome, or a bool which is True if
+    the protocol passed (and did not flag).
+    """
+    if isinstance(outcome, ProtocolOutcome):
+        return outcome
+    if isinstance(outcome, bool):
+        return ProtocolOutcome(failed=not outcome, flagged=False)
+    raise TypeError("protocol should return a ProtocolOutcome or bool, not"
+                    f" {type(outcome).__name__}")
+
+
+def merge_shard_results(order, n_combinations, start, stop, shard_results,
+                        max_failures):
+    """Aggregate ShardResults into an FTReport
+
+    The failures of the report are the failing ranks. The report is
+    complete if the shards cover all ranks in [start, stop).
+    """
+    failures = []
+    totals = collections.Counter()
+    for result in sorted(shard_results, key=lambda result: result.start):
+        for field in ("n_simulated", "n_passed", "n_failed", "n_flagged"):
+            totals[field] += getattr(result, field)
+        failures.extend(result.failures)
+    complete = not uncovered_ranges(shard_results, start, stop)
+    return FTReport(order=order, n_combinations=n_combinations,
+                    n_simulated=totals["n_simulated"],
+                    n_passed=totals["n_passed"],
+                    n_failed=totals["n_failed"],
+                    n_flagged=totals["n_flagged"],
+                    failures=failures[:max_failures],
+                    complete=complete)
+
+
+def covered_ranges(shard_results):
+    """Sorted, merged list of (start, stop) rank ranges checked by shards"""
+    ranges = []
+    for result in sorted(shard_results, key=lambda result: result.start):
+        if ranges and result.start <= ranges[-1][1]:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], result.stop))
+        elif result.stop > result.start:
+            ranges.append((result.start, result.stop))
+    return ranges
+
+
+def uncovered_ranges(shard_results, start, stop):
+    """Rank ranges within [start, stop) not checked by any shard"""
+    ranges = []
+    position = start
+    for covered_start, covered_stop in covered_ranges(shard_results):
+        if covered_start > position:
+            ranges.append((position, min(covered_start, stop)))
+        position = max(position, covered_stop)
+        if position >= stop:
+            break
+    if position < stop:
+        ranges.append((position, stop))
+    return [(range_start, range_stop) for range_start, range_stop in ranges
+            if range_stop > range_start]
+
+
+def save_checkpoint(path, key, shard_results):
+    """Atomically write the shard results of a run to a json checkpoint"""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as checkpoint_file:
+        json.dump({"key": key,
+                   "shards": [result._asdict() for result in shard_results]},
+                  checkpoint_file)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path, key):
+    """Shard results of a checkpoint, empty if the file does not exist
+
+    Raises:
+        ValueError, if the checkpoint belongs to another verification
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path) as checkpoint_file:
+        checkpoint = json.load(checkpoint_file)
+    if checkpoint["key"] != key:
+        raise ValueError(f"Checkpoint {path} belongs to another circuit,"
+                         " error model or verification setting")
+    return [ShardResult(**result) for result in checkpoint["shards"]]
+
+
+class FaultToleranceVerifier(object):
+    """Checks a protocol against all combinations of order faults"""
+
+    def __init__(self, circuit, epgc_list, protocol, order=1,
+                 deduplicate=False, qudits=None, n_workers=None,
+                 shard_size=256, stop_on_failure=False, max_failures=100,
+                 n_samples=None, seed=None):
+        """
+        Args:
+            circuit, circuit to place the faults in
+            epgc_list, list of ErrorProneGateCollections (error model)
+            protocol, callable(error_circ, error_locations) returning a
+                ProtocolOutcome or bool (True if passed)
+            order, number of faults per combination
+            deduplicate, bool, only check one representative per fault
+                class (see ErrorPlacer.fault_classes)
+            qudits, qudits of the final frame compared when deduplicating
+            n_workers, number of worker processes (os.cpu_count() if None),
+                1 runs all shards in the calling process
+            shard_size, number of combinations per shard
+            stop_on_failure, bool, stop at the first failing combination
+            max_failures, maximum number of failing combinations reported
+            n_samples, optional number of uniformly random distinct
+                combinations to check instead of all combinations
+            seed, seed of the sample (random if None)
+        """
+        self.error_placer = error_placer_toolkit.ErrorPlacer(circuit,
+                                                             epgc_list)
+        self.epgc_list = epgc_list
+        self.qudits = qudits
+        self.protocol = protocol
+        self.order = order
+        self.deduplicate = deduplicate
+        self.n_workers = os.cpu_count() if n_workers is None else n_workers
+        self.shard_size = shard_size
+        self.stop_on_failure = stop_on_failure
+        self.max_failures = max_failures
+        if deduplicate and n_samples is not None:
+            raise ValueError("Sampling combinations can not be combined with"
+                             " deduplication")
+        if deduplicate:
+            self.fault_classes = self.error_placer.fault_classes(order,
+                                                                 qudits)
+        else:
+            self.fault_classes = None
+        self.n_samples = n_samples
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        self.seed = seed
+        if n_samples is not None:
+            self.permutation = combination_ranks.RankPermutation(
+                    self.n_combinations, seed)
+        else:
+            self.permutation = None
+
+    @property
+    def n_items(self):
+        """Number of protocol calls of a full run"""
+        if self.fault_classes is not None:
+            return len(self.fault_classes)
+        if self.n_samples is not None:
+            return min(self.n_samples, self.n_combinations)
+        return self.error_placer.n_error_circuits(self.order)
+
+    @property
+    def n_combinations(self):
+        """Number of fault combinations of a full run"""
+        return self.error_placer.n_error_circuits(self.order)
+
+    @property
+    def checkpoint_key(self):
+        """Fingerprint of everything the ranks and outcomes depend on"""
+        return circuit_fingerprint.fingerprint(
+                "ft_verification",
+                circuit_fingerprint.circuit_fingerprint(
+                    self.error_placer.circuit),
+                circuit_fingerprint.error_model_fingerprint(self.epgc_list),
+                self.order, self.deduplicate, self.qudits,
+                (self.n_samples, self.seed) if self.n_samples else None,
+                getattr(self.protocol, "__qualname__", repr(self.protocol)))
+
+    def shards(self, start=0, stop=None, shard_results=()):
+        """List of (start, stop) rank ranges of at most shard_size
+        covering [start, stop), except for ranges already checked"""
+        stop = self.n_items if stop is None else min(stop, self.n_items)
+        return [(shard_start, min(shard_start + self.shard_size, range_stop))
+                for range_start, range_stop in uncovered_ranges(
+                    shard_results, start, stop)
+                for shard_start in range(range_start, range_stop,
+                                         self.shard_size)]
+
+    def combination(self, rank):
+        """Fault combination (representative) with a given rank
+
+        When sampling, rank is the index of the sample.
+        """
+        if self.fault_classes is not None:
+            return self.fault_classes[rank].representative
+        if self.permutation is not None:
+            rank = self.permutation(rank)
+        errors = self.error_placer.possible_errors
+        return tuple(errors[i] for i in combination_ranks.unrank(
+            rank, len(errors), self.order))
+
+    def iter_items(self, start, stop):
+        """Yield (rank, fault combination, multiplicity) in a rank range"""
+        if self.fault_classes is not None:
+            for rank in range(start, min(stop, len(self.fault_classes))):
+                representative, multiplicity = self.fault_classes[rank]
+                yield rank, representative, multiplicity
+            return
+        if self.permutation is not None:
+            for rank in range(start, min(stop, self.n_items)):
+                yield rank, self.combination(rank), 1
+            return
+        errors = self.error_placer.possible_errors
+        for rank, indices in enumerate(combination_ranks.iter_combinations(
+                len(errors), self.order, start, stop), start=start):
+            yield rank, tuple(errors[i] for i in indices), 1
+
+    def run_shard(self, start, stop, stop_event=None):
+        """Run the protocol for all items with ranks in [start, stop)
+
+        The failures of the returned ShardResult are the failing ranks.
+        """
+        counts = collections.Counter()
+        failures = []
+        for rank, combination, multiplicity in self.iter_items(start, stop):
+            if stop_event is not None and stop_event.is_set():
+                return ShardResult(start, rank, failures=failures,
+                                   complete=False, **self._counts(counts))
+            outcome = as_protocol_outcome(self.protocol(
+                    self.error_placer.error_circuit(combination),
+                    combination))
+            counts["n_simulated"] += 1
+            counts["n_failed" if outcome.failed else "n_passed"] += \
+                multiplicity
+            if outcome.flagged:
+                counts["n_flagged"] += multiplicity
+            if outcome.failed:
+                if len(failures) < self.max_failures:
+                    failures.append(rank)
+                if self.stop_on_failure:
+                    if stop_event is not None:
+                        stop_event.set()
+                    return ShardResult(start, rank + 1, failures=failures,
+                                       complete=False,
+                                       **self._counts(counts))
+        return ShardResult(start, stop, failures=failures, complete=True,
+                           **self._counts(counts))
+
+    @staticmethod
+    def _counts(counts):
+        return {field: counts[field] for field in
+                ("n_simulated", "n_passed", "n_failed", "n_flagged")}
+
+    def run(self, start=0, stop=None, checkpoint=None,
+            checkpoint_interval=60.):
+        """Check all fault combinations and return an FTReport
+
+        Args:
+            start, stop, optional rank range to check, all ranks if None
+            checkpoint, optional path of a json checkpoint file, the run
+                resumes from it if it exists
+            checkpoint_interval, minimum number of seconds between two
+                checkpoint writes
+        """
+        stop = self.n_items if stop is None else min(stop, self.n_items)
+        shard_results = []
+        if checkpoint is not None:
+            shard_results = [
+                    result for result in load_checkpoint(
+                        checkpoint, self.checkpoint_key)
+                    if result.stop > start and result.start < stop]
+        last_save = time.monotonic()
+
+        def collect(result):
+            nonlocal last_save
+            shard_results.append(result)
+            if checkpoint is not None and \
+                    time.monotonic() - last_save >= checkpoint_interval:
+                save_checkpoint(checkpoint, self.checkpoint_key,
+                                shard_results)
+                last_save = time.monotonic()
+
+        failed = any(result.n_failed > 0 for result in shard_results)
+        if not (self.stop_on_failure and failed):
+            shards = self.shards(start, stop, shard_results)
+            if self.n_workers == 1:
+                for shard_start, shard_stop in shards:
+                    result = self.run_shard(shard_start, shard_stop)
+                    collect(result)
+                    if not result.complete:
+                        break
+            else:
+                self.run_parallel(shards, collect)
+        if checkpoint is not None:
+            save_checkpoint(checkpoint, self.checkpoint_key, shard_results)
+        return self.report(shard_results, start, stop)
+
+    def report(self, shard_results, start=0, stop=None):
+        """FTReport of shard results, with the failing combinations"""
+        stop = self.n_items if stop is None else stop
+        report = merge_shard_results(self.order, self.n_combinations,
+                                     start, stop, shard_results,
+                                     self.max_failures)
+        if self.permutation is not None and \
+                self.n_items < self.n_combinations:
+            # a sample never proves fault tolerance
+            report = report._replace(complete=False)
+        return report._replace(failures=[self.combination(rank)
+                                         for rank in report.failures])
+
+    def report_from_checkpoints(self, paths):
+        """Combined FTReport of the checkpoints of (partial) runs"""
+        shard_results = []
+        for path in paths:
+            shard_results.extend(load_checkpoint(path, self.checkpoint_key))
+        return self.report(shard_results)
+
+    def run_parallel(self, shards, collect):
+        """Distribute the shards over a process pool
+
+        Every ShardResult is passed to collect as soon as it is done.
+        """
+        context = multiprocessing.get_context()
+        with context.Manager() as manager, \
+                concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.n_workers, mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self, manager.Event())) as executor:
+            futures = [executor.submit(_run_worker_shard, start, stop)
+                       for start, stop in shards]
+            for future in concurrent.futures.as_completed(futures):
+                if future.cancelled():
+                    continue
+                result = future.result()
+                collect(result)
+                if self.stop_on_failure and result.n_failed > 0:
+                    for pending in futures:
+                        pending.cancel()
+
+
+_WORKER_VERIFIER = None
+_WORKER_STOP_EVENT = None
+
+
+def _init_worker(verifier, stop_event):
+    global _WORKER_VERIFIER, _WORKER_STOP_EVENT
+    _WORKER_VERIFIER = verifier
+    _WORKER_STOP_EVENT = stop_event
+
+
+def _run_worker_shard(start, stop):
+    return _WORKER_VERIFIER.run_shard(start, stop, _WORKER_STOP_EVENT)
@@ -0,0 +1,163 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+location_index.py
+@author Luc Kusters
+@date 13-10-2022
+
+Precomputed error locations per circuit tick.
+
+The gate locations, idle qudits and the filtering of excluded qudits of a
+tick only depend on the circuit and the excluded qudits, not on the shot.
+A CircuitLocationIndex computes them once per circuit from its compiled
+instruction stream (see circuit_compiler), after which the error
+generator only does a lookup per tick. Indexes are cached per
+circuit and are rebuilt automatically when the circuit is mutated. The
+index of a repeat circuit (see circuit_repeat) is the index of its block.
+"""
+
+import collections
+import threading
+import weakref
+
+import numpy
+
+from pecos_toolkit import circuit_compiler
+from pecos_toolkit import circuit_repeat
+
+
+GateLocations = collections.namedtuple("GateLocations",
+                                       ("symbol", "locations", "array"))
+TickLocations = collections.namedtuple("TickLocations", ("gates", "idle"))
+
+_CACHE = weakref.WeakKeyDictionary()
+_CACHE_LOCK = threading.Lock()
+
+
+def filter_excluded(locations, excluded):
+    """Remove all locations acting on one of the excluded qudits"""
+    filtered_locations = set()
+    for loc in locations:
+        if isinstance(loc, tuple):
+            # filter multi qudit locations
+            if not any(sub_loc in excluded for sub_loc in loc):
+                filtered_locations.add(loc)
+        elif isinstance(loc, int):
+            # filter single qudit locations
+            if loc not in excluded:
+                filtered_locations.add(loc)
+        else:
+            raise NotImplementedError("filter excluded cannot handle"
+                                      f"location of type {type(loc)}")
+    return filtered_locations
+
+
+def frozen_location_array(locations):
+    """Read only (n,) or (n, qudits_per_location) array of locations
+
+    Returns None for locations acting on different numbers of qudits.
+    """
+    try:
+        array = numpy.array(locations, dtype=int)
+    except ValueError:
+        return None
+    array.setflags(write=False)
+    return array
+
+
+class CircuitLocationIndex(object):
+    """Error locations of every tick of a circuit
+
+    Example:
+        >>> index = CircuitLocationIndex(circ, excluded_qudits={7, 8})
+        >>> for symbol, locations, array in index[tick_index].gates:
+        ...     pass
+        >>> idle_qudits = index[tick_index].idle.locations
+    """
+
+    def __init__(self, circuit, excluded_qudits=None, compiled=None):
+        """
+        Args:
+            circuit, circuit to index
+            excluded_qudits, optional qudits without error locations
+            compiled, CompiledCircuit of the circuit if already looked up
+        """
+        self.excluded_qudits = excluded_qudits
+        if compiled is None:
+            compiled = circuit_compiler.get_compiled(circuit)
+        self.revision = compiled.revision
+        self.ticks = [self.index_tick(compiled, tick_index)
+                      for tick_index in range(compiled.n_ticks)]
+
+    def index_tick(self, compiled, tick_index):
+        """Compute the (filtered) gate and idle locations of a tick"""
+        # locations per (symbol, params) gate, in the gate order of the tick
+        tick_gates = collections.defaultdict(list)
+        for opcode, location, param, _ in compiled.ticks[tick_index]:
+            tick_gates[opcode, param].append(location)
+        gates = []
+        for (opcode, _), locations in tick_gates.items():
+            if self.excluded_qudits is not None:
+                locations = filter_excluded(locations, self.excluded_qudits)
+            locations = tuple(sorted(locations))
+            gates.append(GateLocations(compiled.symbols[opcode], locations,
+                                       frozen_location_array(locations)))
+        idle = compiled.idle_qudits(tick_index).tolist()
+        if self.excluded_qudits is not None:
+            idle = filter_excluded(idle, self.excluded_qudits)
+        idle = tuple(sorted(idle))
+        return TickLocations(tuple(gates), GateLocations(
+            "idle", idle, frozen_location_array(idle)))
+
+    def __getitem__(self, tick_index):
+        return self.ticks[tick_index]
+
+    def __len__(self):
+        return len(self.ticks)
+
+
+class RepeatedLocationIndex(object):
+    """Location index of a repeat circuit, a view on the index of its
+    block"""
+
+    def __init__(self, block_index, repetitions):
+        self.block_index = block_index
+        self.repetitions = repetitions
+
+    def __getitem__(self, tick_index):
+        if tick_index < 0:
+            tick_index += len(self)
+        if not 0 <= tick_index < len(self):
+            raise IndexError("tick index out of range")
+        return self.block_index[tick_index % len(self.block_index)]
+
+    def __len__(self):
+        return len(self.block_index) * self.repetitions
+
+
+def get_location_index(circuit, excluded_qudits=None):
+    """Return the (cached) CircuitLocationIndex of a circuit
+
+    The index is rebuilt if the circuit was mutated since it was cached.
+    For repeat circuits the index of the block is looked up instead.
+    """
+    if circuit_repeat.is_repeat(circuit):
+        ticks = circuit._ticks
+        return RepeatedLocationIndex(
+                get_location_index(ticks.block, excluded_qudits),
+                ticks.repetitions)
+    if excluded_qudits is not None:
+        excluded_qudits = frozenset(excluded_qudits)
+    revision = circuit_compiler.circuit_revision(circuit)
+    try:
+        with _CACHE_LOCK:
+            index = _CACHE.get(circuit, {}).get(excluded_qudits)
+    except TypeError:  # circuit can not be weakly referenced or hashed
+        return CircuitLocationIndex(circuit, excluded_qudits)
+    if index is None or index.revision != revision:
+        index = CircuitLocationIndex(
+                circuit, excluded_qudits,
+                circuit_compiler.get_compiled(circuit, revision))
+        with _CACHE_LOCK:
+            _CACHE.setdefault(circuit, {})[excluded_qudits] = index
+    return index
@@ -0,0 +1,242 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+logical_failure_polynomial.py
+@author Luc Kusters
+@date 26-10-2022
+
+Exact low order logical failure rate of a protocol by fault enumeration.
+
+In the error model every fault location (an error prone gate, before or
+after its tick, or an idle qudit) fails independently with probability p,
+in which case one of the errors of its error set is applied, chosen
+uniformly. Enumerating every configuration of at most K faults through a
+protocol (e.g. a function of protocols.simulation_function_map) gives
+
+    P_L(p) = sum_k A_k p^k (1 - p)^(N - k) + tail(p),
+
+with A_k the number of failing configurations of k faults (weighted by the
+probability of their error choices) and N the number of fault locations.
+The tail, the probability of more than K faults, is computed exactly as
+well and bounds the truncated part of P_L(p) from above.
+
+Adaptive protocols (e.g. a flag triggering extra circuits) are supported:
+the fault locations are those of the circuits actually run given the
+faults placed so far, such that N depends on the configuration and terms
+are stored as weight * p^k (1 - p)^m.
+
+Example:
+    >>> def protocol(**kwargs):
+    ...     bit = protocols.simulation_function_map["standard_steane"](
+    ...             **kwargs)
+    ...     return ft_verification.ProtocolOutcome(failed=bool(bit),
+    ...                                            flagged=False)
+    >>> enumerator = FaultPathEnumerator(protocol, epgc_list)
+    >>> polynomial = enumerator.logical_failure_polynomial(max_order=2)
+    >>> polynomial.failure_counts  # [A_0, A_1, A_2]
+    >>> polynomial(1e-3)  # LogicalFailureBounds(lower, upper)
+
+The protocol is called with the error_gen and error_params keyword
+arguments and returns, as in ft_verification, a ProtocolOutcome (only
+its failed field is used) or a bool which is True if the protocol passed.
+It has to be deterministic apart from the faults, and the error generator
+must not be replaced. Qudits excluded for a run (e.g. by
+data_qudit_noise_only) have no fault locations in that run.
+"""
+
+import collections
+import fractions
+
+from pecos_toolkit import circuit_fingerprint
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+from pecos_toolkit.error_generator_toolkit import error_placer_toolkit
+from pecos_toolkit.error_generator_toolkit import fault_recording
+from pecos_toolkit.error_generator_toolkit import ft_verification
+
+
+FaultLocation = collections.namedtuple("FaultLocation", (
+        "circuit", "tick_idx", "gate_symbol", "qudits", "after", "errors"))
+LogicalFailureBounds = collections.namedtuple("LogicalFailureBounds",
+                                              ("lower", "upper"))
+
+
+class LogicalFailurePolynomial(object):
+    """Logical failure probability up to order max_order plus its tail
+
+    Args:
+        max_order, highest number of faults enumerated
+        failing, passing, dicts (k, m) -> weight of the (failing or
+            passing) configurations contributing weight p^k (1 - p)^m
+        tail, dict (b, r) -> weight of the configurations of max_order
+            faults, contributing weight p^max_order (1 - p)^b
+            (1 - (1 - p)^r) to the probability of more faults
+    """
+
+    def __init__(self, max_order, failing, passing, tail):
+        self.max_order = max_order
+        self.failing = dict(failing)
+        self.passing = dict(passing)
+        self.tail = dict(tail)
+
+    @property
+    def failure_counts(self):
+        """A_k, the weighted number of failing configurations of k faults"""
+        counts = [fractions.Fraction(0)] * (self.max_order + 1)
+        for (k, _), weight in self.failing.items():
+            counts[k] += weight
+        return counts
+
+    @property
+    def n_locations(self):
+        """N if it does not depend on the faults (non-adaptive), else None"""
+        sizes = {k + m for k, m in (*self.failing, *self.passing)}
+        return sizes.pop() if len(sizes) == 1 else None
+
+    @staticmethod
+    def evaluate(terms, p):
+        return sum(float(weight) * p**k * (1 - p)**m
+                   for (k, m), weight in terms.items())
+
+    def tail_probability(self, p):
+        """Probability of more than max_order faults"""
+        return sum(float(weight) * p**self.max_order * (1 - p)**b
+                   * (1 - (1 - p)**r) for (b, r), weight in self.tail.items())
+
+    def __call__(self, p):
+        """Bounds on the logical failure probability at error rate p
+
+        The lower bound is the exact contribution of at most max_order
+        faults, the upper bound assumes all configurations of more
+        faults fail.
+        """
+        lower = self.evaluate(self.failing, p)
+        return LogicalFailureBounds(lower, lower + self.tail_probability(p))
+
+    def __str__(self):
+        terms = [f"{weight} p^{k} (1-p)^{m}"
+                 for (k, m), weight in sorted(self.failing.items())]
+        return " + ".join(terms) or "0"
+
+
+class FaultPathErrorGen(ErrorGenerator.GeneralErrorGen):
+    """GeneralErrorGen injecting given faults, recording the run circuits
+    (and the qudits excluded for their run)"""
+
+    def __init__(self, *args, **kwargs):
+        self.circuits = []
+        self.run_exclusions = []
+        super().__init__(*args, **kwargs)
+
+    def start(self, circuit, error_params, state):
+        self.circuits.append(circuit)
+        self.run_exclusions.append(self.run_excluded_qudits)
+        return super().start(circuit, error_params, state)
+
+    def inject(self, faults):
+        """Inject (FaultLocation, error) pairs in the next protocol call"""
+        recorder = fault_recording.FaultRecorder()
+        for location, error in faults:
+            if isinstance(error, str):
+                paulis = [(location.qudits, error)]
+            else:
+                paulis = zip(location.qudits, error)
+            for qudit, pauli in paulis:
+                if pauli != "I":
+                    recorder.record(0, location.circuit, location.tick_idx,
+                                    qudit, pauli, location.after)
+        self.circuits = []
+        self.run_exclusions = []
+        self.replay_faults(recorder.to_record(), shot=0)
+
+
+class FaultPathEnumerator(object):
+    """Enumerates the fault configurations of a protocol"""
+
+    def __init__(self, protocol, epgc_list, error_params=None,
+                 excluded_qudits=None):
+        """
+        Args:
+            protocol, callable(error_gen=..., error_params=...) returning
+                a ft_verification.ProtocolOutcome, or True if it passed
+            epgc_list, list of ErrorProneGateCollections (error model)
+            error_params, error_params passed to the protocol, all
+                parameters 0 if None (faults are injected regardless)
+            excluded_qudits, optional qudits without fault locations
+        """
+        self.protocol = protocol
+        self.epgc_list = epgc_list
+        if error_params is None:
+            error_params = {epgc.param: 0. for epgc in epgc_list}
+        self.error_params = error_params
+        self.excluded_qudits = frozenset(excluded_qudits or ())
+        self.error_gen = FaultPathErrorGen(epgc_list=epgc_list)
+        # (circuit fingerprint, excluded qudits) -> locations
+        self._locations = {}
+        self.n_runs = 0
+
+    def circuit_locations(self, circuit, run_excluded_qudits=None):
+        """(tick, symbol, qudits, after, errors) fault locations of a
+        circuit, without those on excluded qudits"""
+        excluded = self.excluded_qudits.union(run_excluded_qudits or ())
+        key = (circuit_fingerprint.circuit_fingerprint(circuit), excluded)
+        locations = self._locations.get(key)
+        if locations is None:
+            errors = collections.defaultdict(list)
+            for error in error_placer_toolkit.possible_error_coordinates(
+                    circuit, self.epgc_list):
+                qudits = (error.qudits if isinstance(error.qudits, tuple)
+                          else (error.qudits, ))
+                if excluded.intersection(qudits):
+                    continue
+                errors[(error.tick_idx, error.gate_symbol, error.qudits,
+                        error.after)].append(error.error_gate)
+            locations = self._locations[key] = [
+                    (*location, tuple(location_errors))
+                    for location, location_errors in errors.items()]
+        return locations
+
+    def run(self, faults):
+        """Run the protocol with faults
+
+        Returns:
+            whether it failed, and the FaultLocations of the run circuits
+        """
+        self.error_gen.inject(faults)
+        failed = ft_verification.as_protocol_outcome(self.protocol(
+                error_gen=self.error_gen,
+                error_params=self.error_params)).failed
+        self.n_runs += 1
+        path = [FaultLocation(circuit_idx, *location)
+                for circuit_idx, (circuit, excluded) in enumerate(zip(
+                    self.error_gen.circuits, self.error_gen.run_exclusions))
+                for location in self.circuit_locations(circuit, excluded)]
+        return failed, path
+
+    def logical_failure_polynomial(self, max_order):
+        """Enumerate all configurations of at most max_order faults
+
+        Faults are placed in order of their position on the fault path,
+        such that every configuration is run exactly once, on the circuits
+        the faults before it lead to.
+        """
+        failing = collections.Counter()
+        passing = collections.Counter()
+        tail = collections.Counter()
+        # depth first, (faults, positions, weight) of configurations to run
+        stack = [((), (), fractions.Fraction(1))]
+        while stack:
+            faults, positions, weight = stack.pop()
+            failed, path = self.run(faults)
+            k = len(faults)
+            (failing if failed else passing)[(k, len(path) - k)] += weight
+            first = positions[-1] + 1 if positions else 0
+            if k == max_order:
+                tail[(first - k, len(path) - first)] += weight
+                continue
+            for position in reversed(range(first, len(path))):
+                location = path[position]
+                error_weight = weight / len(location.errors)
+                for error in reversed(location.errors):
+                    stack.append(((*faults, (location, error)),
+                                  (*positions, position), error_weight))
+        return LogicalFailurePolynomial(max_order, failing, passing, tail)
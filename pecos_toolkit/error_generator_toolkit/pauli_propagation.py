@@ -0,0 +1,262 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pauli_propagation.py
+@author Luc Kusters
+@date 20-10-2022
+
+Clifford (Pauli frame) propagation of faults through a circuit.
+
+The effect of a Pauli fault on a Clifford circuit is fully described by
+the measurement outcomes it flips and the Pauli it leaves on the qudits
+at the end of the circuit. A PauliPropagator computes these effects for
+all (single) faults of a circuit at once, by propagating a Pauli frame
+per fault through the ticks with vectorized numpy operations.
+
+Frames are reduced such that equivalent faults get equal effects:
+
+    - initializations remove any Pauli acting on the initialized qudit
+    - a Pauli component which stabilizes the state of a qudit that was
+      just initialized or measured in that basis (e.g. Z right after
+      init |0> or right before measure Z) is removed
+
+Since propagation is linear, the effect of a combination of faults is the
+XOR of the effects of the single faults.
+"""
+
+import collections
+
+import numpy
+
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+
+
+FaultEffects = collections.namedtuple("FaultEffects", ("measurement_flips",
+                                                       "x", "z"))
+
+PAULI_BITS = {"I": (0, 0), "X": (1, 0), "Y": (1, 1), "Z": (0, 1)}
+
+
+def _swap_xz(x, z, q):
+    x[:, q], z[:, q] = z[:, q].copy(), x[:, q].copy()
+
+
+def _x_to_y(x, z, q):  # X -> +/- Y, Z -> +/- Z
+    z[:, q] ^= x[:, q]
+
+
+def _z_to_y(x, z, q):  # X -> +/- X, Z -> +/- Y
+    x[:, q] ^= z[:, q]
+
+
+def _cycle_xyz(x, z, q):  # X -> Y -> Z -> X
+    x[:, q], z[:, q] = x[:, q] ^ z[:, q], x[:, q].copy()
+
+
+def _cycle_zyx(x, z, q):  # X -> Z -> Y -> X
+    x[:, q], z[:, q] = z[:, q].copy(), x[:, q] ^ z[:, q]
+
+
+def _cnot(x, z, a, b):
+    x[:, b] ^= x[:, a]
+    z[:, a] ^= z[:, b]
+
+
+def _cz(x, z, a, b):
+    z[:, a] ^= x[:, b]
+    z[:, b] ^= x[:, a]
+
+
+def _swap(x, z, a, b):
+    x[:, a], x[:, b] = x[:, b].copy(), x[:, a].copy()
+    z[:, a], z[:, b] = z[:, b].copy(), z[:, a].copy()
+
+
+def _sqrt_xx(x, z, a, b):  # Z_a -> +/- Y_a X_b, Z_b -> +/- X_a Y_b
+    flip = z[:, a] ^ z[:, b]
+    x[:, a] ^= flip
+    x[:, b] ^= flip
+
+
+# frame update (up to signs) of the supported Clifford gates
+ONE_QUBIT_ACTIONS = {
+        **{gate: None for gate in ErrorGenerator._PAULI_GROUP},
+        **{gate: _swap_xz for gate in ('H', 'H1', 'H2', 'H+z+x', 'H-z-x',
+                                       'R', 'Rd')},
+        **{gate: _x_to_y for gate in ('H3', 'H4', 'H+y-z', 'H-y-z',
+                                      *ErrorGenerator._S_GATES)},
+        **{gate: _z_to_y for gate in ('H5', 'H6', 'H-x+y', 'H-x-y',
+                                      *ErrorGenerator._Q_GATES)},
+        "F1": _cycle_xyz,
+        "F1d": _cycle_zyx,
+        }
+TWO_QUBIT_ACTIONS = {
+        "CNOT": _cnot,
+        "CZ": _cz,
+        "SWAP": _swap,
+        "SqrtXX": _sqrt_xx,
+        "MS": _sqrt_xx,
+        }
+INIT_BASES = {
+        **{gate: "X" for gate in ErrorGenerator._INITS_X},
+        **{gate: "Y" for gate in ErrorGenerator._INITS_Y},
+        **{gate: "Z" for gate in ErrorGenerator._INITS_Z},
+        }
+MEASUREMENT_BASES = {"measure X": "X", "measure Y": "Y", "measure Z": "Z"}
+
+
+def remove_stabilizing_component(x, z, q, basis):
+    """Remove the Pauli component stabilizing a qudit's basis state"""
+    if basis == "Z":
+        z[:, q] = 0
+    elif basis == "X":
+        x[:, q] = 0
+    elif basis == "Y":
+        # Y acts trivially, X is equivalent to Z
+        z[:, q] ^= x[:, q]
+        x[:, q] = 0
+
+
+def fault_paulis(fault):
+    """(qudit, pauli symbol) pairs of an ErrorCoordinate"""
+    if isinstance(fault.error_gate, str):
+        return [(fault.qudits, fault.error_gate)]
+    return list(zip(fault.qudits, fault.error_gate))
+
+
+def fault_position(fault):
+    """Index of the base tick a fault is inserted in front of"""
+    return fault.tick_idx + int(fault.after)
+
+
+class PauliPropagator(object):
+    """Propagates Pauli faults through a (Clifford) circuit
+
+    Example:
+        >>> propagator = PauliPropagator(circ)
+        >>> effects = propagator.propagate(error_placer.possible_errors)
+        >>> effects.measurement_flips  # (n_faults, n_measurements)
+    """
+
+    def __init__(self, circuit):
+        self.circuit = circuit
+        self.n_qudits = max(circuit.qudits) + 1 if circuit.qudits else 0
+        self.ticks = [self.compile_tick(circuit, tick_idx)
+                      for tick_idx in range(len(circuit))]
+        # (tick index, qudit) of every measurement, in output order
+        self.measurement_locations = [
+                (tick_idx, int(qudit))
+                for tick_idx, tick in enumerate(self.ticks)
+                for kind, _, qudits, _ in tick if kind == "measure"
+                for qudit in qudits]
+
+    @staticmethod
+    def compile_tick(circuit, tick_idx):
+        """List of (kind, action, qudits, basis) operations of a tick"""
+        operations = []
+        for symbol, locations, _ in circuit.items(tick=tick_idx):
+            locations = sorted(locations)
+            if symbol in INIT_BASES:
+                operations.append(("init", None, numpy.array(locations),
+                                   INIT_BASES[symbol]))
+            elif symbol in MEASUREMENT_BASES:
+                operations.append(("measure", None, numpy.array(locations),
+                                   MEASUREMENT_BASES[symbol]))
+            elif symbol in ONE_QUBIT_ACTIONS:
+                operations.append(("gate", ONE_QUBIT_ACTIONS[symbol],
+                                   numpy.array(locations), None))
+            elif symbol in TWO_QUBIT_ACTIONS:
+                operations.append(("gate", TWO_QUBIT_ACTIONS[symbol],
+                                   numpy.array(locations).reshape(-1, 2),
+                                   None))
+            else:
+                raise NotImplementedError(
+                        f"Pauli propagation through gate '{symbol}' (tick"
+                        f" {tick_idx}) is not supported")
+        return operations
+
+    def fault_frames(self, faults):
+        """Per tick position, the fault rows and their (x, z) frame bits"""
+        inserts = collections.defaultdict(list)
+        for row, fault in enumerate(faults):
+            for qudit, pauli in fault_paulis(fault):
+                x_bit, z_bit = PAULI_BITS[pauli]
+                inserts[fault_position(fault)].append((row, qudit, x_bit,
+                                                       z_bit))
+        return {position: numpy.array(rows, dtype=int)
+                for position, rows in inserts.items()}
+
+    def propagate(self, faults):
+        """Propagate every fault (ErrorCoordinate) on its own
+
+        Returns:
+            FaultEffects of (n_faults, n_measurements) measurement flips
+            and the final (n_faults, n_qudits) x and z frames
+        """
+        n_faults = len(faults)
+        x = numpy.zeros((n_faults, self.n_qudits), dtype=bool)
+        z = numpy.zeros((n_faults, self.n_qudits), dtype=bool)
+        flips = numpy.zeros((n_faults, len(self.measurement_locations)),
+                            dtype=bool)
+        inserts = self.fault_frames(faults)
+        fresh = {}  # qudit -> basis of a freshly prepared/measured qudit
+        meas_idx = 0
+        for position in range(len(self.ticks) + 1):
+            if position in inserts:
+                self.insert_faults(x, z, inserts[position], fresh)
+            if position == len(self.ticks):
+                break
+            for kind, action, qudits, basis in self.ticks[position]:
+                for qudit in qudits.ravel():
+                    fresh.pop(int(qudit), None)
+                if kind == "gate":
+                    if action is not None and qudits.ndim == 2:
+                        action(x, z, qudits[:, 0], qudits[:, 1])
+                    elif action is not None:
+                        action(x, z, qudits)
+                elif kind == "init":
+                    x[:, qudits] = 0
+                    z[:, qudits] = 0
+                    fresh.update((int(q), basis) for q in qudits)
+                elif kind == "measure":
+                    n_meas = len(qudits)
+                    if basis == "Z":
+                        bits = x[:, qudits]
+                    elif basis == "X":
+                        bits = z[:, qudits]
+                    else:
+                        bits = x[:, qudits] ^ z[:, qudits]
+                    flips[:, meas_idx:meas_idx + n_meas] = bits
+                    meas_idx += n_meas
+                    remove_stabilizing_component(x, z, qudits, basis)
+                    fresh.update((int(q), basis) for q in qudits)
+        return FaultEffects(flips, x, z)
+
+    @staticmethod
+    def insert_faults(x, z, rows, fresh):
+        """XOR fault paulis into their frames, reduced by fresh qudits"""
+        fault_rows, qudits, x_bits, z_bits = rows.T
+        x_new = numpy.zeros_like(x)
+        z_new = numpy.zeros_like(z)
+        x_new[fault_rows, qudits] = x_bits.astype(bool)
+        z_new[fault_rows, qudits] = z_bits.astype(bool)
+        for qudit in set(qudits.tolist()) & set(fresh):
+            remove_stabilizing_component(x_new, z_new, [qudit], fresh[qudit])
+        x ^= x_new
+        z ^= z_new
+
+
+def effect_signatures(effects, qudits=None):
+    """Packed (n_faults, n_bytes) uint8 signature of every fault effect
+
+    Args:
+        effects, FaultEffects
+        qudits, optional qudits of the final frame to take into account
+            (e.g. the data qubits), all qudits if None
+    """
+    x, z = effects.x, effects.z
+    if qudits is not None:
+        qudits = sorted(qudits)
+        x, z = x[:, qudits], z[:, qudits]
+    return numpy.packbits(numpy.concatenate(
+            (effects.measurement_flips, x, z), axis=1), axis=1)
@@ -0,0 +1,213 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pauli_sampling.py
+@author Luc Kusters
+@date 17-10-2022
+
+Vectorized sampling of two-qubit Pauli errors (e.g. _PAULI_ERROR_TWO).
+
+Two-qubit Paulis are represented by integer codes
+
+    code = 4 * first + second,    with I = 0, X = 1, Y = 2, Z = 3
+
+such that ("X", "Z") has code 7 and ("I", "I") has code 0. A
+TwoQubitPauliSampler draws the codes of a whole batch of two-qubit gate
+locations in a single numpy call, optionally with non-uniform weights for
+biased channels. The codes can be added to an error circuit
+(add_to_circuit) or applied to a Pauli frame (apply_to_frame).
+
+Example:
+    >>> sampler = TwoQubitPauliSampler(ErrorGenerator._PAULI_ERROR_TWO)
+    >>> codes = sampler.sample(len(locations))
+    >>> add_to_circuit(after, locations, codes)
+"""
+
+import numpy
+
+from pecos_toolkit.error_generator_toolkit import rate_tables
+
+
+PAULIS = ("I", "X", "Y", "Z")
+PAULI_CODES = {pauli: code for code, pauli in enumerate(PAULIS)}
+
+# x and z component of the single qubit paulis I, X, Y, Z
+X_BITS = numpy.array([0, 1, 1, 0], dtype=numpy.uint8)
+Z_BITS = numpy.array([0, 0, 1, 1], dtype=numpy.uint8)
+
+
+def pauli_pair_code(pauli_pair):
+    """Integer code of a pair of pauli symbols, e.g. ("X", "Z") -> 7"""
+    first, second = pauli_pair
+    return 4 * PAULI_CODES[first] + PAULI_CODES[second]
+
+
+def pauli_pair(code):
+    """Pair of pauli symbols of an integer code, e.g. 7 -> ("X", "Z")"""
+    return PAULIS[code >> 2], PAULIS[code & 3]
+
+
+def unfreeze_weights(error_gates):
+    """Restore a dict of weighted error gates frozen into (gate, weight)
+    items (see error_model.freeze_epgc), other error gates are returned
+    unchanged"""
+    if isinstance(error_gates, (set, frozenset)) and len(error_gates) > 0 \
+            and all(isinstance(item, tuple) and len(item) == 2
+                    and isinstance(item[0], tuple)
+                    and not isinstance(item[1], (str, tuple))
+                    for item in error_gates):
+        return dict(error_gates)
+    return error_gates
+
+
+def is_two_qubit_pauli_set(error_gates):
+    """Whether the error gates only contain pairs of pauli symbols"""
+    if isinstance(error_gates, dict):
+        error_gates = error_gates.keys()
+    error_gates = list(error_gates)
+    return len(error_gates) > 0 and all(
+            isinstance(gate, tuple) and len(gate) == 2
+            and all(sym in PAULI_CODES for sym in gate)
+            for gate in error_gates)
+
+
+class TwoQubitPauliSampler(object):
+    """Draws two-qubit pauli codes from a (weighted) set of pauli pairs"""
+
+    def __init__(self, error_gates, weights=None):
+        """
+        Args:
+            error_gates, iterable of pauli pairs, or dict mapping pauli
+                pairs to (unnormalized) weights
+            weights, optional sequence of weights, one per pauli pair of
+                error_gates. Uniform if neither weights nor a dict is given
+        """
+        if isinstance(error_gates, dict):
+            if weights is not None:
+                raise ValueError("weights can not be given for a dict of"
+                                 " error gates")
+            error_gates, weights = zip(*error_gates.items())
+        error_gates = list(error_gates)
+        if not is_two_qubit_pauli_set(error_gates):
+            raise ValueError("error_gates should be pairs of pauli symbols"
+                             f" {PAULIS} but are {error_gates}")
+        codes = numpy.array([pauli_pair_code(gate) for gate in error_gates])
+        # sort by code such that sampling does not depend on set ordering
+        order = numpy.argsort(codes, kind="stable")
+        self.codes = codes[order]
+        self.codes.setflags(write=False)
+        if weights is None:
+            self.probabilities = None
+        else:
+            weights = numpy.asarray(weights, dtype=float)[order]
+            if weights.shape != self.codes.shape:
+                raise ValueError(f"Expected {len(self.codes)} weights but got"
+                                 f" {len(weights)}")
+            if numpy.any(weights < 0) or weights.sum() <= 0:
+                raise ValueError("weights should be non negative and not all"
+                                 " zero")
+            self.probabilities = weights / weights.sum()
+            self.probabilities.setflags(write=False)
+
+    def sample(self, n):
+        """Array of n two-qubit pauli codes"""
+        if self.probabilities is None:
+            return self.codes[numpy.random.randint(len(self.codes), size=n)]
+        return numpy.random.choice(self.codes, size=n, p=self.probabilities)
+
+    def __repr__(self):
+        return (f"TwoQubitPauliSampler(n_paulis={len(self.codes)},"
+                f" biased={self.probabilities is not None})")
+
+
+def frame_bits(codes):
+    """x and z components of two-qubit pauli codes
+
+    Returns:
+        tuple of two (n, 2) uint8 arrays (x bits, z bits), the columns
+        correspond to the first and second qubit of the locations
+    """
+    codes = numpy.asarray(codes)
+    singles = numpy.stack((codes >> 2, codes & 3), axis=-1)
+    return X_BITS[singles], Z_BITS[singles]
+
+
+def apply_to_frame(x_frame, z_frame, locations, codes):
+    """XOR two-qubit pauli codes into a Pauli frame (in place)
+
+    Args:
+        x_frame, z_frame, (n_qubits,) integer arrays holding the frame
+        locations, (n, 2) array like of qubit pairs
+        codes, (n,) array of two-qubit pauli codes
+    """
+    locations = numpy.asarray(locations, dtype=int).reshape(-1, 2)
+    x_bits, z_bits = frame_bits(codes)
+    numpy.bitwise_xor.at(x_frame, locations.ravel(), x_bits.ravel())
+    numpy.bitwise_xor.at(z_frame, locations.ravel(), z_bits.ravel())
+
+
+def add_to_circuit(circuit, locations, codes):
+    """Add the pauli gates of two-qubit pauli codes to an error circuit
+
+    One update per pauli symbol is made, identities are skipped.
+
+    Args:
+        circuit, pecos QuantumCircuit (error tick) to add the gates to
+        locations, (n, 2) array like of qubit pairs
+        codes, (n,) array of two-qubit pauli codes
+    """
+    locations = numpy.asarray(locations, dtype=int).reshape(-1, 2)
+    codes = numpy.asarray(codes)
+    singles = numpy.stack((codes >> 2, codes & 3), axis=-1)
+    for code in range(1, len(PAULIS)):
+        qudits = locations[singles == code]
+        if len(qudits) > 0:
+            circuit.update(PAULIS[code], set(qudits.tolist()),
+                           emptyappend=True)
+
+
+class TwoQubitPauliErrorSet(object):
+    """Batched replacement of pecos' ErrorSetMultiQuditGate
+
+    Provides the same error_func interface (one location at a time) used
+    by the pecos Generator, and additionally create_errors, which samples
+    the errors of all locations of a gate symbol at once.
+    """
+
+    def __init__(self, error_gates, after=True):
+        self.sampler = TwoQubitPauliSampler(unfreeze_weights(error_gates))
+        self.after = after
+        if after:
+            self.error_func = self.error_func_after
+        else:
+            self.error_func = self.error_func_before
+
+    def error_func_after(self, after, before, replace, location,
+                         error_params):
+        add_to_circuit(after, [location], self.sampler.sample(1))
+
+    def error_func_before(self, after, before, replace, location,
+                          error_params):
+        add_to_circuit(before, [location], self.sampler.sample(1))
+
+    def create_errors(self, after, before, location_array, rates):
+        """Sample the errors of all locations of a gate symbol at once
+
+        Args:
+            after, before, error circuits of the tick
+            location_array, (n, 2) array of qubit pairs
+            rates, error probability, True (always) or (n,) array of
+                error probabilities
+        """
+        location_array = numpy.asarray(location_array, dtype=int)
+        if location_array.ndim != 2 or location_array.shape[1] != 2:
+            raise ValueError("Two-qubit pauli errors need qubit pair"
+                             " locations, but got locations of shape"
+                             f" {location_array.shape}")
+        occurred = rate_tables.draw_errors(len(location_array), rates)
+        n_errors = numpy.count_nonzero(occurred)
+        if n_errors == 0:
+            return
+        circuit = after if self.after else before
+        add_to_circuit(circuit, location_array[occurred],
+                       self.sampler.sample(n_errors))
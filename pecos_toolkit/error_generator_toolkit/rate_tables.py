@@ -0,0 +1,225 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+rate_tables.py
+@author Luc Kusters
+@date 06-10-2022
+
+Heterogeneous (per qubit / per qubit pair) error rates.
+
+A RateTable can be passed as the value of an error parameter instead of a
+single probability, e.g.
+
+    >>> error_params = {"two_qubit": RateTable.from_csv("cnot_rates.csv"),
+    ...                 "init": 1e-3}
+
+The GeneralErrorGen then draws the error probability of every location
+from the table. Tables are compiled into dense arrays indexed by
+(gate symbol, qudit) or (gate symbol, qudit, qudit) such that the rates
+of all locations of a tick are gathered in a single numpy call.
+"""
+
+import csv
+
+import numpy
+
+
+def draw_errors(n_locations, rates):
+    """Bool (n_locations, ) array of the locations at which an error occurs
+
+    As the pecos error generators, an error occurs if a uniform random
+    number is <= the rate, and always (without drawing random numbers) if
+    the rate is True.
+
+    Args:
+        n_locations, number of locations
+        rates, error probability, True or (n_locations, ) array of error
+            probabilities (e.g. RateTable.rates)
+    """
+    if rates is True:
+        return numpy.ones(n_locations, dtype=bool)
+    return numpy.random.random(n_locations) <= rates
+
+
+class RateTable(object):
+    """Error rates per location and gate symbol
+
+    The table holds either single qudit locations (qudit x gate-symbol) or
+    qudit pair locations (qudit-pair x gate-symbol). Locations and symbols
+    which are not in the table get the default rate.
+    """
+
+    def __init__(self, locations, symbols, rates, default=0.0,
+                 symmetric=False):
+        """Build a rate table from rows of rates
+
+        Args:
+            locations, sequence of qudits (ints) or qudit pairs (tuples),
+                one per row of rates
+            symbols, sequence of gate symbols, one per column of rates
+            rates, (n_locations, n_symbols) array like of probabilities
+            default, rate of locations/symbols not in the table
+            symmetric, bool, if True the rate of pair (a, b) also applies
+                to pair (b, a)
+        """
+        rates = numpy.asarray(rates, dtype=float)
+        self.symbols = tuple(symbols)
+        if rates.shape != (len(locations), len(self.symbols)):
+            raise ValueError("rates should be of shape (n_locations,"
+                             f" n_symbols) = ({len(locations)},"
+                             f" {len(self.symbols)}) but is of shape"
+                             f" {rates.shape}")
+        if numpy.any((rates < 0) | (rates > 1)):
+            raise ValueError("rates should be probabilities in [0, 1]")
+        self.default = float(default)
+        self.symbol_index = {symbol: idx
+                             for idx, symbol in enumerate(self.symbols)}
+
+        location_array = numpy.asarray(locations, dtype=int)
+        if location_array.ndim == 1:
+            self.n_qudits_per_location = 1
+            location_array = location_array[:, numpy.newaxis]
+        elif location_array.ndim == 2 and location_array.shape[1] == 2:
+            self.n_qudits_per_location = 2
+        else:
+            raise ValueError("locations should be qudits or qudit pairs")
+        if numpy.any(location_array < 0):
+            raise ValueError("qudit indices should be non negative")
+
+        n_qudits = location_array.max() + 1 if len(location_array) else 0
+        shape = ((len(self.symbols),)
+                 + self.n_qudits_per_location * (n_qudits,))
+        self.dense = numpy.full(shape, self.default)
+        index = (slice(None), *location_array.T)
+        self.dense[index] = rates.T
+        if symmetric and self.n_qudits_per_location == 2:
+            self.dense[(slice(None), *location_array[:, ::-1].T)] = rates.T
+        self.dense.setflags(write=False)
+        self._hash = hash((self.symbols, self.default, self.dense.shape,
+                           self.dense.tobytes()))
+
+    @classmethod
+    def from_array(cls, array, symbols, default=0.0):
+        """Build a table from a dense qudit x symbol array
+
+        Args:
+            array, (n_qudits, n_symbols) array for single qudit gates or
+                (n_qudits, n_qudits, n_symbols) array for qudit pairs
+            symbols, sequence of gate symbols labeling the last axis
+        """
+        array = numpy.asarray(array, dtype=float)
+        if array.ndim == 2:
+            locations = list(range(array.shape[0]))
+            rates = array
+        elif array.ndim == 3:
+            n_qudits = array.shape[0]
+            locations = [(q1, q2) for q1 in range(n_qudits)
+                         for q2 in range(array.shape[1])]
+            rates = array.reshape(-1, array.shape[-1])
+        else:
+            raise ValueError("array should have 2 (single qudit) or 3"
+                             f" (qudit pair) dimensions, not {array.ndim}")
+        return cls(locations, symbols, rates, default=default)
+
+    @classmethod
+    def from_npy(cls, path, symbols, default=0.0):
+        """Load a dense table (see from_array) from a .npy file"""
+        return cls.from_array(numpy.load(path), symbols, default=default)
+
+    @classmethod
+    def from_npz(cls, path):
+        """Load a table stored with RateTable.save_npz"""
+        with numpy.load(path) as data:
+            locations = data["locations"]
+            if locations.ndim == 2 and locations.shape[1] == 1:
+                locations = locations[:, 0]
+            return cls([tuple(int(q) for q in loc) if numpy.ndim(loc)
+                        else int(loc) for loc in locations],
+                       [str(symbol) for symbol in data["symbols"]],
+                       data["rates"], default=float(data["default"]))
+
+    @classmethod
+    def from_csv(cls, path, default=0.0, symmetric=False):
+        """Load a table from a csv file
+
+        The header names the location columns ("qubit" for single qudit
+        tables, or "qubit_1" and "qubit_2" for pair tables) followed by
+        one column per gate symbol, e.g.
+
+            qubit_1,qubit_2,CNOT,CZ
+            7,0,0.002,0.003
+        """
+        with open(path, newline="") as csv_file:
+            reader = csv.reader(csv_file)
+            header = [name.strip() for name in next(reader)]
+            rows = [row for row in reader if len(row) > 0]
+        n_location_columns = 2 if header[:2] == ["qubit_1", "qubit_2"] else 1
+        if n_location_columns == 1 and header[0] != "qubit":
+            raise ValueError("csv header should start with 'qubit' or"
+                             f" 'qubit_1,qubit_2' but starts with"
+                             f" '{header[0]}'")
+        locations = []
+        rates = []
+        for row in rows:
+            qudits = tuple(int(q) for q in row[:n_location_columns])
+            locations.append(qudits if n_location_columns == 2
+                             else qudits[0])
+            rates.append([float(r) for r in row[n_location_columns:]])
+        return cls(locations, header[n_location_columns:], rates,
+                   default=default, symmetric=symmetric)
+
+    def save_npz(self, path):
+        """Store the (sparse) table, such that from_npz restores it"""
+        locations = numpy.argwhere(numpy.any(self.dense != self.default,
+                                             axis=0))
+        rates = self.dense[(slice(None), *locations.T)].T
+        numpy.savez(path, locations=locations, rates=rates,
+                    symbols=numpy.array(self.symbols), default=self.default)
+
+    def location_array(self, locations):
+        """Cast a sequence of locations to an (n, qudits_per_loc) array"""
+        array = numpy.asarray(locations, dtype=int)
+        if array.ndim == 1:
+            array = array[:, numpy.newaxis]
+        if array.shape[1] != self.n_qudits_per_location:
+            raise ValueError("Locations act on {} qudit(s) but the table"
+                             " is defined for locations on {} qudit(s)"
+                             .format(array.shape[1],
+                                     self.n_qudits_per_location))
+        return array
+
+    def rates(self, symbol, locations):
+        """Error rates of a sequence of locations of a gate symbol
+
+        Args:
+            symbol, gate symbol
+            locations, sequence of qudits or qudit pairs
+
+        Returns:
+            numpy.ndarray of len(locations) probabilities
+        """
+        if len(locations) == 0:
+            return numpy.empty(0)
+        idx = self.symbol_index.get(symbol)
+        if idx is None:
+            return numpy.full(len(locations), self.default)
+        array = self.location_array(locations)
+        in_table = numpy.all(array < self.dense.shape[1], axis=1)
+        rates = numpy.full(len(array), self.default)
+        rates[in_table] = self.dense[(idx, *array[in_table].T)]
+        return rates
+
+    def __eq__(self, other):
+        if not isinstance(other, RateTable):
+            return NotImplemented
+        return (self.symbols == other.symbols
+                and self.default == other.default
+                and numpy.array_equal(self.dense, other.dense))
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return (f"RateTable(symbols={self.symbols},"
+                f" qudits_per_location={self.n_qudits_per_location},"
+                f" default={self.default})")
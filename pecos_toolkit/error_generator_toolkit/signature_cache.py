@@ -0,0 +1,73 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+signature_cache.py
+@author Luc Kusters
+@date 24-10-2022
+
+Persistent on-disk cache of single fault signatures.
+
+The signatures of all single faults (see ErrorPlacer.fault_signatures)
+only depend on the circuit, the error model and the code (data qudits and
+logical operators). They are stored as .npy files in a directory named
+after the fingerprint of these inputs, such that a later run with the same
+circuit and error model memory-maps them instead of recomputing them.
+
+Example:
+    >>> cache = FaultSignatureCache()
+    >>> signatures = cache.get(circ, epgc_list, data_qudits=range(7),
+    ...                        logical_x=range(7), logical_z=range(7))
+    >>> signatures.measurement_flips  # read only numpy.memmap
+
+Rows are ordered as ErrorPlacer(circ, epgc_list).possible_errors.
+"""
+
+import os
+
+from pecos_toolkit import artifact_cache
+from pecos_toolkit import circuit_fingerprint
+from pecos_toolkit.error_generator_toolkit import error_placer_toolkit
+
+
+# increase when the layout or meaning of the cached signatures changes
+CACHE_VERSION = 1
+
+default_cache_dir = artifact_cache.default_cache_dir
+load_array = artifact_cache.load_array
+
+
+def signature_key(circuit, epgc_list, data_qudits, logical_x, logical_z):
+    """Fingerprint identifying the signatures of a circuit and model"""
+    return circuit_fingerprint.fingerprint(
+            "fault_signatures", CACHE_VERSION,
+            circuit_fingerprint.circuit_fingerprint(circuit),
+            circuit_fingerprint.error_model_fingerprint(epgc_list),
+            list(data_qudits), set(logical_x), set(logical_z))
+
+
+class FaultSignatureCache(artifact_cache.ArtifactCache):
+    """Directory of memory-mapped FaultSignatures"""
+
+    def __init__(self, directory=None):
+        if directory is None:
+            directory = os.path.join(default_cache_dir(), "fault_signatures")
+        super().__init__(directory)
+
+    def load(self, key):
+        """Memory-map the signatures stored under a key"""
+        return error_placer_toolkit.FaultSignatures(**self.load_arrays(key))
+
+    def store(self, key, signatures):
+        """Store signatures under a key"""
+        self.store_arrays(key, signatures._asdict())
+
+    def get(self, circuit, epgc_list, data_qudits, logical_x, logical_z):
+        """Cached FaultSignatures, computed and stored if missing"""
+        key = signature_key(circuit, epgc_list, data_qudits, logical_x,
+                            logical_z)
+        if key not in self:
+            error_placer = error_placer_toolkit.ErrorPlacer(
+                    circuit, epgc_list, cache=self)
+            self.store(key, error_placer.fault_signatures(
+                    data_qudits, logical_x, logical_z))
+        return self.load(key)
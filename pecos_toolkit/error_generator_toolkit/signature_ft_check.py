@@ -0,0 +1,138 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+signature_ft_check.py
+@author Luc Kusters
+@date 25-10-2022
+
+Fault tolerance checks on the GF(2) signature matrix of single faults.
+
+For Pauli faults in a Clifford circuit without adaptive branching, the
+effect of a combination of faults (flipped measurements and final data
+Pauli) is the XOR of the effects of the single faults. The single fault
+signatures (see ErrorPlacer.fault_signatures) are therefore computed once,
+after which all combinations of order faults are evaluated with array
+operations and decoded by an outcome function working on whole arrays of
+combined signatures, without simulating a single circuit.
+
+Example:
+    >>> def outcomes(signatures):
+    ...     flagged = signatures.measurement_flips[:, 1]
+    ...     failed = decoder.corrected_classical_logical_parity_array(
+    ...         signatures.x) == 1
+    ...     return ProtocolOutcome(failed=failed, flagged=flagged)
+    >>> checker = SignatureFTChecker(circ, epgc_list, outcomes,
+    ...                              data_qudits=range(7),
+    ...                              logical_x=range(7), logical_z=range(7))
+    >>> checker.check(order=2).fault_tolerant
+
+The columns of measurement_flips follow the measurement order of the
+circuit (PauliPropagator.measurement_locations).
+"""
+
+import itertools
+
+import numpy
+
+from pecos_toolkit.error_generator_toolkit import combination_ranks
+from pecos_toolkit.error_generator_toolkit import error_placer_toolkit
+from pecos_toolkit.error_generator_toolkit import ft_verification
+
+
+class SignatureFTChecker(object):
+    """Order-k fault tolerance check from single fault signatures"""
+
+    def __init__(self, circuit, epgc_list, outcomes, data_qudits, logical_x,
+                 logical_z, cache=None):
+        """Compute (or load) the single fault signature matrix
+
+        Args:
+            circuit, pecos QuantumCircuit (Clifford, non-adaptive)
+            epgc_list, list of ErrorProneGateCollections
+            outcomes, function mapping FaultSignatures of (n, ...) bool
+                arrays (one row per fault combination) to a
+                ProtocolOutcome of (n, ) bool arrays
+            data_qudits, logical_x, logical_z, see
+                ErrorPlacer.fault_signatures
+            cache, optional FaultSignatureCache
+        """
+        self.error_placer = error_placer_toolkit.ErrorPlacer(
+                circuit, epgc_list, cache=cache)
+        self.outcomes = outcomes
+        if cache is None:
+            signatures = self.error_placer.fault_signatures(
+                    data_qudits, logical_x, logical_z)
+        else:
+            signatures = cache.get(circuit, epgc_list, data_qudits,
+                                   logical_x, logical_z)
+        # (n_faults, n_bits) GF(2) matrix, fields side by side
+        self.widths = [numpy.shape(array)[1] for array in signatures]
+        self.matrix = numpy.concatenate(
+                [numpy.asarray(array, dtype=bool) for array in signatures],
+                axis=1)
+
+    @property
+    def n_faults(self):
+        return len(self.matrix)
+
+    def n_combinations(self, order):
+        return combination_ranks.n_combinations(self.n_faults, order)
+
+    def split(self, rows):
+        """FaultSignatures view of (n, n_bits) combined signature rows"""
+        bounds = numpy.cumsum([0] + self.widths)
+        return error_placer_toolkit.FaultSignatures(*(
+                rows[:, start:stop]
+                for start, stop in zip(bounds[:-1], bounds[1:])))
+
+    def iter_chunks(self, order, chunk_size=2**16):
+        """Yield (indices, combined rows) of all order-combinations
+
+        The combinations are yielded in lexicographic (rank) order. The
+        last fault of every combination is broadcast: the XOR of each
+        prefix of order - 1 faults is combined with all later rows at once.
+        """
+        indices, rows, n_rows = [], [], 0
+        prefixes = itertools.combinations(range(self.n_faults), order - 1)
+        for prefix in prefixes:
+            first = prefix[-1] + 1 if prefix else 0
+            if first >= self.n_faults:
+                continue
+            prefix_row = numpy.logical_xor.reduce(
+                    self.matrix[list(prefix)], axis=0)
+            last = numpy.arange(first, self.n_faults)
+            indices.append(numpy.column_stack((
+                    numpy.broadcast_to(numpy.array(prefix, dtype=int),
+                                       (len(last), order - 1)),
+                    last)))
+            rows.append(self.matrix[first:] ^ prefix_row)
+            n_rows += len(last)
+            if n_rows >= chunk_size:
+                yield numpy.concatenate(indices), numpy.concatenate(rows)
+                indices, rows, n_rows = [], [], 0
+        if n_rows:
+            yield numpy.concatenate(indices), numpy.concatenate(rows)
+
+    def check(self, order=2, chunk_size=2**16, max_failures=100):
+        """Check all combinations of order faults
+
+        Returns:
+            ft_verification.FTReport (n_simulated is 0), with failures the
+            first max_failures failing combinations of ErrorCoordinates
+        """
+        n_failed = n_flagged = 0
+        failures = []
+        for indices, rows in self.iter_chunks(order, chunk_size):
+            outcome = self.outcomes(self.split(rows))
+            failed = numpy.asarray(outcome.failed, dtype=bool)
+            n_failed += int(failed.sum())
+            n_flagged += int(numpy.count_nonzero(outcome.flagged))
+            for combination in indices[failed][:max_failures
+                                               - len(failures)]:
+                failures.append(tuple(self.error_placer.possible_errors[i]
+                                      for i in combination))
+        n_combinations = self.n_combinations(order)
+        return ft_verification.FTReport(
+                order=order, n_combinations=n_combinations, n_simulated=0,
+                n_passed=n_combinations - n_failed, n_failed=n_failed,
+                n_flagged=n_flagged, failures=failures, complete=True)
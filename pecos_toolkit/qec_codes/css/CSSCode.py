@@ -0,0 +1,205 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CSSCode.py
+@author Luc Kusters
+@date 31-10-2022
+
+Description of a CSS code by its X and Z stabilizers and logicals.
+
+A CSSCode holds everything the generic circuits (see css.Circuits) and
+decoders need: the ordered stabilizer supports (the order is the order in
+which the ancilla couples to the data qubits), the parity check matrices
+Hx and Hz, the logical operators, the encoding schedule of the logical
+zero state and syndrome -> correction tables (gf2_kernel.BitMatrixKernel)
+of both readout bases. Data qubits are numbered 0 ... n-1, the ancilla is
+qubit n and the flag qubit n+1.
+
+Example:
+    >>> code = CSSCode.from_parity_checks(hx, hz, logical_x, logical_z,
+    ...                                   distance=3)
+    >>> code.kernel("Z").corrected_logical_parities(bits)
+"""
+
+import collections
+
+import numpy
+
+from pecos_toolkit.qec_codes import gf2_kernel
+
+
+Stabilizer = collections.namedtuple("Stabilizer", ("pauli_type", "qubits"))
+
+
+def support_to_bits(support, n_bits):
+    """Bit array of length n_bits with the qubits in support set"""
+    bits = numpy.zeros(n_bits, dtype=numpy.uint8)
+    bits[list(support)] = 1
+    return bits
+
+
+class CSSCode(object):
+    """CSS code on n data qubits"""
+
+    READOUT_BASES = ("X", "Z")
+
+    def __init__(self, n_data, x_supports, z_supports, logical_x, logical_z,
+                 name="css", distance=None):
+        """
+        Args:
+            n_data, number of data qubits n
+            x_supports, z_supports, qubit tuples of the X (Z) stabilizer
+                generators, in the order the ancilla couples to them
+            logical_x, logical_z, qubits of the logical X (Z) operator
+            name, name of the code
+            distance, optional code distance, limits the weight of the
+                corrections of the decoder tables to (distance - 1) // 2
+        """
+        self.n_data = n_data
+        self.name = name
+        self.distance = distance
+        self.x_stabilizers = tuple(Stabilizer("X", tuple(support))
+                                   for support in x_supports)
+        self.z_stabilizers = tuple(Stabilizer("Z", tuple(support))
+                                   for support in z_supports)
+        self.logical_x = tuple(logical_x)
+        self.logical_z = tuple(logical_z)
+        self.hx = self.parity_check_matrix(self.x_stabilizers)
+        self.hz = self.parity_check_matrix(self.z_stabilizers)
+        if (self.hx.astype(int) @ self.hz.T.astype(int) % 2).any():
+            raise ValueError("X and Z stabilizers of a CSS code must"
+                             " commute")
+        logical_x = support_to_bits(self.logical_x, n_data)
+        logical_z = support_to_bits(self.logical_z, n_data)
+        if ((self.hz @ logical_x % 2).any()
+                or (self.hx @ logical_z % 2).any()):
+            raise ValueError("Logical operators must commute with the"
+                             " stabilizers")
+        if not logical_x @ logical_z % 2:
+            raise ValueError("Logical X and Z must anticommute")
+        self._kernels = {}
+
+    @classmethod
+    def from_parity_checks(cls, hx, hz, logical_x, logical_z, **kwargs):
+        """CSSCode of (r, n) bit matrices hx, hz and logical bit vectors
+
+        The ancilla couples to the qubits of every stabilizer in
+        ascending order.
+        """
+        hx = numpy.asarray(hx, dtype=numpy.uint8)
+        hz = numpy.asarray(hz, dtype=numpy.uint8)
+        return cls(hx.shape[1],
+                   [tuple(numpy.flatnonzero(row)) for row in hx],
+                   [tuple(numpy.flatnonzero(row)) for row in hz],
+                   numpy.flatnonzero(logical_x), numpy.flatnonzero(logical_z),
+                   **kwargs)
+
+    def __deepcopy__(self, memo):
+        # codes are not modified after construction, copies of circuits
+        # share their code (and its decoder tables)
+        return self
+
+    def __repr__(self):
+        return (f"CSSCode(name={self.name}, n_data={self.n_data},"
+                f" n_x_stabilizers={len(self.x_stabilizers)},"
+                f" n_z_stabilizers={len(self.z_stabilizers)})")
+
+    @property
+    def data_qubits(self):
+        return range(0, self.n_data)
+
+    @property
+    def ancilla_qubit(self):
+        return self.n_data
+
+    @property
+    def flag_qubit(self):
+        return self.n_data + 1
+
+    @property
+    def n_qubits(self):
+        """Number of qubits of the data block, the ancilla and the flag"""
+        return self.n_data + 2
+
+    @property
+    def stabilizers(self):
+        return self.x_stabilizers + self.z_stabilizers
+
+    def parity_check_matrix(self, stabilizers):
+        """(r, n) bit matrix of the supports of stabilizers"""
+        return numpy.array([support_to_bits(stab.qubits, self.n_data)
+                            for stab in stabilizers],
+                           dtype=numpy.uint8).reshape(-1, self.n_data)
+
+    def kernel(self, readout_basis):
+        """gf2_kernel.BitMatrixKernel decoding a data readout
+
+        A readout in the X basis is checked by the X stabilizers (it is
+        flipped by Z errors) and the logical X operator, a Z readout by the
+        Z stabilizers and logical Z. The minimum weight correction tables
+        are built once per code and basis.
+        """
+        if readout_basis not in self.READOUT_BASES:
+            raise ValueError(f"readout_basis should be one of"
+                             f" {self.READOUT_BASES}")
+        kernel = self._kernels.get(readout_basis)
+        if kernel is None:
+            if readout_basis == "X":
+                parity_check, logical = self.hx, self.logical_x
+            else:
+                parity_check, logical = self.hz, self.logical_z
+            max_weight = (None if self.distance is None
+                          else (self.distance - 1) // 2)
+            kernel = self._kernels[readout_basis] = gf2_kernel.BitMatrixKernel(
+                    parity_check, [support_to_bits(logical, self.n_data)],
+                    max_weight=max_weight)
+        return kernel
+
+    def encoding_schedule(self):
+        """Ticks of gates preparing the logical zero state from |0...0>
+
+        Hx is brought in reduced row echelon form, the pivot qubit of every
+        row is put in |+> and copied to the other qubits of its row with
+        CNOTs. The CNOTs all commute (no qubit is both control and target)
+        and are packed greedily into ticks acting on disjoint qubits.
+
+        Returns:
+            list of {symbol: set of locations} ticks
+        """
+        reduced, pivots = gf2_kernel.row_reduce(self.hx)
+        cnot_ticks = []
+        for row, pivot in zip(reduced, pivots):
+            for target in numpy.flatnonzero(row):
+                if target == pivot:
+                    continue
+                gate = (int(pivot), int(target))
+                for tick in cnot_ticks:
+                    if not tick["qubits"].intersection(gate):
+                        break
+                else:
+                    tick = {"qubits": set(), "gates": set()}
+                    cnot_ticks.append(tick)
+                tick["qubits"].update(gate)
+                tick["gates"].add(gate)
+        schedule = [{"init |0>": set(self.data_qubits)}]
+        if pivots:
+            schedule.append({"H": set(int(pivot) for pivot in pivots)})
+        schedule.extend({"CNOT": tick["gates"]} for tick in cnot_ticks)
+        return schedule
+
+
+def quantum_reed_muller_15():
+    """[[15, 1, 3]] quantum Reed-Muller code
+
+    Qubit i is the nonzero 4 bit vector i + 1. The X stabilizers are the
+    weight 8 rows of the punctured first order Reed-Muller code, the Z
+    stabilizers also include their weight 4 pairwise products.
+    """
+    vectors = numpy.array([[(i >> bit) & 1 for i in range(1, 16)]
+                           for bit in range(4)], dtype=numpy.uint8)
+    products = [vectors[a] & vectors[b]
+                for a in range(4) for b in range(a + 1, 4)]
+    hz = numpy.concatenate((vectors, products))
+    return CSSCode.from_parity_checks(
+            vectors, hz, numpy.ones(15), numpy.ones(15),
+            name="quantum_reed_muller_15", distance=3)
@@ -0,0 +1,138 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Circuits.py
+@author Luc Kusters
+@date 31-10-2022
+
+Circuits of any CSSCode, generated from its stabilizers and logicals.
+
+The circuits use the data qubits, ancilla and flag qubit of the code.
+Circuits of a specific code (e.g. the Steane circuits, steane.circuits)
+derive from these classes with the code bound, see BaseSteaneCirc.
+"""
+
+import pecos.circuits
+import pecos.simulators
+
+from pecos_toolkit import circuit_runner
+
+
+class F1FlagCircData(object):
+    """Data structure for saving variables for a flag circuit
+
+    Also contains an injection method to inject the flag circuit into an
+    existing "parent" circuit
+    """
+
+    def __init__(self, flag_qubit, flag_from_qubit, gutter_1, gutter_2,
+                 init_loc, meas_loc, meas_type="measure Z",
+                 init_type="init |0>"):
+        self.flag_qubit = flag_qubit
+        self.flag_from_qubit = flag_from_qubit
+        self.gutter_1 = gutter_1
+        self.gutter_2 = gutter_2
+        self.meas_loc = meas_loc
+        self.init_loc = init_loc
+        self.meas_type = meas_type
+        self.init_type = init_type
+
+    def inject_flag_circuit(self, parent_circ):
+        parent_circ.update(
+                self.meas_type, {self.flag_qubit}, tick=self.meas_loc)
+        parent_circ.insert(
+                self.gutter_2,
+                ({"CNOT": {(self.flag_from_qubit, self.flag_qubit)}}, {}))
+        parent_circ.insert(
+                self.gutter_1,
+                ({"CNOT": {(self.flag_from_qubit, self.flag_qubit)}}, {}))
+        parent_circ.update(
+                self.init_type, {self.flag_qubit}, tick=self.init_loc)
+
+
+class BaseCSSCirc(pecos.circuits.QuantumCircuit):
+    """Circuit baseclass of a CSSCode"""
+
+    def __init__(self, code,
+                 runner=circuit_runner.ImprovedRunner(random_seed=True),
+                 *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.code = code
+        self._runner = runner
+
+    @property
+    def num_qubits(self):
+        """Number of qubits in the circuit"""
+        return self.code.n_qubits
+
+    def simulator(self):
+        """Simulator corresponding for this circuit and deriving circuits"""
+        return pecos.simulators.SparseSim(self.num_qubits)
+
+    def run(self, state=None, *args, **kwargs):
+        if state is None:
+            state = self.simulator()
+        return self._runner.run(state, self, *args, **kwargs)
+
+
+class StabMeasCircuit(BaseCSSCirc):
+    """Measure a stabilizer with a single |+> ancilla"""
+
+    ENTANGLING_GATES = {"X": "CNOT", "Z": "CZ"}
+
+    def __init__(self, code, stabilizer, *args, **kwargs):
+        super().__init__(code, *args, **kwargs)
+        self.stabilizer = stabilizer
+        self.entangling_gate = self.ENTANGLING_GATES[stabilizer.pauli_type]
+        self.append("init |+>", {self.code.ancilla_qubit})
+        for qubit in self.stabilizer.qubits:
+            self.append(self.entangling_gate,
+                        {(self.code.ancilla_qubit, qubit)})
+        self.append("measure X", {self.code.ancilla_qubit})
+
+
+class F1FTECStabMeasCircuit(StabMeasCircuit):
+    """StabMeasCircuit with a flag coupled after the first and before the
+    last entangling gate"""
+
+    FLAG_INIT_TYPE = "init |0>"
+    FLAG_MEAS_TYPE = "measure Z"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        weight = len(self.stabilizer.qubits)
+        self.f1_flag_circ = F1FlagCircData(
+                flag_qubit=self.code.flag_qubit,
+                flag_from_qubit=self.code.ancilla_qubit,
+                gutter_1=2, gutter_2=weight,
+                init_loc=0, meas_loc=weight + 1,
+                meas_type=self.FLAG_MEAS_TYPE,
+                init_type=self.FLAG_INIT_TYPE)
+        self.f1_flag_circ.inject_flag_circuit(self)
+
+
+class LogicalZeroInitialization(BaseCSSCirc):
+    """Logical zero state encoding circuit, see CSSCode.encoding_schedule"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for tick in self.encoding_schedule():
+            self.append(tick)
+
+    def encoding_schedule(self):
+        """Ticks of the encoding circuit, codes with a fixed (e.g. fault
+        tolerant) gate order override this"""
+        return self.code.encoding_schedule()
+
+
+class DataStateMeasurement(BaseCSSCirc):
+    ALLOWED_BASES = ("Z", "X")
+
+    def __init__(self, code, measure_basis="Z", *args, **kwargs):
+        super().__init__(code, *args, **kwargs)
+        if measure_basis not in self.ALLOWED_BASES:
+            raise ValueError("keyword argument measure_basis should be one of"
+                             f"{self.ALLOWED_BASES}")
+        self.measure_basis = measure_basis
+        self.append(f"measure {self.measure_basis}",
+                    set(self.code.data_qubits))
@@ -0,0 +1,177 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+gf2_kernel.py
+@author Luc Kusters
+@date 28-10-2022
+
+Vectorized GF(2) post-processing of classical (readout) bits.
+
+A BitMatrixKernel holds a parity check matrix, logical operators and a
+syndrome -> correction table as bit arrays and as rows packed into
+uint64 (bit i is qubit i). Syndromes, corrections and logical parities of
+a whole (shots, n) array of bits are computed in single numpy calls, such
+that the readout of a full sweep is decoded at once.
+
+Example:
+    >>> kernel = Steane.BaseSteaneData.gf2_kernel()
+    >>> bits = res.measurements.last.syndrome  # (shots, 7)
+    >>> kernel.corrected_logical_parities(bits)
+"""
+
+import itertools
+
+import numpy
+
+
+# number of set bits of every byte value
+_BYTE_POPCOUNT = numpy.array([bin(i).count("1") for i in range(256)],
+                             dtype=numpy.uint8)
+
+
+def pack_bit_rows(bits):
+    """Pack the rows of an (N, n) bit array (n <= 64) into N uint64"""
+    bits = numpy.asarray(bits, dtype=numpy.uint64)
+    if bits.shape[1] > 64:
+        raise ValueError(f"Can not pack rows of {bits.shape[1]} > 64 bits")
+    weights = numpy.left_shift(numpy.uint64(1),
+                               numpy.arange(bits.shape[1], dtype=numpy.uint64))
+    return numpy.bitwise_or.reduce(bits * weights, axis=1)
+
+
+def popcount_array(packed):
+    """Number of set bits of every element of a uint64 array"""
+    packed = numpy.ascontiguousarray(packed, dtype=numpy.uint64)
+    return _BYTE_POPCOUNT[packed.view(numpy.uint8)].reshape(
+            *packed.shape, 8).sum(axis=-1, dtype=numpy.int64)
+
+
+def min_weight_corrections(parity_check, max_weight=None):
+    """(2^r, n) table of a minimum weight error of every syndrome
+
+    Row s holds the correction of the syndrome with bits s_0 ... s_r-1
+    read as a binary number, s_0 being the most significant bit. Errors
+    are tried in order of weight, then lexicographically. Syndromes which
+    no error of weight <= max_weight (n if None) produces get no
+    correction.
+    """
+    parity_check = numpy.asarray(parity_check, dtype=numpy.uint8)
+    n_checks, n_bits = parity_check.shape
+    if max_weight is None:
+        max_weight = n_bits
+    corrections = numpy.zeros((2**n_checks, n_bits), dtype=numpy.uint8)
+    found = numpy.zeros(2**n_checks, dtype=bool)
+    found[0] = True
+    significance = 1 << numpy.arange(n_checks - 1, -1, -1)
+    for weight in range(1, max_weight + 1):
+        if found.all():
+            break
+        supports = numpy.array(list(itertools.combinations(range(n_bits),
+                                                           weight)))
+        parities = parity_check[:, supports].sum(axis=2, dtype=numpy.int64)
+        indices = (parities % 2).T @ significance
+        indices, first = numpy.unique(indices, return_index=True)
+        new = ~found[indices]
+        for index, support in zip(indices[new], supports[first[new]]):
+            corrections[index, support] = 1
+        found[indices] = True
+    return corrections
+
+
+def row_reduce(matrix):
+    """Reduced row echelon form of a bit matrix over GF(2)
+
+    Returns:
+        the (rank, n) reduced matrix without zero rows, and the pivot
+        column of every row
+    """
+    reduced = numpy.array(matrix, dtype=numpy.uint8) % 2
+    pivots = []
+    for column in range(reduced.shape[1]):
+        rank = len(pivots)
+        candidates = numpy.flatnonzero(reduced[rank:, column])
+        if not len(candidates):
+            continue
+        pivot_row = rank + candidates[0]
+        reduced[[rank, pivot_row]] = reduced[[pivot_row, rank]]
+        others = numpy.flatnonzero(reduced[:, column])
+        others = others[others != rank]
+        reduced[others] ^= reduced[rank]
+        pivots.append(column)
+        if len(pivots) == reduced.shape[0]:
+            break
+    return reduced[:len(pivots)], pivots
+
+
+class BitMatrixKernel(object):
+    """Syndromes, corrections and logical parities of (shots, n) bits"""
+
+    def __init__(self, parity_check, logicals, corrections=None,
+                 max_weight=None):
+        """
+        Args:
+            parity_check, (r, n) bit matrix, one row per stabilizer
+            logicals, (k, n) bit matrix, one row per logical operator
+            corrections, optional (2^r, n) correction table, by default
+                min_weight_corrections up to max_weight
+        """
+        self.parity_check = numpy.array(parity_check, dtype=numpy.uint8)
+        self.logicals = numpy.array(logicals, dtype=numpy.uint8).reshape(
+                -1, self.n_bits)
+        if corrections is None:
+            corrections = min_weight_corrections(self.parity_check,
+                                                 max_weight)
+        self.corrections = numpy.array(corrections, dtype=numpy.uint8)
+        if self.n_bits <= 64:
+            self.packed_parity_check = pack_bit_rows(self.parity_check)
+            self.packed_logicals = pack_bit_rows(self.logicals)
+        else:
+            self.packed_parity_check = self.packed_logicals = None
+        self.significance = 1 << numpy.arange(self.n_checks - 1, -1, -1)
+
+    @property
+    def n_bits(self):
+        return self.parity_check.shape[1]
+
+    @property
+    def n_checks(self):
+        return self.parity_check.shape[0]
+
+    def parities(self, bits, rows, packed_rows):
+        """(shots, len(rows)) parities of bits with every row"""
+        bits = numpy.asarray(bits, dtype=numpy.uint8).reshape(-1, self.n_bits)
+        if packed_rows is None:
+            return (bits @ rows.T.astype(numpy.int64) % 2).astype(
+                    numpy.uint8)
+        overlap = pack_bit_rows(bits)[:, None] & packed_rows[None, :]
+        return (popcount_array(overlap) & 1).astype(numpy.uint8)
+
+    def syndromes(self, bits):
+        """(shots, r) syndromes of (shots, n) bits"""
+        return self.parities(bits, self.parity_check,
+                             self.packed_parity_check)
+
+    def syndrome_indices(self, syndromes):
+        """Row of the correction table of (shots, r) syndromes"""
+        return numpy.asarray(syndromes, dtype=numpy.int64) @ self.significance
+
+    def correct(self, bits, syndromes=None):
+        """(shots, n) bits with the correction of their syndrome applied
+
+        Args:
+            bits, (shots, n) bits
+            syndromes, optional (shots, r) syndromes to correct with,
+                the syndromes of bits if None
+        """
+        bits = numpy.asarray(bits, dtype=numpy.uint8).reshape(-1, self.n_bits)
+        if syndromes is None:
+            syndromes = self.syndromes(bits)
+        return bits ^ self.corrections[self.syndrome_indices(syndromes)]
+
+    def logical_parities(self, bits):
+        """(shots, k) parities of bits with the logical operators"""
+        return self.parities(bits, self.logicals, self.packed_logicals)
+
+    def corrected_logical_parities(self, bits):
+        """(shots, k) logical parities after correcting bits"""
+        return self.logical_parities(self.correct(bits))
@@ -7,32 +7,36 @@ Initialization.py
 """
 
 
+from pecos_toolkit.qec_codes.css import Circuits
 from pecos_toolkit.qec_codes.steane.circuits import Steane
 from pecos_toolkit.qec_codes.steane.circuits import Measurement
 
 
-class LogicalZeroInitialization(Steane.BaseSteaneCirc):
+class LogicalZeroInitialization(Steane.BaseSteaneCirc,
+                                Circuits.LogicalZeroInitialization):
     """Logical initalization circuit"""
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.append("init |0>", set(self.DATA_QUBITS))
-        self.append("H", {self.CORNER_TOP_QUBIT})
-        self.update("H", {self.CORNER_LEFT_QUBIT})
-        self.update("H", {self.CORNER_RIGHT_QUBIT})
-
-        self.append("CNOT", {(self.CORNER_TOP_QUBIT, self.EDGE_LEFT_QUBIT)})
-        self.append("CNOT", {(self.CORNER_TOP_QUBIT, self.EDGE_RIGHT_QUBIT)})
-        self.append("CNOT", {(self.CORNER_TOP_QUBIT, self.CENTER_QUBIT)})
-
-        self.append("CNOT", {(self.CORNER_LEFT_QUBIT, self.EDGE_LEFT_QUBIT)})
-        self.append("CNOT", {(self.CORNER_LEFT_QUBIT, self.EDGE_BOTTOM_QUBIT)})
-        self.append("CNOT", {(self.CORNER_LEFT_QUBIT, self.CENTER_QUBIT)})
-
-        self.append("CNOT", {(self.CORNER_RIGHT_QUBIT,
-                              self.EDGE_BOTTOM_QUBIT)})
-        self.append("CNOT", {(self.CORNER_RIGHT_QUBIT, self.EDGE_RIGHT_QUBIT)})
-        self.append("CNOT", {(self.CORNER_RIGHT_QUBIT, self.CENTER_QUBIT)})
+    def encoding_schedule(self):
+        """The encoding CNOTs one per tick, in the order verified by
+        VerifiedLogicalZeroInitialization"""
+        schedule = [{"init |0>": set(self.DATA_QUBITS)},
+                    {"H": {self.CORNER_TOP_QUBIT, self.CORNER_LEFT_QUBIT,
+                           self.CORNER_RIGHT_QUBIT}}]
+        cnots = {
+                self.CORNER_TOP_QUBIT: (self.EDGE_LEFT_QUBIT,
+                                        self.EDGE_RIGHT_QUBIT,
+                                        self.CENTER_QUBIT),
+                self.CORNER_LEFT_QUBIT: (self.EDGE_LEFT_QUBIT,
+                                         self.EDGE_BOTTOM_QUBIT,
+                                         self.CENTER_QUBIT),
+                self.CORNER_RIGHT_QUBIT: (self.EDGE_BOTTOM_QUBIT,
+                                          self.EDGE_RIGHT_QUBIT,
+                                          self.CENTER_QUBIT),
+                }
+        for control, targets in cnots.items():
+            schedule.extend({"CNOT": {(control, target)}}
+                            for target in targets)
+        return schedule
 
 
 class VerifiedLogicalZeroInitialization(LogicalZeroInitialization):
@@ -6,6 +6,9 @@ Measurements.py
 @date 01-06-2022
 """
 
+import numpy
+
+from pecos_toolkit.qec_codes.css import Circuits
 from pecos_toolkit.qec_codes.steane.circuits import Steane
 
 
@@ -13,69 +16,18 @@ class StabMeasCircuitData(object):
     ANCILLA_QUBIT = 7
 
 
-class StabMeasCircuit(Steane.BaseSteaneCirc, StabMeasCircuitData):
+class StabMeasCircuit(Steane.BaseSteaneCirc, Circuits.StabMeasCircuit,
+                      StabMeasCircuitData):
+    """css.Circuits.StabMeasCircuit of the Steane code"""
 
-    def __init__(self, stabilizer, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.stabilizer = stabilizer
-        if stabilizer.pauli_type == "X":
-            self.entangling_gate = "CNOT"
-        elif stabilizer.pauli_type == "Z":
-            self.entangling_gate = "CZ"
-        self.append("init |+>", {self.ANCILLA_QUBIT})
-        self.append(self.entangling_gate, {(self.ANCILLA_QUBIT,
-                                            self.stabilizer.q1)})
-        self.append(self.entangling_gate, {(self.ANCILLA_QUBIT,
-                                            self.stabilizer.q2)})
-        self.append(self.entangling_gate, {(self.ANCILLA_QUBIT,
-                                            self.stabilizer.q3)})
-        self.append(self.entangling_gate, {(self.ANCILLA_QUBIT,
-                                            self.stabilizer.q4)})
-        self.append("measure X", {self.ANCILLA_QUBIT})
-
-
-class DataStateMeasurement(Steane.BaseSteaneCirc):
-    ALLOWED_BASES = ("Z", "X")
-
-    def __init__(self, measure_basis="Z",  *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        if measure_basis not in self.ALLOWED_BASES:
-            raise ValueError("keyword argument measure_basis should be one of"
-                             f"{self.ALLOWED_BASES}")
-        self.measure_basis = measure_basis
-        self.append(f"measure {self.measure_basis}", set(self.DATA_QUBITS))
 
+class DataStateMeasurement(Steane.BaseSteaneCirc,
+                           Circuits.DataStateMeasurement):
+    """css.Circuits.DataStateMeasurement of the Steane code"""
 
-class F1FlagCircData(object):
-    """Data structure for saving variables for a flag circuit
-
-    Also contains an injection method to inject the flag circuit into an
-    existing "parent" circuit
-    """
 
-    def __init__(self, flag_qubit, flag_from_qubit, gutter_1, gutter_2,
-                 init_loc, meas_loc, meas_type="measure Z",
-                 init_type="init |0>"):
-        self.flag_qubit = flag_qubit
-        self.flag_from_qubit = flag_from_qubit
-        self.gutter_1 = gutter_1
-        self.gutter_2 = gutter_2
-        self.meas_loc = meas_loc
-        self.init_loc = init_loc
-        self.meas_type = meas_type
-        self.init_type = init_type
-
-    def inject_flag_circuit(self, parent_circ):
-        parent_circ.update(
-                self.meas_type, {self.flag_qubit}, tick=self.meas_loc)
-        parent_circ.insert(
-                self.gutter_2,
-                ({"CNOT": {(self.flag_from_qubit, self.flag_qubit)}}, {}))
-        parent_circ.insert(
-                self.gutter_1,
-                ({"CNOT": {(self.flag_from_qubit, self.flag_qubit)}}, {}))
-        parent_circ.update(
-                self.init_type, {self.flag_qubit}, tick=self.init_loc)
+# the flag circuit data is code independent
+F1FlagCircData = Circuits.F1FlagCircData
 
 
 class F1FTECStabMeasCircuitData(StabMeasCircuitData):
@@ -84,14 +36,43 @@ class F1FTECStabMeasCircuitData(StabMeasCircuitData):
     FLAG_MEAS_TYPE = "measure Z"
 
 
-class F1FTECStabMeasCircuit(StabMeasCircuit, F1FTECStabMeasCircuitData):
+class F1FTECStabMeasCircuit(StabMeasCircuit, Circuits.F1FTECStabMeasCircuit,
+                            F1FTECStabMeasCircuitData):
+    """css.Circuits.F1FTECStabMeasCircuit of the Steane code"""
+
+
+class FusedStabMeasCircuit(Steane.BaseSteaneCirc, F1FTECStabMeasCircuitData):
+    """Measure several stabilizers in a single circuit
+
+    The (F1FTEC)StabMeasCircuits of the stabilizers follow each other, the
+    ancilla (and flag) qubit is initialized again for every stabilizer.
+    The measurement row of a run holds the syndrome bits of the
+    stabilizers followed by their flag bits (if flagged).
+    """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, stabilizers, flagged=True, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.f1_flag_circ = F1FlagCircData(flag_qubit=self.FLAG_QUBIT,
-                                           flag_from_qubit=self.ANCILLA_QUBIT,
-                                           gutter_1=2, gutter_2=4,
-                                           init_loc=0, meas_loc=5,
-                                           meas_type=self.FLAG_MEAS_TYPE,
-                                           init_type=self.FLAG_INIT_TYPE)
-        self.f1_flag_circ.inject_flag_circuit(self)
+        self.measured_stabilizers = tuple(stabilizers)
+        self.flagged = flagged
+        circuit_class = F1FTECStabMeasCircuit if flagged else StabMeasCircuit
+        syndrome_slots, flag_slots = [], []
+        for stab in self.measured_stabilizers:
+            stab_circ = circuit_class(stab)
+            for tick, _, _ in stab_circ.iter_ticks():
+                self.append({})
+                for symbol, locations, params in tick.items():
+                    self.update(symbol, set(locations), **params)
+            syndrome_slots.append((len(self) - 1, self.ANCILLA_QUBIT))
+            if flagged:
+                flag_slots.append((len(self) - 1, self.FLAG_QUBIT))
+        # (tick, qubit) of every bit of the measurement row
+        self.measurement_slots = syndrome_slots + flag_slots
+
+    def measurement_row(self, measurements):
+        """Syndrome (and flag) bits of the MeasurementContainer of a run"""
+        return numpy.array([measurements[tick][qubit] for tick, qubit
+                            in self.measurement_slots], dtype=numpy.uint8)
+
+    def packed_row(self, measurements):
+        """measurement_row packed into an int, bit i holding bit i"""
+        return Steane.pack_bits(self.measurement_row(measurements))
@@ -6,14 +6,14 @@ Steane.py
 @date 06-06-2022
 """
 
-import numpy
-import itertools
+import collections
 
-import pecos.circuits
-import pecos.simulators
+import numpy
 
+from pecos_toolkit.qec_codes import gf2_kernel
+from pecos_toolkit.qec_codes.css import CSSCode
+from pecos_toolkit.qec_codes.css import Circuits
 from pecos_toolkit.qec_codes.steane.data_types import Plaquette
-from pecos_toolkit import circuit_runner
 
 
 def distance(array_1, array_2):
@@ -21,7 +21,25 @@ def distance(array_1, array_2):
         raise RuntimeError("Input arrays must be of equal length for"
                            " distance calculation but were of lengths"
                            f"{len(array_1)}, {len(array_2)}")
-    return sum([i != j for i, j in zip(array_1, array_2)])
+    return popcount(pack_bits(array_1) ^ pack_bits(array_2))
+
+
+def pack_bits(bits):
+    """Pack a bit iterable into an int, bit i holding bits[i]"""
+    packed = 0
+    for i, bit in enumerate(bits):
+        if bit:
+            packed |= 1 << i
+    return packed
+
+
+def unpack_bits(packed, length):
+    """Inverse of pack_bits"""
+    return tuple((packed >> i) & 1 for i in range(length))
+
+
+def popcount(packed):
+    return bin(packed).count("1")
 
 
 class BinaryArray(list):
@@ -41,28 +59,49 @@ class BinaryArray(list):
         return qubit_set
 
 
+PackedCodewords = collections.namedtuple("PackedCodewords", (
+        "stabilizers", "logical_zero", "logical_one"))
+
+
 class BinaryStabilizerGenerator(object):
     BINARY_STAB_GEN = tuple()
     VALID_LOGICALS = tuple()
     LOGICAL_ZERO_CODEWORDS_MAGIC_STRINGS = ("zero", 0, "logical_zero")
     LOGICAL_ONE_CODEWORDS_MAGIC_STRINGS = ("one", 1, "logical_one")
 
+    # class -> PackedCodewords, see packed_codewords
+    _packed_codewords = {}
+
+    @classmethod
+    def packed_codewords(cls):
+        """Stabilizer group and codewords of both logicals as packed ints
+
+        Computed once per class, bit i of every int is qubit i.
+        """
+        packed = BinaryStabilizerGenerator._packed_codewords.get(cls)
+        if packed is None:
+            group = [0]
+            for generator in cls.BINARY_STAB_GEN:
+                generator = pack_bits(generator)
+                group.extend([element ^ generator for element in group])
+            stabilizers = tuple(sorted(set(group)))
+            logical = pack_bits(BinaryArray.from_qubit_set(
+                cls.VALID_LOGICALS[0], length=cls.n_bits()))
+            packed = PackedCodewords(
+                    stabilizers=stabilizers,
+                    logical_zero=stabilizers,
+                    logical_one=tuple(stab ^ logical for stab in stabilizers))
+            BinaryStabilizerGenerator._packed_codewords[cls] = packed
+        return packed
+
+    @classmethod
+    def n_bits(cls):
+        return len(cls.BINARY_STAB_GEN[0])
+
     @property
     def stabilizers(self):
-        stab_set = set()
-        # add identity
-        stab_set.add(tuple(self.element_wise_xor(
-            self.BINARY_STAB_GEN[0], self.BINARY_STAB_GEN[0])))
-
-        N_generators = len(self.BINARY_STAB_GEN)
-        generator_idx = range(N_generators)
-        for i in generator_idx:
-            combinations = itertools.combinations(generator_idx, i + 1)
-            for combination in combinations:
-                stabilizers = numpy.array(list(self.BINARY_STAB_GEN))
-                stab_combination = stabilizers[list(combination)]
-                stab_set.add(tuple(self.n_xor(*stab_combination)))
-        return tuple(stab_set)
+        return tuple(unpack_bits(stab, self.n_bits())
+                     for stab in self.packed_codewords().stabilizers)
 
     @property
     def logical_zero_codewords(self):
@@ -70,20 +109,37 @@ class BinaryStabilizerGenerator(object):
 
     @property
     def logical_one_codewords(self):
-        codewords = list(self.logical_zero_codewords)
-        logical = BinaryArray.from_qubit_set(self.VALID_LOGICALS[0],
-                                             length=len(codewords[0]))
-        for i, codeword in enumerate(codewords):
-            codewords[i] = tuple(self.element_wise_xor(codeword, logical))
-        return tuple(codewords)
+        return tuple(unpack_bits(codeword, self.n_bits())
+                     for codeword in self.packed_codewords().logical_one)
 
-    def min_distance_to_logical_codewords(self, syndrome, logical_codewords):
+    def packed_logical_codewords(self, logical_codewords):
+        """Packed codewords of a magic string or an iterable of codewords"""
         if logical_codewords in self.LOGICAL_ZERO_CODEWORDS_MAGIC_STRINGS:
-            logical_codewords = self.logical_zero_codewords
+            return self.packed_codewords().logical_zero
         elif logical_codewords in self.LOGICAL_ONE_CODEWORDS_MAGIC_STRINGS:
-            logical_codewords = self.logical_one_codewords
-        return min([distance(syndrome, codeword)
-                    for codeword in logical_codewords])
+            return self.packed_codewords().logical_one
+        return tuple(pack_bits(codeword) for codeword in logical_codewords)
+
+    def min_distance_to_logical_codewords(self, syndrome, logical_codewords):
+        syndrome = pack_bits(syndrome)
+        return min([popcount(syndrome ^ codeword) for codeword
+                    in self.packed_logical_codewords(logical_codewords)])
+
+    def min_distances_to_logical_codewords(self, bits, logical_codewords):
+        """Batch min_distance_to_logical_codewords
+
+        Args:
+            bits, (N, n) bit array of N syndromes
+            logical_codewords, see min_distance_to_logical_codewords
+        Returns:
+            (N, ) array of the minimal distances
+        """
+        codewords = numpy.array(
+                self.packed_logical_codewords(logical_codewords),
+                dtype=numpy.uint64)
+        differences = (gf2_kernel.pack_bit_rows(bits)[:, None]
+                       ^ codewords[None, :])
+        return gf2_kernel.popcount_array(differences).min(axis=1)
 
     @staticmethod
     def element_wise_xor(array_1, array_2):
@@ -139,18 +195,50 @@ class BaseSteaneData(SteaneBinaryStabilzerGenerator):
     z_stabilizers = tuple(Plaquette.Stabilizer.from_plaquette(plaq, "Z")
                           for plaq in plaquettes)
 
+    # the Steane code as a generic CSS code (self dual, plaquette order)
+    css_code = CSSCode.CSSCode(
+            len(DATA_QUBITS),
+            x_supports=[plaq.qubits for plaq in plaquettes],
+            z_supports=[plaq.qubits for plaq in plaquettes],
+            logical_x=SteaneBinaryStabilzerGenerator.VALID_LOGICALS[0],
+            logical_z=SteaneBinaryStabilzerGenerator.VALID_LOGICALS[0],
+            name="steane", distance=3)
+
+    @classmethod
+    def parity_check_matrix(cls):
+        """(3, 7) bit matrix of the plaquettes (top, left, right)"""
+        return cls.css_code.hz
 
-class BaseSteaneCirc(pecos.circuits.QuantumCircuit, BaseSteaneData):
+    @classmethod
+    def gf2_kernel(cls, corrections=None):
+        """gf2_kernel.BitMatrixKernel of the plaquettes and logical
+
+        The same kernel decodes X and Z readouts (the code is self dual).
+        corrections defaults to the minimum weight (single qubit) table,
+        this default kernel is the Z readout kernel of css_code.
+        """
+        if corrections is None:
+            return cls.css_code.kernel("Z")
+        logical = BinaryArray.from_qubit_set(cls.VALID_LOGICALS[0],
+                                             len(cls.DATA_QUBITS))
+        return gf2_kernel.BitMatrixKernel(cls.parity_check_matrix(),
+                                          [logical], corrections)
+
+
+class BaseSteaneCirc(Circuits.BaseCSSCirc, BaseSteaneData):
     """Steane circuit baseclass defining some commonly used constants
 
     This baseclass may be inherited (instead of pecos base QuantumCircuits)
-    to access the constants necessary for working with the steane code
+    to access the constants necessary for working with the steane code.
+    It is a css.Circuits circuit of css_code: put it before a css circuit
+    class in the bases to get that circuit of the Steane code, e.g.
+    Measurement.StabMeasCircuit.
     """
 
-    def __init__(self, runner=circuit_runner.ImprovedRunner(random_seed=True),
-                 *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._runner = runner
+    code = BaseSteaneData.css_code
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(self.code, *args, **kwargs)
 
     @property
     def set_of_qubits(self):
@@ -159,20 +247,6 @@ class BaseSteaneCirc(pecos.circuits.QuantumCircuit, BaseSteaneData):
                          set(self.MEAS_QUBITS),
                          set(self.FLAG_QUBITS))
 
-    @property
-    def num_qubits(self):
-        """Number of qubits in the circuit"""
-        return len(self.set_of_qubits)
-
-    def simulator(self):
-        """Simulator corresponding for this circuit and deriving circuits"""
-        return pecos.simulators.SparseSim(self.num_qubits)
-
-    def run(self, state=None, *args, **kwargs):
-        if state is None:
-            state = self.simulator()
-        return self._runner.run(state, self, *args, **kwargs)
-
 
 class InitPhysicalZero(BaseSteaneCirc):
 
@@ -31,6 +31,17 @@ class Plaquette(object):
     def qubits(self):
         return (self.q1, self.q2, self.q3, self.q4)
 
+    def _key(self):
+        return (self.qubits, )
+
+    def __eq__(self, other):
+        if not isinstance(other, Plaquette):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
 
 class Stabilizer(Plaquette):
     """Plaquette defining a specific stabilizer
@@ -49,6 +60,9 @@ class Stabilizer(Plaquette):
                             " initialization.")
         return cls(pauli_type, *plaquette.qubits)
 
+    def _key(self):
+        return (*super()._key(), self.pauli_type)
+
     def __repr__(self):
         return (f"Stabilizer(pauli_type={self.pauli_type},"
                 f" qubits={self.qubits})")
@@ -8,6 +8,8 @@ Syndrome.py
 
 import collections
 
+import numpy
+
 from pecos_toolkit.qec_codes.steane.circuits.Steane import BaseSteaneData
 
 Syndrome = collections.namedtuple("Syndrome", "syndrome_type top left right")
@@ -89,6 +91,45 @@ class SteaneSyndromeDecoder(object):
         lot_key = self.bits_to_lot_key(top, left, right)
         return self.LOT[lot_key]
 
+    def lot_array(self):
+        """LOT as a (8, 7) uint8 array of correction bits
+
+        Row 4*top + 2*left + right holds the correction of that syndrome.
+        """
+        corrections = numpy.zeros((len(self.LOT), 7), dtype=numpy.uint8)
+        for lot_key, correction in self.LOT.items():
+            if correction is None:
+                continue
+            if isinstance(correction, int):
+                correction = (correction, )
+            corrections[int(lot_key, 2), list(correction)] = 1
+        return corrections
+
+    def kernel(self):
+        """gf2_kernel.BitMatrixKernel correcting with this LOT"""
+        if getattr(self, "_kernel", None) is None:
+            self._kernel = BaseSteaneData.gf2_kernel(
+                    corrections=self.lot_array())
+        return self._kernel
+
+    @staticmethod
+    def classical_stabilizer_syndrome_array(bits):
+        """(n, 3) top, left, right parities of (n, 7) classical bits"""
+        return BaseSteaneData.gf2_kernel().syndromes(bits)
+
+    def classical_correction_array(self, bits, classical_syndromes):
+        """Vectorized classical_correction of (n, 7) bits"""
+        return self.kernel().correct(bits, classical_syndromes)
+
+    @staticmethod
+    def classical_logical_parity_array(bits):
+        """Vectorized classical_logical_parity of (n, 7) bits"""
+        return BaseSteaneData.gf2_kernel().logical_parities(bits)[:, 0]
+
+    def corrected_classical_logical_parity_array(self, bits):
+        """Vectorized corrected_classical_logical_parity of (n, 7) bits"""
+        return self.kernel().corrected_logical_parities(bits)[:, 0]
+
 
 class FlaggedSyndromeDecoder(SteaneSyndromeDecoder):
 
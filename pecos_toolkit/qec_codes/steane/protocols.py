@@ -12,7 +12,9 @@ import collections
 import time
 
 # from toolkits.error_generator_toolkit import ErrorGenerator
+from pecos_toolkit import circuit_registry
 from pecos_toolkit.circuit_runner import ImprovedRunner
+from pecos_toolkit.error_generator_toolkit import ft_verification
 from pecos_toolkit.qec_codes.steane.circuits import Logical
 from pecos_toolkit.qec_codes.steane.circuits import Measurement
 from pecos_toolkit.qec_codes.steane.circuits import Steane
@@ -32,12 +34,12 @@ class SteaneProtocol(object):
 
     @staticmethod
     def init_physical_zero(*args, **kwargs):
-        circ = Steane.InitPhysicalZero()
+        circ = circuit_registry.get(Steane.InitPhysicalZero)
         return RUNNER.run(circ.simulator(), circ, *args, **kwargs)
 
     @staticmethod
     def init_logical_zero(*args, **kwargs):
-        circ = Logical.LogicalZeroInitialization()
+        circ = circuit_registry.get(Logical.LogicalZeroInitialization)
         return RUNNER.run(circ.simulator(), circ, *args, **kwargs)
 
     @staticmethod
@@ -47,25 +49,38 @@ class SteaneProtocol(object):
 
     @staticmethod
     def idle_data_qubits(state, *args, **kwargs):
-        circ = Steane.IdleDataBlock()
+        circ = circuit_registry.get(Steane.IdleDataBlock)
         return RUNNER.run(state, circ, *args, **kwargs)
 
     @staticmethod
-    def measure_stabilizers(state, stabilizers, *args, **kwargs):
+    def measure_stabilizers(state, stabilizers, *args, fused=False,
+                            **kwargs):
         """Measure a set of stabilizers on a given state
 
         Args:
             state: pecos simulator state
             stabilizers: iterable of stabilizers
+            fused: measure all stabilizers in a single runner call (an
+                unflagged FusedStabMeasCircuit, one entry in the faults),
+                with other idle locations, see
+                F1FTECProtocol.f1ftec_rnn_data_generation
             *args, **kwargs passed to RUNNER.run()
         Returns:
             list of measurements (measurement qubit only)
             list of faults (if error generator was used)
         """
+        if fused:
+            circ = circuit_registry.get(Measurement.FusedStabMeasCircuit,
+                                        tuple(stabilizers), flagged=False)
+            res = RUNNER.run(state, circ, *args, **kwargs)
+            syndrome = Syndrome.Syndrome(
+                    stabilizers[0].pauli_type,
+                    *circ.measurement_row(res.measurements))
+            return SteaneProtocol.SyndromeMeasResults(syndrome, [res.faults])
         syndromes = []
         faults = []
         for stab in stabilizers:
-            circ = Measurement.StabMeasCircuit(stab)
+            circ = circuit_registry.get(Measurement.StabMeasCircuit, stab)
             res = RUNNER.run(state, circ, *args, **kwargs)
             meas = res.measurements.first
             syndromes.append(meas.syndrome[circ.ANCILLA_QUBIT])
@@ -92,9 +107,10 @@ class SteaneProtocol(object):
         decoder = BasicLOTDecoder.SteaneSyndromeDecoder()
         corr_qubit, corr_pauli_type = decoder.lot_decoder(syndrome)
         if corr_qubit is not None:
-            circ = Steane.SingleQubitPauli(corr_pauli_type, corr_qubit)
+            circ = circuit_registry.get(Steane.SingleQubitPauli,
+                                        corr_pauli_type, corr_qubit)
         else:
-            circ = Steane.BaseSteaneCirc()
+            circ = circuit_registry.get(Steane.BaseSteaneCirc)
         res = RUNNER.run(state, circ, *args, **kwargs)
         return res
 
@@ -124,7 +140,8 @@ class SteaneProtocol(object):
     @staticmethod
     def measure_data_state(state, measure_basis="Z", *args, **kwargs):
         "Measure all data bits at once"
-        circ = Measurement.DataStateMeasurement(measure_basis=measure_basis)
+        circ = circuit_registry.get(Measurement.DataStateMeasurement,
+                                    measure_basis=measure_basis)
         res = RUNNER.run(state, circ, *args, **kwargs)
         return res
 
@@ -136,7 +153,8 @@ class SteaneProtocol(object):
             logical parity, classical steane parity in order top, left, right
             stabilizer
         """
-        circ = Measurement.DataStateMeasurement(measure_basis=measure_basis)
+        circ = circuit_registry.get(Measurement.DataStateMeasurement,
+                                    measure_basis=measure_basis)
         decoder = BasicLOTDecoder.SteaneSyndromeDecoder()
         res = circ.run(state, *args, **kwargs)
         bits = res.measurements.last.syndrome
@@ -149,6 +167,16 @@ class SteaneProtocol(object):
         """wrapper for decode_state_base where only logical bit is returned"""
         return SteaneProtocol.decode_state_base(*args, **kwargs)[0]
 
+    @staticmethod
+    def decode_readouts(bits):
+        """Batched decode_state of (shots, 7) data readouts
+
+        Returns:
+            (shots, ) array of corrected logical bits
+        """
+        kernel = Steane.BaseSteaneData.gf2_kernel()
+        return kernel.corrected_logical_parities(bits)[:, 0]
+
 
 class F1FTECProtocol(object):
     """Namespace for F1FTEC Protocol"""
@@ -169,7 +197,7 @@ class F1FTECProtocol(object):
 
     @staticmethod
     def flag_measure_stabilizer(state, stab, *args, **kwargs):
-        circ = Measurement.F1FTECStabMeasCircuit(stab)
+        circ = circuit_registry.get(Measurement.F1FTECStabMeasCircuit, stab)
         return circ.run(state, *args, **kwargs)
 
     @staticmethod
@@ -209,27 +237,56 @@ class F1FTECProtocol(object):
                     state, syndrome[pauli_type][0], *args, **kwargs)
 
     @staticmethod
-    def f1ftec_rnn_data_generation(state, *args, **kwargs):
+    def f1ftec_rnn_data_generation(state, *args, fused=False, **kwargs):
+        """Flag measure all stabilizers once (without correction)
+
+        Args:
+            state, state to measure
+            fused, whether to measure the stabilizers of a basis in a
+                single runner call (see fused_flag_measure_stabilizers).
+                Opt-in: in the fused circuit the data qubits outside the
+                measured stabilizer are idle, which changes the statistics
+                under idle noise.
+        """
         rnn_syndrome_data = RNNDataTypes.RNNSyndromeData()
         ancilla_qubit = Measurement.F1FTECStabMeasCircuitData.ANCILLA_QUBIT
         flag_qubit = Measurement.F1FTECStabMeasCircuitData.FLAG_QUBIT
         x_stabs = Steane.BaseSteaneData.x_stabilizers
         z_stabs = Steane.BaseSteaneData.z_stabilizers
         for pauli_type, stabs in {"X": x_stabs, "Z": z_stabs}.items():
-            ancilla_bits = []
-            flag_bits = []
-            for stab in stabs:
-                res = F1FTECProtocol.flag_measure_stabilizer(
-                    state, stab, *args, **kwargs)
-                measurement_bits = res.measurements.last.syndrome
-                ancilla_bits.append(measurement_bits[ancilla_qubit])
-                flag_bits.append(measurement_bits[flag_qubit])
+            if fused:
+                row = F1FTECProtocol.fused_flag_measure_stabilizers(
+                        state, stabs, *args, **kwargs)
+                ancilla_bits = row[:len(stabs)].tolist()
+                flag_bits = row[len(stabs):].tolist()
+            else:
+                ancilla_bits = []
+                flag_bits = []
+                for stab in stabs:
+                    res = F1FTECProtocol.flag_measure_stabilizer(
+                        state, stab, *args, **kwargs)
+                    measurement_bits = res.measurements.last.syndrome
+                    ancilla_bits.append(measurement_bits[ancilla_qubit])
+                    flag_bits.append(measurement_bits[flag_qubit])
             rnn_syndrome_data.append(
                     basis=pauli_type,
                     syndrome=ancilla_bits,
                     flags=flag_bits)
         return rnn_syndrome_data
 
+    @staticmethod
+    def fused_flag_measure_stabilizers(state, stabs, *args, **kwargs):
+        """Flag measure stabilizers in a single runner call
+
+        Returns:
+            (2 * len(stabs), ) measurement row of the syndrome bits
+            followed by the flag bits, see FusedStabMeasCircuit
+        """
+        circ = circuit_registry.get(Measurement.FusedStabMeasCircuit,
+                                    tuple(stabs))
+        res = circ.run(state, *args, **kwargs)
+        return circ.measurement_row(res.measurements)
+
     @staticmethod
     def correct_from_flagged_circuit(state, stab, *args, **kwargs):
         """Correct a flagged stabilizer circuit.
@@ -272,15 +329,59 @@ class F1FTECProtocol(object):
         flag = res.measurements.last.syndrome[flag_qubit]
         return bool(flag)
 
+    @staticmethod
+    def stab_meas_signature_outcomes(signatures, stab):
+        """Outcomes of F1FTECStabMeasCircuit(stab) fault signatures
+
+        Vectorized counterpart of a flag measurement followed by
+        correct_from_flagged_circuit (with ideal syndrome measurements)
+        and decode_state, for use with signature_ft_check. A flag decodes
+        the errors of the stabilizer type with the FlaggedSyndromeDecoder.
+
+        Args:
+            signatures, FaultSignatures with (n, 2) (ancilla, flag)
+                measurement flips and (n, 7) data x and z
+            stab, measured stabilizer
+        Returns:
+            ft_verification.ProtocolOutcome of (n, ) failed, flagged arrays
+        """
+        normal_decoder = BasicLOTDecoder.SteaneSyndromeDecoder()
+        modified_decoder = BasicLOTDecoder.FlaggedSyndromeDecoder(stab)
+        flagged = numpy.asarray(signatures.measurement_flips[:, 1],
+                                dtype=bool)
+        failed = numpy.zeros(len(flagged), dtype=bool)
+        for pauli_type, bits in (("X", signatures.x), ("Z", signatures.z)):
+            parity = normal_decoder.corrected_classical_logical_parity_array(
+                    bits)
+            if pauli_type == stab.pauli_type:
+                flagged_parity = modified_decoder \
+                    .corrected_classical_logical_parity_array(bits)
+                parity = numpy.where(flagged, flagged_parity, parity)
+            failed |= parity == 1
+        return ft_verification.ProtocolOutcome(failed, flagged)
+
 
 # SIMULATION FUNCTIONS
 EXCLUDED_ANCILLA_QUDITS = set(Steane.BaseSteaneCirc.MEAS_QUBITS).union(
                           set(Steane.BaseSteaneCirc.FLAG_QUBITS))
 
 
+def exclude_ancilla_noise(kwargs):
+    """Return a copy of the runner kwargs without noise on the ancillas
+
+    The ancilla qudits are passed as the excluded_qudits of every run (see
+    circuit_runner.ImprovedRunner), such that the error generator of the
+    caller (and its fault recorder or replay record) is used unchanged.
+    """
+    kwargs = dict(kwargs)
+    kwargs["excluded_qudits"] = EXCLUDED_ANCILLA_QUDITS.union(
+            kwargs.get("excluded_qudits") or ())
+    return kwargs
+
+
 def steane_round(data_qudit_noise_only=False, *args, **kwargs):
     if data_qudit_noise_only:
-        kwargs["error_gen"].excluded_qudits = EXCLUDED_ANCILLA_QUDITS
+        kwargs = exclude_ancilla_noise(kwargs)
     zero_state = SteaneProtocol.init_logical_zero(*args, **kwargs).state
     SteaneProtocol.idle_data_qubits(zero_state, *args, **kwargs)
     SteaneProtocol.full_steane_round(zero_state, *args, **kwargs)
@@ -290,7 +391,7 @@ def steane_round(data_qudit_noise_only=False, *args, **kwargs):
 
 def verified_init_only(data_qudit_noise_only=False, *args, **kwargs):
     if data_qudit_noise_only:
-        kwargs["error_gen"].excluded_qudits = EXCLUDED_ANCILLA_QUDITS
+        kwargs = exclude_ancilla_noise(kwargs)
     zero_state = \
         F1FTECProtocol.verified_init_logical_zero(*args, **kwargs).state
     # perfect decoding makes sure the final result is the true state
@@ -299,7 +400,7 @@ def verified_init_only(data_qudit_noise_only=False, *args, **kwargs):
 
 def f1ftec_stab_meas_only(data_qudit_noise_only=False, *args, **kwargs):
     if data_qudit_noise_only:
-        kwargs["error_gen"].excluded_qudits = EXCLUDED_ANCILLA_QUDITS
+        kwargs = exclude_ancilla_noise(kwargs)
     # init using steane round
     physical_zero_state = (SteaneProtocol.init_physical_zero(*args, **kwargs)
                            .state)
@@ -311,7 +412,7 @@ def f1ftec_stab_meas_only(data_qudit_noise_only=False, *args, **kwargs):
 
 def verified_init_f1ftec_round(data_qudit_noise_only=False, *args, **kwargs):
     if data_qudit_noise_only:
-        kwargs["error_gen"].excluded_qudits = EXCLUDED_ANCILLA_QUDITS
+        kwargs = exclude_ancilla_noise(kwargs)
     zero_state = (F1FTECProtocol.verified_init_logical_zero(*args, **kwargs)
                   .state)
     F1FTECProtocol.f1ftec_round(zero_state, *args, **kwargs)
@@ -330,8 +431,11 @@ simulation_function_map = {
 def rnn_data_gen(init_parity=0, syndrome_meas_steps=1, basis="Z",
                  ideal_encoding=False, ideal_decoding=False,
                  data_qudit_noise_only=False,
-                 *args, **kwargs):
+                 *args, fused_extraction=False, **kwargs):
     """
+    fused_extraction is passed to F1FTECProtocol.f1ftec_rnn_data_generation
+    as fused.
+
     Output should be:
         vector of dim 12 for each time step
             -> for the X and Z stabilizers
@@ -341,7 +445,7 @@ def rnn_data_gen(init_parity=0, syndrome_meas_steps=1, basis="Z",
         one bit with the true final parity
     """
     if data_qudit_noise_only:
-        kwargs["error_gen"].excluded_qudits = EXCLUDED_ANCILLA_QUDITS
+        kwargs = exclude_ancilla_noise(kwargs)
 
     ALLOWED_INIT_PARITY = (0, 1)
     if init_parity not in ALLOWED_INIT_PARITY:
@@ -355,16 +459,19 @@ def rnn_data_gen(init_parity=0, syndrome_meas_steps=1, basis="Z",
     if ideal_encoding:
         state = F1FTECProtocol.verified_init_logical_zero().state
         if init_parity == 1:
-            Logical.LogicalPauli("X").run(state)
+            circuit_registry.get(Logical.LogicalPauli, "X").run(state)
         if basis == "X":
-            Logical.TransverseSingleQubitGate("H").run(state)
+            circuit_registry.get(Logical.TransverseSingleQubitGate,
+                                 "H").run(state)
     else:
         state = F1FTECProtocol.verified_init_logical_zero(
                 *args, **kwargs).state
         if init_parity == 1:
-            Logical.LogicalPauli("X").run(state, *args, **kwargs)
+            circuit_registry.get(Logical.LogicalPauli, "X").run(
+                    state, *args, **kwargs)
         if basis == "X":
-            Logical.TransverseSingleQubitGate("H").run(state, *args, **kwargs)
+            circuit_registry.get(Logical.TransverseSingleQubitGate,
+                                 "H").run(state, *args, **kwargs)
 
     # which stabilizers to read given the input basis
     # (each basis requires its own decoder)
@@ -373,12 +480,12 @@ def rnn_data_gen(init_parity=0, syndrome_meas_steps=1, basis="Z",
     data = RNNDataTypes.RNNSyndromeData()
     for step_idx in range(syndrome_meas_steps):
         res = F1FTECProtocol.f1ftec_rnn_data_generation(
-            state, *args, **kwargs)
+            state, *args, fused=fused_extraction, **kwargs)
         data.extend(res)
     # one more check for F1FTEC ensurance
     if data.last_flagged() or data.last_incremented():
         res = F1FTECProtocol.f1ftec_rnn_data_generation(
-            state, *args, **kwargs)
+            state, *args, fused=fused_extraction, **kwargs)
         data.extend(res)
     if ideal_decoding:
         logical_parity, classical_stab_syndrome = \
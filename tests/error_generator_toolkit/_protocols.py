@@ -0,0 +1,25 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+_protocols.py
+@author Luc Kusters
+@date 21-10-2022
+
+Protocols shared by the fault tolerance verification tests. They are
+module level functions, such that they can be sent to worker processes.
+"""
+
+import pecos
+
+from pecos_toolkit import circuit_runner
+from pecos_toolkit.error_generator_toolkit import ft_verification
+
+RUNNER = circuit_runner.ImprovedRunner()
+
+
+def repetition_protocol(error_circ, error_locations):
+    """Majority vote of a 3 qubit repetition code, flags any disagreement"""
+    res = RUNNER.run(pecos.simulators.SparseSim(3), error_circ)
+    syndrome = res.measurements.last.syndrome
+    return ft_verification.ProtocolOutcome(failed=sum(syndrome) >= 2,
+                                           flagged=0 < sum(syndrome) < 3)
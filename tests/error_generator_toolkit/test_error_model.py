@@ -0,0 +1,87 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_error_model.py
+@author Luc Kusters
+@date 03-10-2022
+"""
+
+import threading
+import unittest
+
+import pecos
+
+from pecos_toolkit import circuit_runner
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+from pecos_toolkit.error_generator_toolkit import error_model
+
+
+class TestErrorModel(unittest.TestCase):
+
+    def setUp(self):
+        self.epgc_list = [
+                ErrorGenerator.FlipZInit,
+                ErrorGenerator.IdleErrorCollection(
+                    symbol="idle", param="idle",
+                    error_gates=ErrorGenerator._PAULI_ERRORS,
+                    before=False, after=True),
+                ]
+        self.model = error_model.ErrorModel(
+                self.epgc_list, excluded_qudits={7, 8},
+                error_params={"init": 1, "idle": 0})
+
+    def tearDown(self):
+        pass
+
+    def test_frozen_and_hashable(self):
+        self.assertIsInstance(hash(self.model), int)
+        self.assertIsInstance(self.model.epgc_list, tuple)
+        self.assertIsInstance(self.model.excluded_qudits, frozenset)
+        self.assertIsInstance(self.model.epgc_list[0].ep_gates, frozenset)
+        same = error_model.ErrorModel(self.epgc_list, {8, 7},
+                                      {"idle": 0, "init": 1})
+        self.assertEqual(self.model, same)
+        self.assertEqual(hash(self.model), hash(same))
+
+    def test_replace_leaves_original(self):
+        other = self.model.replace(excluded_qudits=None)
+        self.assertEqual(self.model.excluded_qudits, frozenset({7, 8}))
+        self.assertIsNone(other.excluded_qudits)
+        raised = self.model.with_params(init=0)
+        self.assertEqual(self.model.params, {"init": 1, "idle": 0})
+        self.assertEqual(raised.params, {"init": 0, "idle": 0})
+
+    def test_generator_per_thread(self):
+        gen = self.model.generator()
+        self.assertIs(gen, self.model.generator())
+        self.assertIs(gen, self.model.with_params(init=0).generator())
+        self.assertEqual(gen.excluded_qudits, frozenset({7, 8}))
+        other_gens = []
+        thread = threading.Thread(
+                target=lambda: other_gens.append(self.model.generator()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(gen, other_gens[0])
+
+    def test_round_trip_error_gen(self):
+        gen = ErrorGenerator.GeneralErrorGen(self.epgc_list,
+                                             excluded_qudits={7, 8})
+        model = error_model.as_error_model(gen)
+        self.assertEqual(model.replace(error_params=self.model.params),
+                         self.model)
+        self.assertEqual(gen.error_model, model)
+
+    def test_runner_accepts_model(self):
+        circ = pecos.circuits.QuantumCircuit()
+        circ.append("init |0>", {0, 7})
+        circ.append("measure Z", {0, 7})
+        runner = circuit_runner.ImprovedRunner()
+        res = runner.run(pecos.simulators.SparseSim(8), circ,
+                         error_gen=self.model)
+        # init errors always occur, but never on the excluded qudit 7
+        self.assertEqual(res.measurements.last[0], 1)
+        self.assertEqual(res.measurements.last[7], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_error_placer.py
+@author Luc Kusters
+@date 18-10-2022
+"""
+
+import types
+import unittest
+
+import numpy
+import pecos
+
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+from pecos_toolkit.error_generator_toolkit import error_placer_toolkit
+from pecos_toolkit.error_generator_toolkit import pauli_propagation
+
+
+class TestErrorPlacer(unittest.TestCase):
+
+    def setUp(self):
+        self.circ = pecos.circuits.QuantumCircuit()
+        self.circ.append("init |0>", {0, 1})
+        self.circ.append("CNOT", {(0, 1)})
+        self.circ.append("measure Z", {0, 1})
+        self.epgc_list = [
+                ErrorGenerator.FlipZInit,
+                ErrorGenerator.ErrorProneGateCollection(
+                    symbol="two_qubit_gate_errors",
+                    ep_gates={"CNOT"}, param="two_qubit",
+                    error_gates=ErrorGenerator._PAULI_ERROR_TWO,
+                    before=False, after=True),
+                ]
+        self.placer = error_placer_toolkit.ErrorPlacer(self.circ,
+                                                       self.epgc_list)
+
+    def test_lazy(self):
+        n_errors = len(self.placer.possible_errors)
+        self.assertEqual(n_errors, 17)
+        error_circs = self.placer.generate_error_circuits(order=2, lazy=True)
+        self.assertIsInstance(error_circs, types.GeneratorType)
+        self.assertEqual(sum(1 for _ in error_circs),
+                         self.placer.n_error_circuits(order=2))
+        self.assertEqual(len(self.placer.generate_error_circuits(order=1)),
+                         n_errors)
+
+    def test_chunks(self):
+        chunks = list(self.placer.generate_error_circuits(order=1,
+                                                          chunk_size=5))
+        self.assertEqual([len(chunk) for chunk in chunks], [5, 5, 5, 2])
+
+    def test_all_errors_placed(self):
+        for error_circ, errors in self.placer.generate_error_circuits(
+                order=2, lazy=True):
+            self.assertEqual(len(error_circ), len(self.circ) + 2)
+            for shift, error in enumerate(sorted(
+                    errors, key=lambda err: err.tick_idx + err.after)):
+                tick_idx = error.tick_idx + error.after + shift
+                symbols = {symbol for symbol, _, _
+                           in error_circ.items(tick=tick_idx)}
+                self.assertTrue(set(error.error_gate) <= symbols
+                                if isinstance(error.error_gate, tuple)
+                                else error.error_gate in symbols)
+        self.assertEqual(len(self.circ), 3)
+
+    def test_fault_classes(self):
+        for order in (1, 2):
+            classes = self.placer.fault_classes(order=order)
+            self.assertEqual(sum(c.multiplicity for c in classes),
+                             self.placer.n_error_circuits(order))
+            self.assertLess(len(classes), self.placer.n_error_circuits(order))
+        classes = self.placer.fault_classes(order=1)
+        # Z errors right before measure Z are trivial
+        trivial = [c for c in classes if all(
+                pauli in "IZ" for err in c.representative
+                for pauli in err.error_gate)]
+        self.assertEqual(len(trivial), 1)
+        self.assertEqual(trivial[0].multiplicity, 3)
+        error_circs = self.placer.generate_error_circuits(order=1,
+                                                          deduplicate=True)
+        self.assertEqual(len(error_circs), len(classes))
+        # only the X components on both qubits are distinguishable
+        self.assertEqual(len(error_circs), 4)
+
+
+class TestGateCoordinateList(unittest.TestCase):
+
+    def test_index(self):
+        circ = pecos.circuits.QuantumCircuit()
+        circ.append("init |0>", {0, 1, 2})
+        circ.append("CNOT", {(0, 1)})
+        circ.append("X", {0})
+        circ.append("CNOT", {(1, 2)})
+        circ.append("measure Z", {0, 1, 2})
+        coords = error_placer_toolkit.GateCoordinateList(circ)
+        self.assertEqual(coords.array.shape, (len(coords), ))
+        self.assertEqual(coords.array["qudits"].shape, (len(coords), 2))
+        for coord, row in zip(coords, coords.array):
+            self.assertEqual(coords.symbols[row["symbol_id"]],
+                             coord.gate_symbol)
+            self.assertEqual(row["tick_idx"], coord.tick_idx)
+            self.assertEqual(row["idle"],
+                             coord.gate_symbol == coords.IDLE_SYMBOL)
+
+        def brute_force(symbol, ticks, qudit):
+            return [i for i, coord in enumerate(coords)
+                    if coord.gate_symbol == symbol
+                    and coord.tick_idx in ticks
+                    and qudit in numpy.atleast_1d(coord.qudits)]
+
+        for symbol in ("CNOT", "X", "idle", "measure Z", "H"):
+            for qudit in range(3):
+                for ticks in (range(0, 5), range(2, 5), range(4, 10)):
+                    self.assertEqual(
+                            coords.rows(symbol, ticks, qudit).tolist(),
+                            brute_force(symbol, ticks, qudit))
+        self.assertEqual(coords.coordinates(coords.rows(ticks=1)),
+                         [coord for coord in coords if coord.tick_idx == 1])
+        self.assertEqual(len(coords.rows(symbol={"CNOT", "X"})), 3)
+        # the gate of a tick is replaced by one on the same qudit
+        circ.discard({0}, tick=2)
+        circ.update("Z", {0}, tick=2)
+        coords = error_placer_toolkit.GateCoordinateList(circ)
+        self.assertEqual(len(coords.rows(symbol="X")), 0)
+        self.assertEqual(coords.coordinates(coords.rows(symbol="Z")),
+                         [error_placer_toolkit.GateCoordinate("Z", 2, 0)])
+
+
+class TestPauliPropagation(unittest.TestCase):
+
+    def test_propagate(self):
+        circ = pecos.circuits.QuantumCircuit()
+        circ.append("init |0>", {0, 1})
+        circ.append("H", {0})
+        circ.append("CNOT", {(0, 1)})
+        circ.append("measure Z", {0, 1})
+        faults = [
+                error_placer_toolkit.ErrorCoordinate("H", 1, 0, "X", False),
+                error_placer_toolkit.ErrorCoordinate("H", 1, 0, "Z", False),
+                error_placer_toolkit.ErrorCoordinate("H", 1, 0, "X", True),
+                error_placer_toolkit.ErrorCoordinate("CNOT", 2, (0, 1),
+                                                     ("Z", "X"), True),
+                ]
+        propagator = pauli_propagation.PauliPropagator(circ)
+        effects = propagator.propagate(faults)
+        self.assertEqual(propagator.measurement_locations, [(3, 0), (3, 1)])
+        # X before H becomes Z and Z right after init |0> is trivial, an X
+        # after H spreads to both qubits through the CNOT
+        self.assertEqual(effects.measurement_flips.tolist(),
+                         [[False, False], [False, False], [True, True],
+                          [False, True]])
+        # Z components are removed by the measurements, X ones remain
+        self.assertFalse(effects.z.any())
+        numpy.testing.assert_array_equal(effects.x,
+                                         effects.measurement_flips)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_fault_recording.py
+@author Luc Kusters
+@date 10-10-2022
+"""
+
+import os
+import tempfile
+import unittest
+
+import pecos
+
+from pecos_toolkit import circuit_runner
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+from pecos_toolkit.error_generator_toolkit import fault_recording
+
+
+class TestFaultRecording(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.runner = circuit_runner.ImprovedRunner()
+        self.epgc_list = [
+                ErrorGenerator.IdleErrorCollection(
+                    symbol="idle", param="idle",
+                    error_gates=ErrorGenerator._PAULI_ERRORS,
+                    before=False, after=True),
+                ]
+        self.circ = pecos.circuits.QuantumCircuit()
+        self.circ.append("init |0>", set(range(4)))
+        self.circ.append("I", {0})
+        self.circ.append("measure Z", set(range(4)))
+        self.n_shots = 5
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def run_shots(self, gen, error_params):
+        syndromes = []
+        for _ in range(self.n_shots):
+            shot = []
+            for _ in range(2):
+                res = self.runner.run(pecos.simulators.SparseSim(4),
+                                      self.circ, error_gen=gen,
+                                      error_params=error_params)
+                shot.append(res.measurements.last.syndrome)
+            syndromes.append(shot)
+            gen.next_shot()
+        return syndromes
+
+    def test_record_and_replay(self):
+        gen = ErrorGenerator.GeneralErrorGen(self.epgc_list)
+        recorder = gen.record_faults()
+        recorded = self.run_shots(gen, {"idle": 0.5})
+        self.assertGreater(len(recorder), 0)
+
+        path = os.path.join(self.tmp_dir.name, "faults.npz")
+        recorder.save(path)
+        record = fault_recording.FaultRecord.load(path)
+        self.assertEqual(len(record), len(recorder))
+        self.assertTrue(set(record.columns["tick"]) <= {1})
+        self.assertTrue(set(record.columns["qudit"]) <= {1, 2, 3})
+
+        replay_gen = ErrorGenerator.GeneralErrorGen(self.epgc_list)
+        replay_gen.replay_faults(record)
+        replayed = self.run_shots(replay_gen, {"idle": 0.})
+        self.assertEqual(recorded, replayed)
+
+    def test_select_shots(self):
+        recorder = fault_recording.FaultRecorder()
+        recorder.record(0, 0, 1, 2, "X", True)
+        recorder.record(3, 1, 0, 1, "Z", False)
+        record = recorder.to_record().select_shots([3])
+        self.assertEqual(len(record), 1)
+        self.assertEqual(record.faults(3, 1, 0),
+                         [fault_recording.Fault(0, 1, "Z", False)])
+        self.assertEqual(record.faults(0, 0, 1), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_ft_verification.py
+@author Luc Kusters
+@date 21-10-2022
+"""
+
+import itertools
+import os
+import tempfile
+import unittest
+
+import pecos
+
+from error_generator_toolkit import _protocols
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+from pecos_toolkit.error_generator_toolkit import combination_ranks
+from pecos_toolkit.error_generator_toolkit import ft_verification
+
+
+class TestCombinationRanks(unittest.TestCase):
+
+    def test_ranks(self):
+        n, k = 7, 3
+        combinations = list(itertools.combinations(range(n), k))
+        for rank, combination in enumerate(combinations):
+            self.assertEqual(combination_ranks.rank(combination, n), rank)
+            self.assertEqual(combination_ranks.unrank(rank, n, k),
+                             combination)
+        self.assertEqual(list(combination_ranks.iter_combinations(
+            n, k, start=10, stop=20)), combinations[10:20])
+
+    def test_rank_permutation(self):
+        for n in (1, 2, 35, 100):
+            permutation = combination_ranks.RankPermutation(n, seed=3)
+            self.assertEqual(sorted(map(permutation, range(n))),
+                             list(range(n)))
+        permutation = combination_ranks.RankPermutation(100, seed=3)
+        self.assertNotEqual(list(map(permutation, range(100))),
+                            list(range(100)))
+        self.assertNotEqual(
+                list(map(combination_ranks.RankPermutation(100, seed=4),
+                         range(100))),
+                list(map(permutation, range(100))))
+
+
+class TestFaultToleranceVerifier(unittest.TestCase):
+
+    def setUp(self):
+        self.circ = pecos.circuits.QuantumCircuit()
+        self.circ.append("init |0>", {0, 1, 2})
+        self.circ.append("I", {0, 1, 2})
+        self.circ.append("measure Z", {0, 1, 2})
+        self.epgc_list = [ErrorGenerator.FlipZInit]
+
+    def verify(self, **kwargs):
+        kwargs.setdefault("n_workers", 1)
+        kwargs.setdefault("shard_size", 1)
+        return ft_verification.FaultToleranceVerifier(
+                self.circ, self.epgc_list, _protocols.repetition_protocol,
+                **kwargs).run()
+
+    def test_order_1(self):
+        report = self.verify(order=1)
+        self.assertTrue(report.fault_tolerant)
+        self.assertEqual((report.n_passed, report.n_flagged), (3, 3))
+
+    def test_order_2(self):
+        report = self.verify(order=2, max_failures=2)
+        self.assertFalse(report.fault_tolerant)
+        self.assertTrue(report.complete)
+        self.assertEqual(report.n_failed, 3)
+        self.assertEqual(len(report.failures), 2)
+
+        report = self.verify(order=2, stop_on_failure=True)
+        self.assertFalse(report.complete)
+        self.assertEqual((report.n_simulated, report.n_failed), (1, 1))
+
+    def test_parallel(self):
+        report = self.verify(order=2, n_workers=2)
+        self.assertEqual(report, self.verify(order=2))
+        report = self.verify(order=1, n_workers=2, deduplicate=True,
+                             qudits=set())
+        # all single X flips only differ in the flipped measurement
+        self.assertEqual((report.n_simulated, report.n_passed), (3, 3))
+
+    def test_sampling(self):
+        self.epgc_list.append(ErrorGenerator.ErrorProneGateCollection(
+                symbol="idle_flips", ep_gates={"I"}, param="idle",
+                error_gates={"X"}, before=False, after=True))
+        exhaustive = self.verify(order=3)
+        self.assertEqual(exhaustive.n_combinations, 20)
+        sampled = self.verify(order=3, n_samples=12, seed=1)
+        self.assertFalse(sampled.complete)
+        self.assertEqual(sampled.n_passed + sampled.n_failed, 12)
+        failing = {frozenset(combination)
+                   for combination in self.verify(
+                       order=3, max_failures=exhaustive.n_failed).failures}
+        self.assertTrue({frozenset(combination)
+                         for combination in sampled.failures} <= failing)
+        estimate = sampled.failure_estimate(confidence=0.99)
+        self.assertAlmostEqual(estimate.coverage,
+                               12 / exhaustive.n_combinations)
+        self.assertLessEqual(estimate.lower, estimate.fraction)
+        self.assertLessEqual(estimate.fraction, estimate.upper)
+        self.assertEqual(sampled, self.verify(order=3, n_samples=12, seed=1,
+                                              n_workers=2, shard_size=7))
+
+        # sampling all combinations is an exhaustive check
+        everything = self.verify(order=3, n_samples=10**6, seed=2)
+        self.assertTrue(everything.complete)
+        self.assertEqual(everything._replace(failures=[]),
+                         exhaustive._replace(failures=[]))
+        fraction = exhaustive.n_failed / exhaustive.n_combinations
+        self.assertEqual(everything.failure_estimate(),
+                         (fraction, fraction, fraction, 1.))
+
+    def test_checkpoint_resume(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            checkpoint = os.path.join(tmp_dir, "checkpoint.json")
+            verifier = ft_verification.FaultToleranceVerifier(
+                    self.circ, self.epgc_list, _protocols.repetition_protocol,
+                    order=2, n_workers=1, shard_size=1)
+            partial = verifier.run(stop=2, checkpoint=checkpoint)
+            self.assertEqual(partial.n_simulated, 2)
+            self.assertFalse(
+                    verifier.report_from_checkpoints([checkpoint]).complete)
+            resumed = verifier.run(checkpoint=checkpoint)
+            self.assertEqual(resumed, self.verify(order=2))
+            # nothing is left to simulate on a second resume
+            self.assertEqual(verifier.run(checkpoint=checkpoint), resumed)
+
+            # independent rank ranges, e.g. on different machines
+            paths = [os.path.join(tmp_dir, f"range_{i}.json")
+                     for i in range(2)]
+            verifier.run(0, 1, checkpoint=paths[0])
+            verifier.run(1, 3, checkpoint=paths[1])
+            self.assertEqual(verifier.report_from_checkpoints(paths),
+                             resumed)
+
+            other = ft_verification.FaultToleranceVerifier(
+                    self.circ, self.epgc_list, _protocols.repetition_protocol,
+                    order=1)
+            with self.assertRaises(ValueError):
+                other.run(checkpoint=checkpoint)
+
+
+if __name__ == "__main__":
+    unittest.main()
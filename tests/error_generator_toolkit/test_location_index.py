@@ -0,0 +1,61 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_location_index.py
+@author Luc Kusters
+@date 13-10-2022
+"""
+
+import unittest
+
+import pecos
+
+from pecos_toolkit.error_generator_toolkit import location_index
+
+
+class TestLocationIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.circ = pecos.circuits.QuantumCircuit()
+        self.circ.append("init |0>", set(range(4)))
+        self.circ.append("CNOT", {(0, 1), (2, 3)})
+        self.circ.append("H", {0})
+
+    def test_locations(self):
+        index = location_index.CircuitLocationIndex(self.circ)
+        self.assertEqual(len(index), 3)
+        symbol, locations, array = index[1].gates[0]
+        self.assertEqual(symbol, "CNOT")
+        self.assertEqual(set(locations), {(0, 1), (2, 3)})
+        self.assertEqual(array.shape, (2, 2))
+        self.assertEqual(set(index[1].idle.locations), set())
+        self.assertEqual(set(index[2].idle.locations), {1, 2, 3})
+
+    def test_excluded_qudits(self):
+        index = location_index.CircuitLocationIndex(self.circ, {3})
+        self.assertEqual(set(index[0].gates[0].locations), {0, 1, 2})
+        self.assertEqual(set(index[1].gates[0].locations), {(0, 1)})
+        self.assertEqual(set(index[2].idle.locations), {1, 2})
+
+    def test_cache_and_invalidation(self):
+        index = location_index.get_location_index(self.circ, {3})
+        self.assertIs(location_index.get_location_index(self.circ, [3]),
+                      index)
+        self.assertIsNot(location_index.get_location_index(self.circ),
+                         index)
+        self.circ.update("X", {1}, tick=2)
+        updated = location_index.get_location_index(self.circ, {3})
+        self.assertIsNot(updated, index)
+        self.assertEqual(set(updated[2].idle.locations), {2})
+        self.circ.append("measure Z", {0})
+        self.assertEqual(
+                len(location_index.get_location_index(self.circ, {3})), 4)
+        # same active qudits, different gate
+        self.circ.discard({0}, tick=2)
+        self.circ.update("Z", {0}, tick=2)
+        self.assertEqual(location_index.get_location_index(
+            self.circ, {3})[2].gates[-1].symbol, "Z")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_logical_failure_polynomial.py
+@author Luc Kusters
+@date 26-10-2022
+"""
+
+import math
+import unittest
+
+import pecos
+
+from pecos_toolkit import circuit_runner
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+from pecos_toolkit.error_generator_toolkit import ft_verification
+from pecos_toolkit.error_generator_toolkit import logical_failure_polynomial
+
+RUNNER = circuit_runner.ImprovedRunner()
+
+
+def repetition_circuit():
+    circ = pecos.circuits.QuantumCircuit()
+    circ.append("init |0>", {0, 1, 2})
+    circ.append("I", {0, 1, 2})
+    circ.append("measure Z", {0, 1, 2})
+    return circ
+
+
+def majority_vote(**kwargs):
+    """Majority vote of a 3 qubit repetition code"""
+    res = RUNNER.run(pecos.simulators.SparseSim(3), repetition_circuit(),
+                     **kwargs)
+    return ft_verification.ProtocolOutcome(
+            failed=sum(res.measurements.last.syndrome) >= 2, flagged=False)
+
+
+def repeat_until_agreement(**kwargs):
+    """Adaptive: repeat once if the first round does not agree, returns
+    True if it passed"""
+    for _ in range(2):
+        res = RUNNER.run(pecos.simulators.SparseSim(3), repetition_circuit(),
+                         **kwargs)
+        syndrome = res.measurements.last.syndrome
+        if sum(syndrome) in (0, 3):
+            break
+    return sum(syndrome) < 2
+
+
+class TestLogicalFailurePolynomial(unittest.TestCase):
+
+    def setUp(self):
+        self.epgc_list = [
+                ErrorGenerator.FlipZInit,
+                ErrorGenerator.ErrorProneGateCollection(
+                    symbol="idle_errors", ep_gates={"I"}, param="idle",
+                    error_gates={"X", "Z"}, before=False, after=True),
+                ]
+
+    def test_repetition_code(self):
+        enumerator = logical_failure_polynomial.FaultPathEnumerator(
+                majority_vote, self.epgc_list)
+        polynomial = enumerator.logical_failure_polynomial(max_order=3)
+        self.assertEqual(polynomial.n_locations, 6)
+        # 3 init locations with 1 error, 3 idle locations with 2 errors
+        self.assertEqual(enumerator.n_runs, 1 + (3 + 6) + (3 + 18 + 12)
+                         + (1 + 18 + 36 + 8))
+        self.assertEqual(polynomial.failure_counts[:2], [0, 0])
+        # two X flips on different qubits: init-init, init-idle (X),
+        # idle (X) - idle (X)
+        self.assertEqual(polynomial.failure_counts[2], 3 + 6 / 2 + 3 / 4)
+        p = 0.01
+        bounds = polynomial(p)
+        self.assertLessEqual(bounds.lower, bounds.upper)
+        # all configurations together have probability 1
+        total = (polynomial.evaluate(polynomial.failing, p)
+                 + polynomial.evaluate(polynomial.passing, p)
+                 + polynomial.tail_probability(p))
+        self.assertAlmostEqual(total, 1.)
+        # the tail of more than 3 out of 6 faults
+        self.assertAlmostEqual(polynomial.tail_probability(p), sum(
+            math.comb(6, k) * p**k * (1 - p)**(6 - k) for k in range(4, 7)))
+
+    def test_adaptive(self):
+        enumerator = logical_failure_polynomial.FaultPathEnumerator(
+                repeat_until_agreement, self.epgc_list)
+        polynomial = enumerator.logical_failure_polynomial(max_order=2)
+        self.assertIsNone(polynomial.n_locations)
+        # a single fault is caught and the second round is fault free
+        self.assertEqual(polynomial.failure_counts[:2], [0, 0])
+        for p in (0.001, 0.1):
+            total = (polynomial.evaluate(polynomial.failing, p)
+                     + polynomial.evaluate(polynomial.passing, p)
+                     + polynomial.tail_probability(p))
+            self.assertAlmostEqual(total, 1.)
+
+    def test_protocol_outcome(self):
+        enumerator = logical_failure_polynomial.FaultPathEnumerator(
+                lambda **kwargs: 1, self.epgc_list)
+        with self.assertRaises(TypeError):
+            enumerator.run(())
+
+
+if __name__ == "__main__":
+    unittest.main()
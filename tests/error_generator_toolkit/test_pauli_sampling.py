@@ -0,0 +1,72 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_pauli_sampling.py
+@author Luc Kusters
+@date 17-10-2022
+"""
+
+import unittest
+
+import numpy
+import pecos
+
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+from pecos_toolkit.error_generator_toolkit import error_model
+from pecos_toolkit.error_generator_toolkit import pauli_sampling
+
+
+class TestPauliSampling(unittest.TestCase):
+
+    def test_codes(self):
+        self.assertEqual(pauli_sampling.pauli_pair_code(("X", "Z")), 7)
+        self.assertEqual(pauli_sampling.pauli_pair(7), ("X", "Z"))
+        sampler = pauli_sampling.TwoQubitPauliSampler(
+                ErrorGenerator._PAULI_ERROR_TWO)
+        numpy.testing.assert_array_equal(sampler.codes, numpy.arange(1, 16))
+        codes = sampler.sample(1000)
+        self.assertEqual(set(codes.tolist()), set(range(1, 16)))
+
+    def test_weights(self):
+        sampler = pauli_sampling.TwoQubitPauliSampler(
+                {("Z", "I"): 1, ("I", "Z"): 1, ("Z", "Z"): 0})
+        codes = sampler.sample(1000)
+        self.assertEqual(set(codes.tolist()), {3, 12})
+        with self.assertRaises(ValueError):
+            pauli_sampling.TwoQubitPauliSampler({("X", "X"): -1})
+
+    def test_frame_and_circuit(self):
+        x_bits, z_bits = pauli_sampling.frame_bits([7, 10])  # XZ, YY
+        numpy.testing.assert_array_equal(x_bits, [[1, 0], [1, 1]])
+        numpy.testing.assert_array_equal(z_bits, [[0, 1], [1, 1]])
+
+        x_frame = numpy.zeros(3, dtype=numpy.uint8)
+        z_frame = numpy.zeros(3, dtype=numpy.uint8)
+        pauli_sampling.apply_to_frame(x_frame, z_frame, [(0, 1), (1, 2)],
+                                      [7, 10])
+        numpy.testing.assert_array_equal(x_frame, [1, 1, 1])
+        numpy.testing.assert_array_equal(z_frame, [0, 0, 1])
+
+        circ = pecos.circuits.QuantumCircuit()
+        pauli_sampling.add_to_circuit(circ, [(0, 1), (2, 3)], [7, 4])
+        gates = {symbol: set(locations)
+                 for symbol, locations, _ in circ.items()}
+        self.assertEqual(gates, {"X": {0, 2}, "Z": {1}})
+
+    def test_error_gen(self):
+        epgc = ErrorGenerator.ErrorProneGateCollection(
+                symbol="two_qubit", ep_gates={"CNOT"}, param="p",
+                error_gates={("X", "I"): 1.}, before=False, after=True)
+        gen = error_model.ErrorModel([epgc]).build_generator()
+        circ = pecos.circuits.QuantumCircuit()
+        circ.append("CNOT", {(0, 1), (2, 3)})
+        gen.start(circ, {"p": 1.}, None)
+        gen.generate_tick_errors(circ[0], 0)
+        after = gen.error_circuits[0]["after"]
+        gates = {symbol: set(locations)
+                 for symbol, locations, _ in after.items()}
+        self.assertEqual(gates, {"X": {0, 2}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_rate_tables.py
+@author Luc Kusters
+@date 06-10-2022
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy
+import pecos
+
+from pecos_toolkit import circuit_runner
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+from pecos_toolkit.error_generator_toolkit import rate_tables
+
+
+class TestRateTable(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.single_table = rate_tables.RateTable(
+                [0, 2], ["init |0>", "idle"], [[0.1, 0.2], [0.3, 0.4]],
+                default=0.01)
+        self.pair_table = rate_tables.RateTable(
+                [(7, 0), (7, 1)], ["CNOT", "CZ"],
+                [[0.1, 0.2], [0.3, 0.4]], symmetric=True)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def test_single_qudit_rates(self):
+        rates = self.single_table.rates("idle", [2, 0, 1, 12])
+        numpy.testing.assert_allclose(rates, [0.4, 0.2, 0.01, 0.01])
+        rates = self.single_table.rates("H", [0, 2])
+        numpy.testing.assert_allclose(rates, [0.01, 0.01])
+
+    def test_pair_rates(self):
+        rates = self.pair_table.rates("CZ", [(7, 1), (1, 7), (0, 1)])
+        numpy.testing.assert_allclose(rates, [0.4, 0.4, 0.0])
+        with self.assertRaises(ValueError):
+            self.pair_table.rates("CZ", [1, 2])
+
+    def test_from_csv(self):
+        with open(self.path("rates.csv"), "w") as csv_file:
+            csv_file.write("qubit_1,qubit_2,CNOT,CZ\n7,0,0.1,0.2\n"
+                           "7,1,0.3,0.4\n")
+        table = rate_tables.RateTable.from_csv(self.path("rates.csv"),
+                                               symmetric=True)
+        self.assertEqual(table, self.pair_table)
+        self.assertEqual(hash(table), hash(self.pair_table))
+
+    def test_from_array_and_npz(self):
+        array = numpy.zeros((3, 2))
+        array[0] = [0.1, 0.2]
+        array[2] = [0.3, 0.4]
+        table = rate_tables.RateTable.from_array(
+                array, ["init |0>", "idle"], default=0.0)
+        numpy.testing.assert_allclose(table.rates("idle", [0, 1, 2]),
+                                      [0.2, 0.0, 0.4])
+        self.single_table.save_npz(self.path("rates.npz"))
+        loaded = rate_tables.RateTable.from_npz(self.path("rates.npz"))
+        self.assertEqual(loaded, self.single_table)
+
+    def test_invalid_rates(self):
+        with self.assertRaises(ValueError):
+            rate_tables.RateTable([0], ["X"], [[1.5]])
+
+    def test_error_gen_with_rate_table(self):
+        gen = ErrorGenerator.GeneralErrorGen([ErrorGenerator.FlipZInit])
+        table = rate_tables.RateTable([0, 1], ["init |0>"], [[1.], [0.]])
+        circ = pecos.circuits.QuantumCircuit()
+        circ.append("init |0>", {0, 1})
+        circ.append("measure Z", {0, 1})
+        res = circuit_runner.ImprovedRunner().run(
+                pecos.simulators.SparseSim(2), circ, error_gen=gen,
+                error_params={"init": table})
+        self.assertEqual(res.measurements.last.syndrome, [1, 0])
+
+    def test_table_draws_as_scalar(self):
+        gen = ErrorGenerator.GeneralErrorGen([ErrorGenerator.FlipZInit])
+        qudits = set(range(20))
+        circ = pecos.circuits.QuantumCircuit()
+        circ.append("init |0>", qudits)
+        circ.append("measure Z", qudits)
+
+        def syndrome(rate):
+            runner = circuit_runner.ImprovedRunner(random_seed=False,
+                                                   seed=7)
+            return runner.run(pecos.simulators.SparseSim(20), circ,
+                              error_gen=gen, error_params={"init": rate}
+                              ).measurements.last.syndrome
+
+        for rate, table_rate in ((0.5, 0.5), (True, 1.)):
+            table = rate_tables.RateTable([0], ["init |0>"], [[table_rate]],
+                                          default=table_rate)
+            self.assertEqual(syndrome(table), syndrome(rate))
+        self.assertEqual(syndrome(True), [1] * 20)
+        self.assertTrue(rate_tables.draw_errors(3, True).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_signature_cache.py
+@author Luc Kusters
+@date 24-10-2022
+"""
+
+import tempfile
+import unittest
+
+import numpy
+import pecos
+
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+from pecos_toolkit.error_generator_toolkit import signature_cache
+
+
+class TestFaultSignatureCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = signature_cache.FaultSignatureCache(self.tmp_dir.name)
+        # repetition code: data 0, 1, 2 and ancilla 3 measuring Z0 Z1
+        self.circ = pecos.circuits.QuantumCircuit()
+        self.circ.append("init |0>", {0, 1, 2, 3})
+        self.circ.append("CNOT", {(0, 3)})
+        self.circ.append("CNOT", {(1, 3)})
+        self.circ.append("measure Z", {3})
+        self.epgc_list = [ErrorGenerator.FlipZInit]
+        self.code = dict(data_qudits=[0, 1, 2], logical_x={0, 1, 2},
+                         logical_z={0})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_signatures(self):
+        signatures = self.cache.get(self.circ, self.epgc_list, **self.code)
+        # X init faults on qudits 0, 1, 2 and 3
+        numpy.testing.assert_array_equal(signatures.measurement_flips,
+                                         [[1], [1], [0], [1]])
+        numpy.testing.assert_array_equal(signatures.x, [
+            [1, 0, 0], [0, 1, 0], [0, 0, 1], [0, 0, 0]])
+        self.assertFalse(signatures.z.any())
+        numpy.testing.assert_array_equal(signatures.logical_flips, [
+            [1, 0], [0, 0], [0, 0], [0, 0]])
+
+    def test_cached(self):
+        signatures = self.cache.get(self.circ, self.epgc_list, **self.code)
+        self.assertIsInstance(signatures.x, numpy.memmap)
+        key = signature_cache.signature_key(self.circ, self.epgc_list,
+                                            **self.code)
+        self.assertIn(key, self.cache)
+        self.circ.append("measure Z", {0, 1, 2})
+        self.assertNotIn(signature_cache.signature_key(
+            self.circ, self.epgc_list, **self.code), self.cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_signature_ft_check.py
+@author Luc Kusters
+@date 25-10-2022
+"""
+
+import functools
+import unittest
+
+import pecos
+
+from error_generator_toolkit import _protocols
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+from pecos_toolkit.error_generator_toolkit import ft_verification
+from pecos_toolkit.error_generator_toolkit import signature_ft_check
+from pecos_toolkit.qec_codes.steane import protocols
+from pecos_toolkit.qec_codes.steane.circuits import Measurement
+from pecos_toolkit.qec_codes.steane.circuits import Steane
+
+
+def repetition_outcomes(signatures):
+    """repetition_protocol on the measurement flips of the signatures"""
+    n_flips = signatures.measurement_flips.sum(axis=1)
+    return ft_verification.ProtocolOutcome(
+            failed=n_flips >= 2, flagged=(n_flips > 0) & (n_flips < 3))
+
+
+class TestSignatureFTChecker(unittest.TestCase):
+
+    def test_matches_simulation(self):
+        circ = pecos.circuits.QuantumCircuit()
+        circ.append("init |0>", {0, 1, 2})
+        circ.append("I", {0, 1, 2})
+        circ.append("measure Z", {0, 1, 2})
+        epgc_list = [ErrorGenerator.FlipZInit]
+        checker = signature_ft_check.SignatureFTChecker(
+                circ, epgc_list, repetition_outcomes, data_qudits=[],
+                logical_x=[], logical_z=[])
+        for order in (1, 2, 3):
+            simulated = ft_verification.FaultToleranceVerifier(
+                    circ, epgc_list, _protocols.repetition_protocol,
+                    order=order, n_workers=1).run()
+            self.assertEqual(checker.check(order)._replace(n_simulated=0),
+                             simulated._replace(n_simulated=0))
+
+    def test_f1ftec_stab_meas(self):
+        epgc_list = [
+                ErrorGenerator.FlipZInit,
+                ErrorGenerator.FlipXInit,
+                ErrorGenerator.ErrorProneGateCollection(
+                    symbol="two_qubit_gate_errors",
+                    ep_gates={"CNOT"}, param="two_qubit",
+                    error_gates=ErrorGenerator._PAULI_ERROR_TWO,
+                    before=False, after=True),
+                ]
+        stab = Steane.BaseSteaneData.x_stabilizers[0]
+        checker = signature_ft_check.SignatureFTChecker(
+                Measurement.F1FTECStabMeasCircuit(stab), epgc_list,
+                functools.partial(
+                    protocols.F1FTECProtocol.stab_meas_signature_outcomes,
+                    stab=stab),
+                data_qudits=range(7), logical_x=range(7),
+                logical_z=range(7))
+        self.assertTrue(checker.check(order=1).fault_tolerant)
+        report = checker.check(order=2, chunk_size=100, max_failures=5)
+        self.assertFalse(report.fault_tolerant)
+        self.assertEqual(report.n_combinations, 4186)
+        self.assertEqual(len(report.failures), 5)
+        self.assertEqual(report, checker.check(order=2, max_failures=5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_CSSCode.py
+@author Luc Kusters
+@date 31-10-2022
+"""
+
+import unittest
+
+import numpy
+
+from pecos_toolkit.qec_codes import gf2_kernel
+from pecos_toolkit.qec_codes.css import CSSCode
+from pecos_toolkit.qec_codes.css import Circuits
+from pecos_toolkit.qec_codes.steane.circuits import Logical
+from pecos_toolkit.qec_codes.steane.circuits import Measurement
+from pecos_toolkit.qec_codes.steane.circuits import Steane
+from pecos_toolkit.qec_codes.steane.decoders import BasicLOTDecoder
+
+
+def circuit_ticks(circuit):
+    return [{symbol: set(locations) for symbol, locations, _
+             in tick.items()} for tick, _, _ in circuit.iter_ticks()]
+
+
+class TestSteaneInstance(unittest.TestCase):
+
+    def setUp(self):
+        self.code = Steane.BaseSteaneData.css_code
+
+    def test_decoder_table(self):
+        decoder = BasicLOTDecoder.SteaneSyndromeDecoder()
+        for basis in CSSCode.CSSCode.READOUT_BASES:
+            self.assertTrue((self.code.kernel(basis).corrections
+                             == decoder.lot_array()).all())
+
+    def test_stabilizer_measurement_circuits(self):
+        steane_stabilizers = (Steane.BaseSteaneData.x_stabilizers
+                              + Steane.BaseSteaneData.z_stabilizers)
+        for stab, steane_stab in zip(self.code.stabilizers,
+                                     steane_stabilizers):
+            self.assertEqual(stab.qubits, steane_stab.qubits)
+            self.assertEqual(
+                    circuit_ticks(Circuits.StabMeasCircuit(self.code, stab)),
+                    circuit_ticks(Measurement.StabMeasCircuit(steane_stab)))
+            self.assertEqual(
+                    circuit_ticks(Circuits.F1FTECStabMeasCircuit(self.code,
+                                                                 stab)),
+                    circuit_ticks(Measurement.F1FTECStabMeasCircuit(
+                        steane_stab)))
+
+    def test_steane_circuits(self):
+        stab = Steane.BaseSteaneData.z_stabilizers[1]
+        circ = Measurement.F1FTECStabMeasCircuit(stab)
+        self.assertIsInstance(circ, Circuits.F1FTECStabMeasCircuit)
+        self.assertIsInstance(circ, Measurement.StabMeasCircuit)
+        self.assertIs(circ.code, self.code)
+        self.assertIsInstance(circ.f1_flag_circ, Circuits.F1FlagCircData)
+        self.assertEqual(circ.num_qubits, self.code.n_qubits)
+        self.assertIsInstance(Logical.LogicalZeroInitialization(),
+                              Circuits.LogicalZeroInitialization)
+        self.assertEqual(
+                circuit_ticks(Measurement.DataStateMeasurement("X")),
+                circuit_ticks(Circuits.DataStateMeasurement(self.code,
+                                                            "X")))
+
+
+class TestQuantumReedMuller(unittest.TestCase):
+
+    def setUp(self):
+        self.code = CSSCode.quantum_reed_muller_15()
+
+    def test_parameters(self):
+        rank_x = len(gf2_kernel.row_reduce(self.code.hx)[1])
+        rank_z = len(gf2_kernel.row_reduce(self.code.hz)[1])
+        self.assertEqual(self.code.n_data - rank_x - rank_z, 1)
+        self.assertEqual((self.code.ancilla_qubit, self.code.flag_qubit),
+                         (15, 16))
+
+    def test_decoder_tables(self):
+        for basis in self.code.READOUT_BASES:
+            kernel = self.code.kernel(basis)
+            self.assertEqual(kernel.corrections.shape,
+                             (2**kernel.n_checks, 15))
+            single_errors = numpy.eye(15, dtype=numpy.uint8)
+            self.assertTrue((kernel.correct(single_errors) == 0).all())
+        # weight 2 Z errors are correctable in X readout only
+        self.assertEqual(
+                self.code.kernel("X").corrections.sum(axis=1).max(), 1)
+
+    def test_encoding(self):
+        circuit = Circuits.LogicalZeroInitialization(self.code)
+        # every tick acts on disjoint qubits
+        for tick in circuit_ticks(circuit):
+            qubits = [q for locations in tick.values()
+                      for location in locations
+                      for q in numpy.atleast_1d(location)]
+            self.assertEqual(len(qubits), len(set(qubits)))
+        # stabilizers of |0...0> propagated through the circuit (x | z)
+        n = self.code.n_data
+        tableau = numpy.eye(n, 2 * n, n, dtype=numpy.uint8)
+        for tick in circuit_ticks(circuit)[1:]:
+            for q in tick.get("H", ()):
+                tableau[:, [q, n + q]] = tableau[:, [n + q, q]]
+            for control, target in tick.get("CNOT", ()):
+                tableau[:, target] ^= tableau[:, control]
+                tableau[:, n + control] ^= tableau[:, n + target]
+        z_checks = numpy.vstack((
+                self.code.hz,
+                CSSCode.support_to_bits(self.code.logical_z, n)))
+        expected = numpy.concatenate((
+                numpy.hstack((self.code.hx, 0 * self.code.hx)),
+                numpy.hstack((0 * z_checks, z_checks))))
+        rank = len(gf2_kernel.row_reduce(tableau)[1])
+        self.assertEqual(rank, n)
+        self.assertEqual(len(gf2_kernel.row_reduce(
+                numpy.concatenate((tableau, expected)))[1]), rank)
+
+    def test_flag_circuit(self):
+        stab = self.code.x_stabilizers[0]
+        circuit = Circuits.F1FTECStabMeasCircuit(self.code, stab)
+        ticks = circuit_ticks(circuit)
+        self.assertEqual(len(ticks), len(stab.qubits) + 4)
+        flag_cnot = {"CNOT": {(15, 16)}}
+        self.assertEqual(ticks[2], flag_cnot)
+        self.assertEqual(ticks[-3], flag_cnot)
+        self.assertEqual(ticks[-1], {"measure X": {15}, "measure Z": {16}})
+
+    def test_non_commuting(self):
+        with self.assertRaises(ValueError):
+            CSSCode.CSSCode(3, [(0, 1)], [(1, 2), (0, )], (0, 1, 2), (0, ))
@@ -0,0 +1,77 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_Measurement.py
+@author Luc Kusters
+@date 04-11-2022
+"""
+
+import unittest
+
+from pecos_toolkit.qec_codes.steane import protocols
+from pecos_toolkit.qec_codes.steane.circuits import Logical
+from pecos_toolkit.qec_codes.steane.circuits import Measurement
+from pecos_toolkit.qec_codes.steane.circuits import Steane
+from pecos_toolkit.qec_codes.steane.data_types import Syndrome
+
+
+def circuit_ticks(circuit):
+    return [{symbol: set(locations) for symbol, locations, _
+             in tick.items()} for tick, _, _ in circuit.iter_ticks()]
+
+
+class TestFusedStabMeasCircuit(unittest.TestCase):
+
+    def setUp(self):
+        self.stabs = Steane.BaseSteaneData.z_stabilizers
+        self.circ = Measurement.FusedStabMeasCircuit(self.stabs)
+
+    def test_ticks(self):
+        expected = [tick for stab in self.stabs for tick in circuit_ticks(
+                    Measurement.F1FTECStabMeasCircuit(stab))]
+        self.assertEqual(circuit_ticks(self.circ), expected)
+        self.assertEqual(self.circ.measurement_slots, [
+            (7, 7), (15, 7), (23, 7), (7, 8), (15, 8), (23, 8)])
+        unflagged = Measurement.FusedStabMeasCircuit(self.stabs,
+                                                     flagged=False)
+        self.assertEqual(len(unflagged), 18)
+        self.assertEqual(unflagged.measurement_slots,
+                         [(5, 7), (11, 7), (17, 7)])
+
+    def test_run(self):
+        for error_qubit, row in ((0, [1, 0, 0, 0, 0, 0]),
+                                 (2, [1, 1, 1, 0, 0, 0]),
+                                 (None, [0] * 6)):
+            state = Steane.InitPhysicalZero().run().state
+            Steane.SingleQubitPauli("X", error_qubit).run(state)
+            res = self.circ.run(state)
+            self.assertEqual(
+                    self.circ.measurement_row(res.measurements).tolist(),
+                    row)
+            self.assertEqual(self.circ.packed_row(res.measurements),
+                             Steane.pack_bits(row))
+
+    def test_protocol(self):
+        syndromes = []
+        for fused in (False, True):
+            state = Steane.InitPhysicalZero().run().state
+            Steane.SingleQubitPauli("X", 5).run(state)
+            syndrome, faults = protocols.SteaneProtocol.measure_stabilizers(
+                    state, self.stabs, fused=fused)
+            syndromes.append(syndrome)
+        self.assertEqual(syndromes[0], Syndrome.Syndrome("Z", 0, 1, 1))
+        self.assertEqual(syndromes[1], syndromes[0])
+        self.assertEqual(faults, [None])
+
+    def test_rnn_data_generation(self):
+        data = []
+        for fused in (False, True):
+            state = Logical.LogicalZeroInitialization().run().state
+            Steane.SingleQubitPauli("X", 5).run(state)
+            data.append(protocols.F1FTECProtocol.f1ftec_rnn_data_generation(
+                    state, fused=fused))
+        self.assertEqual(data[1], data[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
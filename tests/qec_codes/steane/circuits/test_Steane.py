@@ -0,0 +1,54 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_Steane.py
+@author Luc Kusters
+@date 27-10-2022
+"""
+
+import itertools
+import unittest
+
+import numpy
+
+from pecos_toolkit.qec_codes.steane.circuits import Steane
+
+
+class TestSteaneBinaryStabilizerGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.generator = Steane.SteaneBinaryStabilzerGenerator()
+
+    def test_codewords(self):
+        generators = numpy.array(self.generator.BINARY_STAB_GEN)
+        group = {tuple(generators[list(subset)].sum(axis=0) % 2)
+                 for n in range(4)
+                 for subset in itertools.combinations(range(3), n)}
+        self.assertEqual(set(self.generator.stabilizers), group)
+        self.assertEqual(len(self.generator.stabilizers), 8)
+        logical = numpy.array([1, 1, 0, 0, 1, 0, 0])
+        self.assertEqual(set(self.generator.logical_one_codewords),
+                         {tuple((numpy.array(c) + logical) % 2)
+                          for c in group})
+        self.assertIs(Steane.BaseSteaneData.packed_codewords(),
+                      Steane.BaseSteaneData.packed_codewords())
+
+    def test_distances(self):
+        bits = numpy.array(list(itertools.product((0, 1), repeat=7)))
+        for codewords in ("zero", "one"):
+            expected = [self.generator.min_distance_to_logical_codewords(
+                            row, codewords) for row in bits]
+            brute_force = [min(int((row != c).sum()) for c in (
+                self.generator.logical_zero_codewords if codewords == "zero"
+                else self.generator.logical_one_codewords)) for row in bits]
+            self.assertEqual(expected, brute_force)
+            self.assertEqual(
+                    self.generator.min_distances_to_logical_codewords(
+                        bits, codewords).tolist(), expected)
+        self.assertEqual(Steane.distance([1, 0, 1], [0, 0, 1]), 1)
+        with self.assertRaises(RuntimeError):
+            Steane.distance([1, 0], [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
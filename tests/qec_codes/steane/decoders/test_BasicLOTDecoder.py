@@ -6,8 +6,11 @@ test_BasicLOTDecoder.py
 @date 31-08-2022
 """
 
+import itertools
 import unittest
 
+import numpy
+
 from pecos_toolkit.qecc_codes.steane.decoders import BasicLOTDecoder
 
 class TestBasicLOTDecoder(unittest.TestCase):
@@ -32,6 +35,14 @@ class TestBasicLOTDecoder(unittest.TestCase):
                 self.classical_state)
         self.assertEqual(p, 1)
 
+    def test_classical_array_BasicLOTDecoder(self):
+        bits = numpy.array(list(itertools.product((0, 1), repeat=7)))
+        parities = self.decoder.corrected_classical_logical_parity_array(
+                bits)
+        self.assertEqual(parities.tolist(), [
+            self.decoder.corrected_classical_logical_parity(list(b))
+            for b in bits])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,41 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_protocols.py
+@author Luc Kusters
+@date 21-11-2022
+"""
+
+import unittest
+
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+from pecos_toolkit.qec_codes.steane import protocols
+from pecos_toolkit.qec_codes.steane.circuits import Steane
+
+
+class TestDataQuditNoiseOnly(unittest.TestCase):
+
+    def record(self, data_qudit_noise_only):
+        """Qudits of the recorded faults of a physical zero initialization
+        and a Z stabilizer measurement, with every init failing"""
+        gen = ErrorGenerator.GeneralErrorGen(
+                [ErrorGenerator.FlipZInit, ErrorGenerator.FlipXInit])
+        recorder = gen.record_faults()
+        kwargs = {"error_gen": gen, "error_params": {"init": 1.}}
+        if data_qudit_noise_only:
+            kwargs = protocols.exclude_ancilla_noise(kwargs)
+        state = protocols.SteaneProtocol.init_physical_zero(**kwargs).state
+        protocols.SteaneProtocol.measure_stabilizers(
+                state, Steane.BaseSteaneData.z_stabilizers, **kwargs)
+        self.assertIs(gen.recorder, recorder)
+        self.assertIsNone(gen.run_excluded_qudits)
+        return list(recorder.to_record().columns["qudit"])
+
+    def test_recording(self):
+        self.assertEqual(sorted(self.record(False)),
+                         [*range(7), *[7] * 3])
+        self.assertEqual(sorted(self.record(True)), list(range(7)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_gf2_kernel.py
+@author Luc Kusters
+@date 28-10-2022
+"""
+
+import itertools
+import unittest
+
+import numpy
+
+from pecos_toolkit.qec_codes import gf2_kernel
+from pecos_toolkit.qec_codes.steane.circuits import Steane
+from pecos_toolkit.qec_codes.steane.decoders import BasicLOTDecoder
+
+
+class TestBitMatrixKernel(unittest.TestCase):
+
+    def setUp(self):
+        self.kernel = Steane.BaseSteaneData.gf2_kernel()
+        self.bits = numpy.array(list(itertools.product((0, 1), repeat=7)))
+
+    def test_steane_readout(self):
+        decoder = BasicLOTDecoder.SteaneSyndromeDecoder()
+        syndromes = self.kernel.syndromes(self.bits)
+        for row, syndrome in zip(self.bits, syndromes):
+            self.assertEqual(
+                    tuple(syndrome),
+                    tuple(decoder.classical_stabilizer_syndrome(row))[1:])
+        self.assertEqual(
+                self.kernel.corrected_logical_parities(self.bits)[:, 0]
+                .tolist(),
+                [decoder.corrected_classical_logical_parity(list(row))
+                 for row in self.bits])
+        self.assertTrue((self.kernel.corrections
+                         == decoder.lot_array()).all())
+
+    def test_unpacked(self):
+        # codes of more than 64 qubits use matrix products instead
+        unpacked = gf2_kernel.BitMatrixKernel(
+                self.kernel.parity_check, self.kernel.logicals,
+                self.kernel.corrections)
+        unpacked.packed_parity_check = unpacked.packed_logicals = None
+        self.assertTrue((unpacked.corrected_logical_parities(self.bits)
+                         == self.kernel.corrected_logical_parities(
+                             self.bits)).all())
+
+    def test_min_weight_corrections(self):
+        # 5 bit repetition code corrects up to 2 flips
+        parity_check = [[1, 1, 0, 0, 0], [0, 1, 1, 0, 0], [0, 0, 1, 1, 0],
+                        [0, 0, 0, 1, 1]]
+        kernel = gf2_kernel.BitMatrixKernel(parity_check, [[1, 1, 1, 1, 1]])
+        self.assertEqual(kernel.corrections.sum(axis=1).max(), 2)
+        errors = numpy.array([e for e in itertools.product((0, 1), repeat=5)
+                              if sum(e) <= 2])
+        self.assertFalse(kernel.corrected_logical_parities(errors).any())
+
+
+if __name__ == "__main__":
+    unittest.main()
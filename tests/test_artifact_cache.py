@@ -0,0 +1,100 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_artifact_cache.py
+@author Luc Kusters
+@date 02-11-2022
+"""
+
+import tempfile
+import unittest
+
+import numpy
+import pecos
+
+from pecos_toolkit import artifact_cache
+from pecos_toolkit import circuit_fingerprint
+from pecos_toolkit import circuit_overlay
+from pecos_toolkit import circuit_registry
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+from pecos_toolkit.error_generator_toolkit import error_model
+from pecos_toolkit.error_generator_toolkit import error_placer_toolkit
+from pecos_toolkit.error_generator_toolkit import pauli_propagation
+
+
+class TestArtifactCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = artifact_cache.ArtifactCache(self.tmp_dir.name)
+        # repetition code: data 0, 1, 2 and ancilla 3 measuring Z0 Z1
+        self.circ = pecos.circuits.QuantumCircuit()
+        self.circ.append("init |0>", {0, 1, 2, 3})
+        self.circ.append("X", {1})
+        self.circ.append("CNOT", {(0, 3)})
+        self.circ.append("CNOT", {(1, 3)})
+        self.circ.append("measure Z", {3, 1})
+        self.epgc_list = [
+                ErrorGenerator.FlipZInit,
+                ErrorGenerator.ErrorProneGateCollection(
+                    symbol="two_qubit_gate_errors", ep_gates={"CNOT"},
+                    param="p", error_gates=ErrorGenerator._PAULI_ERROR_TWO,
+                    before=False, after=True)]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_location_table(self):
+        errors = error_placer_toolkit.possible_error_coordinates(
+                self.circ, self.epgc_list)
+        table = self.cache.location_table(self.circ, self.epgc_list)
+        self.assertIsInstance(table, numpy.memmap)
+        self.assertEqual(artifact_cache.location_table_coordinates(table),
+                         errors)
+        self.assertEqual(error_placer_toolkit.ErrorPlacer(
+            self.circ, self.epgc_list, cache=self.cache).possible_errors,
+            errors)
+
+    def test_keys(self):
+        self.cache.measurement_plan(self.circ)
+        key = artifact_cache.artifact_key("measurement_plan", self.circ)
+        self.assertIn(key, self.cache)
+        self.circ.append("measure Z", {0})
+        self.assertNotEqual(
+                artifact_cache.artifact_key("measurement_plan", self.circ),
+                key)
+        model = error_model.ErrorModel(self.epgc_list)
+        self.assertNotEqual(
+                artifact_cache.artifact_key("location_table", self.circ,
+                                            model),
+                artifact_cache.artifact_key("location_table", self.circ,
+                                            model.replace(
+                                                excluded_qudits={3})))
+
+    def test_measurement_plan(self):
+        plan = self.cache.measurement_plan(self.circ)
+        propagator = pauli_propagation.PauliPropagator(self.circ)
+        self.assertEqual(
+                list(zip(plan["tick_idx"].tolist(), plan["qudit"].tolist())),
+                propagator.measurement_locations)
+        self.assertEqual(set(plan["basis"]), {"Z"})
+
+    def test_reference_sample(self):
+        bits = self.cache.reference_sample(self.circ, seed=3)
+        numpy.testing.assert_array_equal(bits, [1, 1])
+        self.assertIn(artifact_cache.artifact_key(
+            "reference_sample", self.circ, engine="SparseSim", seed=3,
+            n_qudits=4), self.cache)
+
+    def test_frozen_fingerprint(self):
+        content = circuit_fingerprint.circuit_fingerprint(self.circ)
+        frozen = circuit_registry.freeze(self.circ)
+        self.assertEqual(circuit_fingerprint.circuit_fingerprint(frozen),
+                         content)
+        error_circ = circuit_overlay.overlay(frozen, [(1, {"X": {0}})])
+        self.assertNotEqual(
+                circuit_fingerprint.circuit_fingerprint(error_circ), content)
+
+
+if __name__ == "__main__":
+    unittest.main()
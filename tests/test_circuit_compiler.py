@@ -0,0 +1,141 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_circuit_compiler.py
+@author Luc Kusters
+@date 07-11-2022
+"""
+
+import unittest
+
+import numpy
+import pecos
+
+from pecos_toolkit import circuit_compiler
+from pecos_toolkit import circuit_runner
+from pecos_toolkit import circuit_serialization
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+from pecos_toolkit.qec_codes.steane.circuits import Measurement
+from pecos_toolkit.qec_codes.steane.circuits import Steane
+
+
+class TestCompiledCircuit(unittest.TestCase):
+
+    def setUp(self):
+        # repetition code: data 0, 1, 2 and ancilla 3 measuring Z0 Z1
+        self.circ = pecos.circuits.QuantumCircuit()
+        self.circ.append("init |0>", {0, 1, 2, 3})
+        self.circ.append("X", {1})
+        self.circ.add_ticks(1)
+        self.circ.append("CNOT", {(0, 3), (1, 2)})
+        self.circ.append("measure Z", {3, 1})
+
+    def test_instructions(self):
+        compiled = circuit_compiler.get_compiled(self.circ)
+        self.assertEqual(len(compiled), 9)
+        self.assertEqual([compiled.symbols[op] for op in compiled.opcode],
+                         ["init |0>"] * 4 + ["X", "CNOT", "CNOT"]
+                         + ["measure Z"] * 2)
+        numpy.testing.assert_array_equal(compiled.qudit1,
+                                         [0, 1, 2, 3, 1, 0, 1, 1, 3])
+        numpy.testing.assert_array_equal(compiled.qudit2,
+                                         [-1] * 5 + [3, 2, -1, -1])
+        numpy.testing.assert_array_equal(compiled.tick_start,
+                                         [0, 4, 5, 5, 7, 9])
+        numpy.testing.assert_array_equal(compiled.measurement_slot,
+                                         [-1] * 7 + [0, 1])
+        self.assertEqual(compiled.measurement_locations, [(4, 1), (4, 3)])
+        self.assertEqual(compiled.idle_qudits(1).tolist(), [0, 2, 3])
+        self.assertEqual(compiled.ticks[3], [(2, (0, 3), 0, -1),
+                                             (2, (1, 2), 0, -1)])
+
+    def test_cache(self):
+        compiled = circuit_compiler.get_compiled(self.circ)
+        self.assertIs(circuit_compiler.get_compiled(self.circ), compiled)
+        self.circ.update("X", {0}, tick=2)
+        recompiled = circuit_compiler.get_compiled(self.circ)
+        self.assertEqual(len(recompiled), 10)
+        self.assertEqual(recompiled.location(5), 0)
+        self.circ.discard({1}, tick=1)
+        self.circ[1].add("Z", {1})
+        recompiled = circuit_compiler.get_compiled(self.circ)
+        self.assertEqual(recompiled.symbols[recompiled.opcode[4]], "Z")
+
+    def test_revision(self):
+        revision = circuit_compiler.circuit_revision(self.circ)
+        self.assertEqual(circuit_compiler.circuit_revision(self.circ),
+                         revision)
+        revisions = {revision}
+        for mutate in (lambda circ: circ.append("X", {0}),
+                       lambda circ: circ[1].discard({1}),
+                       lambda circ: circ[1].add("Z", {1}),
+                       lambda circ: circ.insert(0, ({"X": {2}}, {})),
+                       lambda circ: circ.__setitem__(0, ({"Z": {0}}, {}))):
+            mutate(self.circ)
+            revision = circuit_compiler.circuit_revision(self.circ)
+            self.assertNotIn(revision, revisions)
+            revisions.add(revision)
+
+    def test_from_serialized(self):
+        compiled = circuit_compiler.CompiledCircuit(
+                circuit_serialization.load_arrays(
+                    circuit_serialization.dumps(self.circ)))
+        self.assertEqual(compiled.ticks,
+                         circuit_compiler.get_compiled(self.circ).ticks)
+
+
+class TestCompiledRunner(unittest.TestCase):
+
+    def run_both(self, circ, state_factory, **kwargs):
+        results = []
+        for runner in (circuit_runner.ImprovedRunner(random_seed=False),
+                       circuit_runner.CompiledRunner(random_seed=False)):
+            results.append(runner.run(state_factory(), circ, **kwargs))
+        return results
+
+    def test_same_as_improved_runner(self):
+        circ = Measurement.FusedStabMeasCircuit(
+                Steane.BaseSteaneData.z_stabilizers)
+
+        def state_factory():
+            state = Steane.InitPhysicalZero().run().state
+            Steane.SingleQubitPauli("X", 4).run(state)
+            return state
+
+        improved, compiled = self.run_both(circ, state_factory)
+        self.assertEqual(compiled.measurements, improved.measurements)
+        self.assertIsNone(compiled.faults)
+        improved, compiled = self.run_both(
+                circ, state_factory,
+                error_gen=ErrorGenerator.GeneralErrorGen(
+                    [ErrorGenerator.FlipZInit]),
+                error_params={"init": 1.})
+        self.assertEqual(compiled.measurements, improved.measurements)
+        self.assertEqual(compiled.measurements.last.syndrome[7:], [0, 1])
+
+    def test_replaced_locations(self):
+        circ = pecos.circuits.QuantumCircuit()
+        circ.append("init |0>", {0, 1})
+        circ.append("X", {0, 1})
+        circ.append("measure Z", {0, 1})
+        res = circuit_runner.CompiledRunner().run(
+                pecos.simulators.SparseSim(2), circ,
+                error_circuits={1: {"replaced": {1}}})
+        self.assertEqual(res.measurements.last.syndrome, [1, 0])
+
+    def test_mutated_circuit(self):
+        circ = pecos.circuits.QuantumCircuit()
+        circ.append("init |0>", {0})
+        circ.append("X", {0})
+        circ.append("measure Z", {0})
+        runner = circuit_runner.CompiledRunner()
+        res = runner.run(pecos.simulators.SparseSim(1), circ)
+        self.assertEqual(res.measurements.last.syndrome, [1])
+        circ.discard({0}, tick=1)
+        circ.update("Z", {0}, tick=1)
+        res = runner.run(pecos.simulators.SparseSim(1), circ)
+        self.assertEqual(res.measurements.last.syndrome, [0])
+
+
+if __name__ == "__main__":
+    unittest.main()
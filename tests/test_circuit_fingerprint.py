@@ -0,0 +1,63 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_circuit_fingerprint.py
+@author Luc Kusters
+@date 24-10-2022
+"""
+
+import unittest
+
+import numpy
+import pecos
+
+from pecos_toolkit import circuit_fingerprint
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+
+
+class TestCircuitFingerprint(unittest.TestCase):
+
+    def build_circuit(self, qudits):
+        circ = pecos.circuits.QuantumCircuit()
+        circ.append("init |0>", set(qudits))
+        circ.append({"CNOT": {(0, 1)}, "H": {2}})
+        return circ
+
+    def test_circuit(self):
+        fingerprint = circuit_fingerprint.circuit_fingerprint(
+                self.build_circuit([0, 1, 2]))
+        self.assertEqual(fingerprint, circuit_fingerprint.circuit_fingerprint(
+                self.build_circuit([2, 1, 0])))
+        circ = self.build_circuit([0, 1, 2])
+        circ.update("X", {3})
+        self.assertNotEqual(fingerprint,
+                            circuit_fingerprint.circuit_fingerprint(circ))
+        self.assertEqual(fingerprint, circuit_fingerprint.circuit_fingerprint(
+                self.build_circuit(numpy.arange(3))))
+
+    def test_scalars(self):
+        fingerprint = circuit_fingerprint.fingerprint
+        self.assertEqual(fingerprint(numpy.int64(3), numpy.float32(0.5)),
+                         fingerprint(3, 0.5))
+        self.assertNotEqual(fingerprint(1), fingerprint(True))
+        self.assertNotEqual(fingerprint(1), fingerprint(1.))
+        self.assertNotEqual(fingerprint("1"), fingerprint(1))
+
+    def test_error_model(self):
+        epgc = ErrorGenerator.ErrorProneGateCollection(
+                symbol="two_qubit_gate_errors", ep_gates={"CNOT", "CZ"},
+                param="p", error_gates=ErrorGenerator._PAULI_ERROR_TWO,
+                before=False, after=True)
+        reordered = epgc._replace(ep_gates={"CZ", "CNOT"},
+                                  error_gates=set(sorted(epgc.error_gates)))
+        self.assertEqual(
+                circuit_fingerprint.error_model_fingerprint([epgc]),
+                circuit_fingerprint.error_model_fingerprint([reordered]))
+        self.assertNotEqual(
+                circuit_fingerprint.error_model_fingerprint([epgc]),
+                circuit_fingerprint.error_model_fingerprint(
+                    [epgc._replace(after=False)]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_circuit_overlay.py
+@author Luc Kusters
+@date 19-10-2022
+"""
+
+import copy
+import unittest
+
+import pecos
+
+from pecos_toolkit import circuit_overlay
+from pecos_toolkit import circuit_runner
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+
+
+def tick_dicts(circ):
+    return [{symbol: set(locations) for symbol, locations, _
+             in circ.items(tick=tick_idx)} for tick_idx in range(len(circ))]
+
+
+class TestCircuitOverlay(unittest.TestCase):
+
+    def setUp(self):
+        self.circ = pecos.circuits.QuantumCircuit()
+        self.circ.append("init |0>", {0, 1, 2})
+        self.circ.append("CNOT", {(0, 1)})
+        self.circ.append("measure Z", {0, 1, 2})
+        self.inserts = [(2, {"X": {0}}), (0, {"Z": {2}}), (2, {"Y": {1}}),
+                        (3, {"X": {2}})]
+
+    def test_same_ticks_as_insert(self):
+        expected = copy.deepcopy(self.circ)
+        for position, gate_dict in reversed(sorted(
+                self.inserts, key=lambda insert: insert[0])):
+            expected.insert(position, (gate_dict, {}))
+        error_circ = circuit_overlay.overlay(self.circ, self.inserts)
+        self.assertEqual(len(error_circ), 7)
+        self.assertEqual(tick_dicts(error_circ), tick_dicts(expected))
+        self.assertEqual(list(error_circ._ticks),
+                         [error_circ[i] for i in range(len(error_circ))])
+        self.assertIs(error_circ[-2], self.circ[-1])
+        # the base circuit is left untouched
+        self.assertEqual(len(self.circ), 3)
+
+    def test_materialize(self):
+        error_circ = circuit_overlay.overlay(self.circ, self.inserts)
+        circ = circuit_overlay.materialize(error_circ)
+        self.assertFalse(circuit_overlay.is_overlay(circ))
+        self.assertEqual(tick_dicts(circ), tick_dicts(error_circ))
+        circ.append("X", {0})
+        self.assertEqual(len(error_circ), 7)
+
+    def test_run(self):
+        gen = ErrorGenerator.GeneralErrorGen([ErrorGenerator.FlipZInit])
+        error_circ = circuit_overlay.overlay(self.circ,
+                                             [(1, {"X": {2}})])
+        res = circuit_runner.ImprovedRunner().run(
+                pecos.simulators.SparseSim(3), error_circ, error_gen=gen,
+                error_params={"init": 0.})
+        self.assertEqual(res.measurements.last.syndrome, [0, 0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
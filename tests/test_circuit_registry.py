@@ -0,0 +1,84 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_circuit_registry.py
+@author Luc Kusters
+@date 01-11-2022
+"""
+
+import copy
+import unittest
+
+import pecos
+
+import testsuite
+from pecos_toolkit import circuit_fingerprint
+from pecos_toolkit import circuit_registry
+from pecos_toolkit import circuit_runner
+from pecos_toolkit.qec_codes.steane.circuits import Measurement
+from pecos_toolkit.qec_codes.steane.circuits import Steane
+from pecos_toolkit.qec_codes.steane.data_types import Plaquette
+
+
+class TestCircuitRegistry(testsuite.LoggedTestCase):
+
+    def setUp(self):
+        self.registry = circuit_registry.CircuitRegistry()
+        self.stab = Steane.BaseSteaneData.x_stabilizers[0]
+        self.circ = self.registry.get(Measurement.F1FTECStabMeasCircuit,
+                                      self.stab)
+
+    def test_shared_instances(self):
+        equal_stab = Plaquette.Stabilizer("X", *self.stab.qubits)
+        self.assertIs(self.registry.get(Measurement.F1FTECStabMeasCircuit,
+                                        equal_stab), self.circ)
+        self.assertIsNot(self.registry.get(Measurement.StabMeasCircuit,
+                                           self.stab), self.circ)
+        self.assertEqual(self.registry.n_built, 2)
+        self.assertEqual(
+                circuit_fingerprint.circuit_fingerprint(self.circ),
+                circuit_fingerprint.circuit_fingerprint(
+                    Measurement.F1FTECStabMeasCircuit(self.stab)))
+
+    def test_read_only(self):
+        self.assertTrue(circuit_registry.is_frozen(self.circ))
+        self.assertIsInstance(self.circ, Measurement.F1FTECStabMeasCircuit)
+        with self.assertRaises(TypeError):
+            self.circ.append("X", {0})
+        with self.assertRaises(TypeError):
+            self.circ.insert(1, ({"X": {0}}, {}))
+        with self.assertRaises(TypeError):
+            self.circ.update("X", {0}, tick=0)
+        circ = self.registry.get(Measurement.StabMeasCircuit, self.stab)
+        with self.assertRaises(TypeError):
+            circ[1].discard({(7, 0)})
+        with self.assertRaises(TypeError):
+            circ[1].add("CNOT", {(7, 0)})
+        self.assertIsInstance(circ[1].active_qudits, frozenset)
+
+    def test_copies(self):
+        fingerprint = circuit_fingerprint.circuit_fingerprint(self.circ)
+        mutable = copy.deepcopy(self.circ)
+        self.assertIs(type(mutable), Measurement.F1FTECStabMeasCircuit)
+        mutable.append("X", {0})
+        _, locations, _ = next(iter(mutable[1].items()))
+        mutable[1].discard(set(locations))
+        mutable[1].add("X", {0})
+        self.assertIn(0, mutable[1].active_qudits)
+        self.assertEqual(len(mutable), len(self.circ) + 1)
+        self.assertEqual(
+                circuit_fingerprint.circuit_fingerprint(self.circ),
+                fingerprint)
+
+    def test_run(self):
+        circ = self.registry.get(Steane.SingleQubitPauli, "X", 1)
+        state = pecos.simulators.SparseSim(9)
+        circuit_runner.ImprovedRunner().run(state, circ)
+        res = circuit_runner.ImprovedRunner().run(
+                state, self.registry.get(Measurement.DataStateMeasurement,
+                                         measure_basis="Z"))
+        self.assertEqual(res.measurements.last.syndrome[:2], [0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_circuit_repeat.py
+@author Luc Kusters
+@date 05-11-2022
+"""
+
+import copy
+import tempfile
+import unittest
+
+import numpy
+import pecos
+
+from pecos_toolkit import artifact_cache
+from pecos_toolkit import circuit_compiler
+from pecos_toolkit import circuit_fingerprint
+from pecos_toolkit import circuit_overlay
+from pecos_toolkit import circuit_repeat
+from pecos_toolkit import circuit_runner
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+from pecos_toolkit.error_generator_toolkit import location_index
+
+
+def tick_dicts(circ):
+    return [{symbol: set(locations) for symbol, locations, _
+             in circ.items(tick=tick_idx)} for tick_idx in range(len(circ))]
+
+
+class TestCircuitRepeat(unittest.TestCase):
+
+    def setUp(self):
+        # one round of Z0 Z1 on ancilla 3 of a repetition code
+        self.block = pecos.circuits.QuantumCircuit()
+        self.block.append("init |0>", {3})
+        self.block.append("CNOT", {(0, 3)})
+        self.block.append("CNOT", {(1, 3)})
+        self.block.append("measure Z", {3})
+        self.block.qudits.update({0, 1, 2})
+        self.rounds = circuit_repeat.repeat(self.block, 5)
+        self.expanded = copy.deepcopy(self.block)
+        for _ in range(4):
+            for gate_dict in tick_dicts(self.block):
+                self.expanded.append(gate_dict)
+
+    def test_ticks(self):
+        self.assertTrue(circuit_repeat.is_repeat(self.rounds))
+        self.assertIs(type(self.rounds), type(self.block))
+        self.assertEqual(len(self.rounds), 20)
+        self.assertEqual(tick_dicts(self.rounds), tick_dicts(self.expanded))
+        self.assertIs(self.rounds[17], self.block[1])
+        self.assertIs(self.rounds[-1], self.block[3])
+        self.assertEqual(self.rounds._ticks.block_position(17), (4, 1))
+        with self.assertRaises(IndexError):
+            self.rounds[20]
+
+    def test_run(self):
+        circ = circuit_overlay.overlay(self.rounds, [
+            (0, {"init |0>": {0, 1, 2}}), (0, {"X": {1}}),
+            (20, {"measure Z": {0, 1, 2}})])
+        gen = ErrorGenerator.GeneralErrorGen([ErrorGenerator.FlipZInit])
+        res = circuit_runner.ImprovedRunner().run(
+                pecos.simulators.SparseSim(4), circ, error_gen=gen,
+                error_params={"init": 0.})
+        self.assertEqual(sorted(res.measurements), [5, 9, 13, 17, 21, 22])
+        for tick_idx in (5, 9, 13, 17, 21):
+            self.assertEqual(res.measurements[tick_idx][3], 1)
+        self.assertEqual(res.measurements.last.syndrome, [0, 1, 0, None])
+
+    def test_location_index(self):
+        index = location_index.get_location_index(self.rounds, {3})
+        expanded = location_index.get_location_index(self.expanded, {3})
+        self.assertEqual(len(index), len(expanded))
+        for tick_idx in range(len(index)):
+            self.assertEqual([gates.locations for gates
+                              in index[tick_idx].gates],
+                             [gates.locations for gates
+                              in expanded[tick_idx].gates])
+            self.assertEqual(set(index[tick_idx].idle.locations),
+                             set(expanded[tick_idx].idle.locations))
+        self.assertIs(index.block_index,
+                      location_index.get_location_index(self.block, {3}))
+
+    def test_compiled(self):
+        compiled = circuit_compiler.get_compiled(self.rounds)
+        expanded = circuit_compiler.get_compiled(self.expanded)
+        self.assertIs(compiled.block,
+                      circuit_compiler.get_compiled(self.block))
+        self.assertEqual(len(compiled), len(expanded))
+        self.assertEqual(compiled.n_measurements, 5)
+        self.assertEqual(list(compiled.ticks), expanded.ticks)
+        self.assertEqual(compiled.measurement_locations,
+                         expanded.measurement_locations)
+        self.assertEqual(compiled.idle_qudits(13).tolist(),
+                         expanded.idle_qudits(13).tolist())
+        results = []
+        for runner in (circuit_runner.ImprovedRunner(),
+                       circuit_runner.CompiledRunner()):
+            state = pecos.simulators.SparseSim(4)
+            state.run_gate("X", {0})
+            results.append(runner.run(state, self.rounds).measurements)
+        self.assertEqual(results[1], results[0])
+        self.assertEqual([results[1][tick_idx][3] for tick_idx
+                          in sorted(results[1])], [1] * 5)
+
+    def test_artifacts(self):
+        epgc_list = [ErrorGenerator.FlipZInit]
+        with tempfile.TemporaryDirectory() as directory:
+            cache = artifact_cache.ArtifactCache(directory)
+            numpy.testing.assert_array_equal(
+                    cache.measurement_plan(self.rounds),
+                    artifact_cache.compute_measurement_plan(self.expanded))
+            numpy.testing.assert_array_equal(
+                    cache.location_table(self.rounds, epgc_list),
+                    artifact_cache.compute_location_table(self.expanded,
+                                                          epgc_list))
+            self.assertIn(artifact_cache.artifact_key(
+                "measurement_plan", self.block), cache)
+        self.assertNotEqual(
+                circuit_fingerprint.circuit_fingerprint(self.rounds),
+                circuit_fingerprint.circuit_fingerprint(
+                    circuit_repeat.repeat(self.block, 6)))
+
+    def test_materialize(self):
+        circ = circuit_overlay.materialize(self.rounds)
+        self.assertFalse(circuit_repeat.is_repeat(circ))
+        self.assertEqual(tick_dicts(circ), tick_dicts(self.expanded))
+        circ.update("X", {2}, tick=0)
+        self.assertEqual(tick_dicts(circ)[4], tick_dicts(self.block)[0])
+        self.assertEqual(tick_dicts(self.block)[0], {"init |0>": {3}})
+
+
+if __name__ == "__main__":
+    unittest.main()
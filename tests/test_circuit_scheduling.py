@@ -0,0 +1,83 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_circuit_scheduling.py
+@author Luc Kusters
+@date 03-11-2022
+"""
+
+import collections
+import unittest
+
+import numpy
+import pecos
+
+from pecos_toolkit import circuit_scheduling
+from pecos_toolkit.error_generator_toolkit import error_placer_toolkit
+from pecos_toolkit.error_generator_toolkit import pauli_propagation
+from pecos_toolkit.qec_codes.steane.circuits import Logical
+from pecos_toolkit.qec_codes.steane.circuits import Measurement
+from pecos_toolkit.qec_codes.steane.circuits import Steane
+
+
+def qudit_sequences(circuit):
+    """qudit -> gates acting on it, in order"""
+    sequences = collections.defaultdict(list)
+    for symbol, location, _ in circuit_scheduling.circuit_gates(circuit):
+        qudits = location if isinstance(location, tuple) else (location, )
+        for qudit in qudits:
+            sequences[qudit].append((symbol, location))
+    return sequences
+
+
+def final_paulis(circuit, qudits):
+    """Final x and z frames of X and Z on every qudit before the circuit"""
+    faults = [error_placer_toolkit.ErrorCoordinate(
+                gate_symbol="I", tick_idx=0, qudits=qudit, error_gate=pauli,
+                after=False) for pauli in ("X", "Z") for qudit in qudits]
+    effects = pauli_propagation.PauliPropagator(circuit).propagate(faults)
+    return numpy.hstack((effects.x, effects.z))
+
+
+class TestCompact(unittest.TestCase):
+
+    def test_keeps_qudit_order(self):
+        stab = Steane.BaseSteaneData.x_stabilizers[0]
+        for circuit in (Logical.LogicalZeroInitialization(),
+                        Logical.AlternativeVLZI(),
+                        Measurement.F1FTECStabMeasCircuit(stab)):
+            compacted = circuit_scheduling.compact(circuit)
+            self.assertIs(type(compacted), type(circuit))
+            self.assertLessEqual(len(compacted), len(circuit))
+            self.assertEqual(qudit_sequences(compacted),
+                             qudit_sequences(circuit))
+        self.assertEqual(len(circuit_scheduling.compact(
+            Logical.LogicalZeroInitialization())), 8)
+
+    def test_reorder_commuting(self):
+        circuit = pecos.circuits.QuantumCircuit()
+        circuit.append("H", {0, 4, 6})
+        for gates in Logical.LogicalZeroInitialization()[2:]:
+            for symbol, locations, _ in gates.items():
+                circuit.append(symbol, locations)
+        circuit.append("CZ", {(2, 3)})
+        circuit.append("X", {5})
+        circuit.append("CNOT", {(1, 5)})
+        compacted = circuit_scheduling.compact(circuit,
+                                               reorder_commuting=True)
+        self.assertLess(len(compacted),
+                        len(circuit_scheduling.compact(circuit)))
+        numpy.testing.assert_array_equal(final_paulis(compacted, range(7)),
+                                         final_paulis(circuit, range(7)))
+
+    def test_flag_order(self):
+        circuit = Measurement.F1FTECStabMeasCircuit(
+                Steane.BaseSteaneData.x_stabilizers[0])
+        compacted = circuit_scheduling.compact(circuit,
+                                               reorder_commuting=True)
+        self.assertEqual(qudit_sequences(compacted),
+                         qudit_sequences(circuit))
+
+
+if __name__ == "__main__":
+    unittest.main()
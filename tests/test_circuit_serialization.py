@@ -0,0 +1,118 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_circuit_serialization.py
+@author Luc Kusters
+@date 06-11-2022
+"""
+
+import pickle
+import unittest
+
+import numpy
+import pecos
+
+from pecos_toolkit import circuit_registry
+from pecos_toolkit import circuit_scheduling
+from pecos_toolkit import circuit_runner
+from pecos_toolkit import circuit_serialization
+from pecos_toolkit.error_generator_toolkit import ErrorGenerator
+from pecos_toolkit.error_generator_toolkit import error_placer_toolkit
+from pecos_toolkit.qec_codes.steane.circuits import Logical
+from pecos_toolkit.qec_codes.steane.circuits import Measurement
+from pecos_toolkit.qec_codes.steane.circuits import Steane
+
+
+def tick_dicts(circ):
+    return [{(symbol, tuple(sorted(params.items()))): set(locations)
+             for symbol, locations, params in circ.items(tick=tick_idx)}
+            for tick_idx in range(len(circ))]
+
+
+class TestCircuitSerialization(unittest.TestCase):
+
+    def setUp(self):
+        self.circ = pecos.circuits.QuantumCircuit(name="test")
+        self.circ.append("init |0>", {0, 1, 2, 3})
+        self.circ.append("CNOT", {(0, 3), (1, 2)})
+        self.circ.append("RZ", {0}, angle=0.5)
+        self.circ.update("RZ", {1}, angle=0.25)
+        self.circ.add_ticks(1)
+        self.circ.append("measure Z", {3})
+        self.circ.qudits.add(4)
+
+    def test_round_trip(self):
+        circ = circuit_serialization.loads(
+                circuit_serialization.dumps(self.circ))
+        self.assertIs(type(circ), type(self.circ))
+        self.assertEqual(tick_dicts(circ), tick_dicts(self.circ))
+        self.assertEqual(circ.qudits, self.circ.qudits)
+        self.assertEqual(circ.metadata, {"name": "test"})
+
+    def test_arrays(self):
+        arrays = circuit_serialization.load_arrays(
+                circuit_serialization.dumps(self.circ))
+        self.assertEqual(arrays.n_ticks, 5)
+        self.assertEqual(arrays.symbols, ("init |0>", "CNOT", "RZ",
+                                          "measure Z"))
+        numpy.testing.assert_array_equal(arrays.tick,
+                                         [0, 0, 0, 0, 1, 1, 2, 2, 4])
+        numpy.testing.assert_array_equal(arrays.locations[4:6],
+                                         [[0, 3], [1, 2]])
+        numpy.testing.assert_array_equal(arrays.arity,
+                                         [0, 0, 0, 0, 2, 2, 0, 0, 0])
+        self.assertEqual([arrays.params[i] for i in arrays.param[6:8]],
+                         [{"angle": 0.5}, {"angle": 0.25}])
+
+    def test_steane_circuit(self):
+        runner = circuit_runner.ImprovedRunner(random_seed=False)
+        for circ in (Logical.LogicalZeroInitialization(),
+                     circuit_registry.get(Steane.InitPhysicalZero)):
+            data = circuit_serialization.dumps(circ)
+            self.assertNotIn(b"Runner", data)
+            loaded = circuit_serialization.loads(data, runner=runner)
+            self.assertIs(type(loaded), type(circ))
+            self.assertIs(loaded._runner, runner)
+            self.assertEqual(tick_dicts(loaded), tick_dicts(circ))
+        self.assertTrue(circuit_registry.is_frozen(loaded))
+        self.assertEqual(loaded.run().state.num_qubits, loaded.num_qubits)
+
+    def test_constructor_attributes(self):
+        stabs = Steane.BaseSteaneData.z_stabilizers
+        fused = circuit_serialization.loads(circuit_serialization.dumps(
+                Measurement.FusedStabMeasCircuit(stabs)))
+        self.assertEqual(fused.measured_stabilizers, stabs)
+        res = fused.run(Steane.InitPhysicalZero().run().state)
+        self.assertEqual(fused.measurement_row(res.measurements).tolist(),
+                         [0] * 6)
+        circ = circuit_registry.get(Measurement.F1FTECStabMeasCircuit,
+                                    stabs[0])
+        loaded = circuit_serialization.loads(
+                circuit_serialization.dumps(circ))
+        self.assertEqual(circuit_scheduling.flag_qudits(loaded), {7, 8})
+        self.assertEqual(loaded.stabilizer, circ.stabilizer)
+        self.circ.times = numpy.arange(3.)
+        self.circ.callback = print
+        with self.assertRaises(TypeError):
+            circuit_serialization.dumps(self.circ)
+        del self.circ.callback
+        numpy.testing.assert_array_equal(circuit_serialization.loads(
+            circuit_serialization.dumps(self.circ)).times, self.circ.times)
+
+    def test_pickle_error_placer(self):
+        circ = Logical.LogicalZeroInitialization()
+        placer = error_placer_toolkit.ErrorPlacer(
+                circ, [ErrorGenerator.FlipZInit])
+        placer.propagator
+        loaded = pickle.loads(pickle.dumps(placer))
+        self.assertEqual(loaded.possible_errors, placer.possible_errors)
+        self.assertEqual(tick_dicts(loaded.circuit), tick_dicts(circ))
+        self.assertIsNot(loaded.circuit._runner, circ._runner)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            circuit_serialization.loads(b"PKZC" + bytes(16))
+
+
+if __name__ == "__main__":
+    unittest.main()